@@ -1,8 +1,11 @@
+import hashlib
 import streamlit as st
-import validators
-import requests
-from firecrawl_client import FirecrawlClient
-from cache_utils import get_cached_result, set_cached_result
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from endpoints import get_router
+from cache_utils import cache_stats, get_cached_result, get_cached_validation, get_or_refresh, result_cache_key, single_flight
+from metrics import metrics
+from rate_limit import DEFAULT_PLAN, PLAN_LIMITS, PRIORITY_BATCH, PRIORITY_INTERACTIVE, get_scheduler, plan_limit
+from result_view import PAGE_SIZES, ResultSet, paginate, thumbnail_grid_html
 
 st.set_page_config(
     page_title="Image Link Scraper",
@@ -72,6 +75,13 @@ st.markdown("""
         background-color: rgba(0, 255, 136, 0.1);
         border: 1px solid rgba(0, 255, 136, 0.3);
     }
+    .stale-message {
+        color: #FFA500;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        background-color: rgba(255, 165, 0, 0.1);
+        border: 1px solid rgba(255, 165, 0, 0.3);
+    }
     .status-ready {
         color: #00FF88;
         padding: 0.5rem;
@@ -104,46 +114,45 @@ st.markdown("""
 
 if "api_key" not in st.session_state:
     st.session_state.api_key = ""
-if "api_key_validated" not in st.session_state:
-    st.session_state.api_key_validated = False
-if "validated_key" not in st.session_state:
-    st.session_state.validated_key = ""
+if "result_set" not in st.session_state:
+    st.session_state.result_set = None
+# Shared by every session in this process; heavy modules are imported on first use, not on every cold start
+@st.cache_resource(show_spinner=False)
+def shared_extraction_pool():
+    from extract_pool import get_extraction_pool
+    return get_extraction_pool(warm=True)
 
-def validate_api_key(api_key):
-    if not api_key:
-        return False, "No API key provided"
+@st.cache_resource(show_spinner=False)
+def shared_prober():
+    from image_probe import ImageProber
+    return ImageProber()
 
-    try:
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-
-        test_payload = {
-            "url": "https://example.com",
-            "formats": ["html"]
-        }
-
-        response = requests.post(
-            "https://api.firecrawl.dev/v2/scrape",
-            headers=headers,
-            json=test_payload,
-            timeout=5
-        )
+# The scheduler is shared per key and reconfigured on every submit, so it is passed in rather than built here
+@st.cache_resource(show_spinner=False, max_entries=256)
+def shared_client(key_hash, _api_key, _scheduler, scan_stylesheets, priority):
+    from asset_discovery import get_stylesheet_cache
+    from firecrawl_client import FirecrawlClient
+    return FirecrawlClient(
+        _api_key,
+        scheduler=_scheduler,
+        priority=priority,
+        extraction_pool=shared_extraction_pool(),
+        stylesheet_cache=get_stylesheet_cache() if scan_stylesheets else None,
+        endpoints=get_router()
+    )
 
-        if response.status_code == 200:
-            return True, "Connection successful"
-        elif response.status_code == 401:
-            return False, "Invalid API key"
-        elif response.status_code == 429:
-            return True, "API key valid (rate limited)"
-        else:
-            return False, f"Error: {response.status_code}"
+# Counting the disk tier is a table scan, so the Diagnostics panel doesn't redo it on every rerun
+@st.cache_data(ttl=10, show_spinner=False)
+def recent_cache_stats():
+    return cache_stats()
+
+def show_validation_status(placeholder, is_valid, message):
+    if is_valid:
+        placeholder.markdown(f'<div class="status-ready">{message}<br/>Ready to begin scraping</div>', unsafe_allow_html=True)
+    else:
+        placeholder.markdown(f'<div class="status-error">{message}</div>', unsafe_allow_html=True)
 
-    except requests.Timeout:
-        return False, "Connection timeout"
-    except requests.RequestException:
-        return False, "Connection failed"
+pending_validation = None
 
 with st.sidebar:
     st.markdown("### Configuration")
@@ -158,33 +167,28 @@ with st.sidebar:
 
     if api_key != st.session_state.api_key:
         st.session_state.api_key = api_key
-        # Only reset validation if it's actually a different key
-        if api_key != st.session_state.validated_key:
-            st.session_state.api_key_validated = False
 
+    validation_status = st.empty()
     if api_key:
-        # Check if this exact key has already been validated successfully
-        if api_key == st.session_state.validated_key and st.session_state.api_key_validated:
-            # Skip validation - we already know this key works
-            st.markdown('<div class="status-ready">API key validated (cached)<br/>Ready to begin scraping</div>', unsafe_allow_html=True)
-        elif not st.session_state.api_key_validated:
-            # Need to validate this key
-            with st.spinner("Validating API key..."):
-                is_valid, message = validate_api_key(api_key)
-                st.session_state.api_key_validated = is_valid
-
-                if is_valid:
-                    # Store the successfully validated key
-                    st.session_state.validated_key = api_key
-                    st.markdown(f'<div class="status-ready">{message}<br/>Ready to begin scraping</div>', unsafe_allow_html=True)
-                else:
-                    # Clear validated key on failure
-                    st.session_state.validated_key = ""
-                    st.markdown(f'<div class="status-error">{message}</div>', unsafe_allow_html=True)
+        cached_validation = get_cached_validation(api_key)
+        if cached_validation is not None:
+            is_valid, message = cached_validation
+            show_validation_status(validation_status, is_valid, "API key validated (cached)" if is_valid else message)
         else:
-            st.markdown('<div class="status-ready">API key validated<br/>Ready to begin scraping</div>', unsafe_allow_html=True)
+            # Validate in the background; the status is filled in once the page has rendered
+            from firecrawl_client import validate_api_key_async
+            pending_validation = validate_api_key_async(api_key, endpoints=get_router())
+            validation_status.markdown('<div class="status-checking">Validating API key...</div>', unsafe_allow_html=True)
     else:
-        st.markdown('<div class="status-error">API key required</div>', unsafe_allow_html=True)
+        validation_status.markdown('<div class="status-error">API key required</div>', unsafe_allow_html=True)
+
+    plans = list(PLAN_LIMITS)
+    plan = st.selectbox(
+        "Firecrawl plan",
+        plans,
+        index=plans.index(DEFAULT_PLAN) if DEFAULT_PLAN in plans else 0,
+        help="Requests wait in a queue shared by all sessions using this key, to stay within the plan's rate and concurrency limits"
+    )
 
     st.markdown("---")
     st.markdown("""
@@ -192,7 +196,8 @@ with st.sidebar:
     Extract all image URLs from any webpage using the Firecrawl API.
 
     **Features:**
-    - Extracts from `src`, `data-src`, `srcset`, etc.
+    - Extracts from `src`, `data-src`, `srcset`, CSS, `og:image`, JSON-LD, etc.
+    - Single page or whole-site crawl mode
     - Converts relative URLs to absolute
     - Caches results for 10 minutes
     - One-click copy to clipboard
@@ -207,9 +212,75 @@ with st.form("scrape_form"):
         help="Enter the full URL of the webpage to scrape images from"
     )
 
+    crawl_mode = st.checkbox(
+        "Crawl entire site",
+        help="Follow links from this URL and collect images from every crawled page"
+    )
+    limit_col, depth_col = st.columns(2)
+    with limit_col:
+        crawl_limit = st.number_input("Max pages", min_value=1, max_value=10000, value=50, step=10)
+    with depth_col:
+        crawl_depth = st.number_input("Max depth", min_value=0, max_value=10, value=2)
+
+    scan_stylesheets = st.checkbox(
+        "Scan linked stylesheets",
+        help="Also collect background images from the page's CSS files; each file is fetched once and shared across pages"
+    )
+
+    probe_col, size_col = st.columns(2)
+    with probe_col:
+        probe_images = st.checkbox(
+            "Drop dead links and tiny images",
+            help="Check each image with HEAD and small Range requests instead of downloading it"
+        )
+    with size_col:
+        min_image_side = st.number_input("Min width/height (px)", min_value=0, max_value=4096, value=32, step=8)
+
     submit_button = st.form_submit_button("Extract Images", use_container_width=False)
 
+def show_scrape_error(e):
+    error_msg = str(e)
+    if "401" in error_msg:
+        st.markdown('<div class="error-message">Invalid API key. Please check your credentials.</div>', unsafe_allow_html=True)
+    elif "429" in error_msg:
+        st.markdown('<div class="error-message">Rate limit exceeded. Please try again later.</div>', unsafe_allow_html=True)
+    elif "timeout" in error_msg.lower():
+        st.markdown('<div class="error-message">Request timed out. The page may be too large or slow to load.</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="error-message">Error: {error_msg}</div>', unsafe_allow_html=True)
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+class CrawlTimedOut(ValueError):
+    def __init__(self, image_urls, pages_seen):
+        super().__init__(f"Request timeout: crawl stopped after {pages_seen} page(s)")
+        self.image_urls = image_urls
+        self.pages_seen = pages_seen
+
+def crawl_site(client, url, limit, max_depth):
+    progress = st.progress(0.0, text="Starting crawl...")
+    crawl = client.crawl_images(url, limit=limit, max_depth=max_depth)
+    for page in crawl:
+        fraction = page.completed / page.total if page.total else 0.0
+        progress.progress(
+            min(fraction, 1.0),
+            text=f"Crawled {crawl.pages_seen} page(s) ({page.completed}/{page.total or '?'}), "
+                 f"{len(crawl.image_urls)} unique image(s) so far"
+        )
+    if crawl.timed_out:
+        # Raised rather than returned so single_flight does not cache a partial crawl as the site's result
+        raise CrawlTimedOut(crawl.image_urls, crawl.pages_seen)
+    progress.progress(1.0, text=f"Crawl finished: {crawl.pages_seen} page(s)")
+    return crawl.image_urls
+
 if submit_button:
+    import validators
+
     if not st.session_state.api_key:
         st.markdown('<div class="error-message">Please enter your Firecrawl API key in the sidebar</div>', unsafe_allow_html=True)
     elif not url_input:
@@ -217,64 +288,179 @@ if submit_button:
     elif not validators.url(url_input):
         st.markdown('<div class="error-message">Please enter a valid URL</div>', unsafe_allow_html=True)
     else:
-        cache_key = f"{st.session_state.api_key[:8]}:{url_input}"
-        cached_result = get_cached_result(cache_key)
+        cache_key = result_cache_key(
+            st.session_state.api_key,
+            url_input,
+            stylesheets=scan_stylesheets,
+            crawl=(crawl_limit, crawl_depth) if crawl_mode else None
+        )
+        key_hash = hashlib.sha256(st.session_state.api_key.encode()).hexdigest()
+        scheduler = get_scheduler(st.session_state.api_key, plan_limit(plan))
+        client = shared_client(key_hash, st.session_state.api_key, scheduler, scan_stylesheets, PRIORITY_INTERACTIVE)
+        image_urls = None
+
+        if crawl_mode:
+            cached_result = get_cached_result(cache_key)
+            cached_entry = None
+        else:
+            page_url = url_input
+            refresh_client = shared_client(key_hash, st.session_state.api_key, scheduler, scan_stylesheets, PRIORITY_BATCH)
+            cached_entry = get_or_refresh(cache_key, lambda: refresh_client.scrape_images(page_url))
+            cached_result = cached_entry.value if cached_entry is not None else None
 
         if cached_result:
             image_urls = cached_result
-            st.markdown('<div class="success-message">Results loaded from cache</div>', unsafe_allow_html=True)
+            if cached_entry is not None and cached_entry.stale:
+                st.markdown(
+                    f'<div class="stale-message">Showing results cached {format_age(cached_entry.age)} ago; '
+                    f'refreshing in the background</div>',
+                    unsafe_allow_html=True
+                )
+            else:
+                st.markdown('<div class="success-message">Results loaded from cache</div>', unsafe_allow_html=True)
         else:
-            with st.spinner("Scraping webpage..."):
-                try:
-                    client = FirecrawlClient(st.session_state.api_key)
-                    image_urls = client.scrape_images(url_input)
-
-                    if image_urls:
-                        set_cached_result(cache_key, image_urls)
-                        st.markdown(f'<div class="success-message">Found {len(image_urls)} unique image(s)</div>', unsafe_allow_html=True)
+            try:
+                with client.track_queue_time() as queue_timer:
+                    if crawl_mode:
+                        image_urls = single_flight(
+                            cache_key,
+                            lambda: crawl_site(client, url_input, int(crawl_limit), int(crawl_depth)),
+                            timeout=None
+                        )
                     else:
-                        st.markdown('<div class="error-message">No images found on this page</div>', unsafe_allow_html=True)
-
-                except ValueError as e:
-                    error_msg = str(e)
-                    if "401" in error_msg:
-                        st.markdown('<div class="error-message">Invalid API key. Please check your credentials.</div>', unsafe_allow_html=True)
-                    elif "429" in error_msg:
-                        st.markdown('<div class="error-message">Rate limit exceeded. Please try again later.</div>', unsafe_allow_html=True)
-                    elif "timeout" in error_msg.lower():
-                        st.markdown('<div class="error-message">Request timed out. The page may be too large or slow to load.</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f'<div class="error-message">Error: {error_msg}</div>', unsafe_allow_html=True)
-                except Exception as e:
-                    st.markdown(f'<div class="error-message">Unexpected error: {str(e)}</div>', unsafe_allow_html=True)
-                    image_urls = []
-
-        if "image_urls" in locals() and image_urls:
-            st.markdown("### Extracted Image URLs")
-
-            col1, col2 = st.columns([3, 1])
-
-            with col2:
-                try:
-                    from st_copy_to_clipboard import st_copy_to_clipboard
-                    st_copy_to_clipboard(
-                        "\n".join(image_urls),
-                        "Copy All URLs",
-                        key="copy_button"
-                    )
-                except ImportError:
-                    st.download_button(
-                        label="Download URLs",
-                        data="\n".join(image_urls),
-                        file_name="image_urls.txt",
-                        mime="text/plain"
-                    )
-
-            urls_text = "\n".join(image_urls)
-            st.text_area(
-                "Image URLs (one per line)",
-                value=urls_text,
-                height=400,
-                disabled=False,
-                label_visibility="collapsed"
-            )
\ No newline at end of file
+                        with st.spinner("Scraping webpage..."):
+                            image_urls = single_flight(cache_key, lambda: client.scrape_images(url_input))
+
+                if queue_timer.seconds >= 0.1:
+                    st.caption(f"Waited {queue_timer.seconds:.1f}s in the rate limit queue")
+                if image_urls:
+                    st.markdown(f'<div class="success-message">Found {len(image_urls)} unique image(s)</div>', unsafe_allow_html=True)
+                else:
+                    st.markdown('<div class="error-message">No images found on this page</div>', unsafe_allow_html=True)
+
+            except CrawlTimedOut as e:
+                image_urls = e.image_urls
+                st.markdown(
+                    f'<div class="stale-message">The crawl did not finish in time. Showing {len(image_urls)} image(s) '
+                    f'from the first {e.pages_seen} page(s); these partial results are not cached</div>',
+                    unsafe_allow_html=True
+                )
+            except ValueError as e:
+                show_scrape_error(e)
+            except Exception as e:
+                st.markdown(f'<div class="error-message">Unexpected error: {str(e)}</div>', unsafe_allow_html=True)
+                image_urls = []
+
+        if image_urls and probe_images:
+            from image_probe import filter_images
+
+            with st.spinner("Probing images..."):
+                kept = filter_images(
+                    shared_prober().probe_many(image_urls),
+                    min_width=int(min_image_side),
+                    min_height=int(min_image_side)
+                )
+            removed = len(image_urls) - len(kept)
+            image_urls = [info.url for info in kept]
+            st.markdown(f'<div class="success-message">Removed {removed} dead, non-image or tiny URL(s)</div>', unsafe_allow_html=True)
+
+        # Keep the result across reruns so paging and filtering don't re-scrape; a failed scrape clears it
+        st.session_state.result_set = ResultSet(image_urls) if image_urls else None
+        st.session_state.result_page = 1
+
+result_set = st.session_state.result_set
+if result_set:
+    st.markdown("### Extracted Image URLs")
+
+    ext_col, domain_col, query_col = st.columns([1, 1, 2])
+    with ext_col:
+        selected_extensions = st.multiselect("File types", result_set.extensions, key="filter_extensions")
+    with domain_col:
+        selected_domains = st.multiselect("Domains", result_set.domains, key="filter_domains")
+    with query_col:
+        query = st.text_input("URL contains", key="filter_query")
+    filtered_urls = result_set.filter(selected_extensions, selected_domains, query)
+
+    size_col, page_col, thumb_col, copy_col = st.columns([1, 1, 1, 1])
+    with size_col:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key="result_page_size")
+    total_pages = paginate(filtered_urls, 1, page_size)[1]
+    st.session_state.result_page = min(max(st.session_state.get("result_page", 1), 1), total_pages)
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key="result_page")
+    with thumb_col:
+        show_thumbnails = st.toggle("Thumbnails", help="Lazy-load previews for the current page only")
+    with copy_col:
+        try:
+            from st_copy_to_clipboard import st_copy_to_clipboard
+            st_copy_to_clipboard(
+                result_set.text,
+                "Copy All URLs",
+                key="copy_button"
+            )
+        except ImportError:
+            st.download_button(
+                label="Download URLs",
+                data=result_set.text,
+                file_name="image_urls.txt",
+                mime="text/plain"
+            )
+
+    page_urls, _ = paginate(filtered_urls, int(page), page_size)
+    first_row = (int(page) - 1) * page_size
+    st.caption(
+        f"Showing {first_row + 1 if page_urls else 0}-{first_row + len(page_urls)} of {len(filtered_urls)} "
+        f"matching URL(s) ({len(result_set)} total)"
+    )
+
+    if show_thumbnails:
+        st.markdown(thumbnail_grid_html(page_urls), unsafe_allow_html=True)
+    else:
+        st.dataframe(
+            {"Image URL": page_urls},
+            column_config={"Image URL": st.column_config.LinkColumn("Image URL")},
+            hide_index=True,
+            use_container_width=True,
+            height=400
+        )
+
+with st.sidebar:
+    with st.expander("Diagnostics"):
+        stats = recent_cache_stats()
+        st.caption(
+            f"Memory cache: {stats['memory_entries']} entries, {stats['memory_urls']} URLs, "
+            f"{stats['memory_bytes'] / 1024:.0f} / {stats['memory_max_bytes'] / 1024:.0f} KiB"
+        )
+        if "disk_entries" in stats:
+            st.caption(f"Disk cache: {stats['disk_entries']} entries, {stats['disk_bytes'] / 1024:.0f} KiB")
+        router = get_router()
+        if router is not None:
+            st.dataframe(router.stats(), hide_index=True, use_container_width=True)
+        metrics.enabled = st.toggle("Collect metrics", value=metrics.enabled)
+        stage_rows = [
+            {"stage": labels.get("stage", ""), "calls": count, "total ms": round(total * 1000, 1), "mean ms": round(total / count * 1000, 2)}
+            for name, labels, count, total in metrics.summaries()
+            if name == "stage_seconds" and count
+        ]
+        if stage_rows:
+            st.dataframe(stage_rows, hide_index=True, use_container_width=True)
+        counter_rows = [
+            {"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels.items()), "value": value}
+            for name, labels, value in metrics.counters()
+        ]
+        if counter_rows:
+            st.dataframe(counter_rows, hide_index=True, use_container_width=True)
+        if not stage_rows and not counter_rows:
+            st.caption("No metrics recorded yet")
+        else:
+            st.code(metrics.to_prometheus(), language="text")
+            if st.button("Reset metrics"):
+                metrics.reset()
+                st.rerun()
+
+if pending_validation is not None:
+    try:
+        is_valid, message = pending_validation.result(timeout=15)
+    except FutureTimeoutError:
+        is_valid, message = False, "Connection timeout"
+    show_validation_status(validation_status, is_valid, message)
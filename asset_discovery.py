@@ -0,0 +1,200 @@
+from cachetools import LRUCache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urljoin
+import json
+import re
+import threading
+import time
+
+import requests
+
+from metrics import metrics
+from url_guard import guarded_request
+
+DEFAULT_STYLESHEET_TTL = 3600
+DEFAULT_STYLESHEET_MAX_BYTES = 2 * 1024 * 1024
+STYLESHEET_ERROR_RETRY = 60
+STYLESHEET_LOCK_STRIPES = 64
+
+META_IMAGE_PROPERTIES = frozenset({
+    "og:image", "og:image:url", "og:image:secure_url", "twitter:image", "twitter:image:src",
+})
+JSON_LD_IMAGE_KEYS = frozenset({"image", "thumbnailUrl", "logo"})
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_URL_PATTERN = re.compile(r"""url\(\s*(?:"([^"]*)"|'([^']*)'|([^)\s"']+))\s*\)""", re.IGNORECASE)
+_NON_IMAGE_EXTENSIONS = (
+    ".css", ".js", ".htc", ".woff", ".woff2", ".ttf", ".otf", ".eot", ".cur", ".ani", ".mp4", ".webm", ".ogg", ".mp3",
+)
+
+
+def _is_image_reference(url: str) -> bool:
+    if not url or url.startswith("#"):
+        return False
+    path = url.split("#", 1)[0].split("?", 1)[0].lower()
+    return not path.endswith(_NON_IMAGE_EXTENSIONS)
+
+
+def css_image_urls(css: str) -> List[str]:
+    if "url(" not in css.lower():
+        return []
+    if "/*" in css:
+        css = _CSS_COMMENT.sub("", css)
+    urls = []
+    for match in _CSS_URL_PATTERN.finditer(css):
+        url = (match.group(1) or match.group(2) or match.group(3) or "").strip()
+        if _is_image_reference(url):
+            urls.append(url)
+    return urls
+
+
+def _is_image_object(node: Dict[str, Any]) -> bool:
+    node_type = node.get("@type")
+    return node_type == "ImageObject" or (isinstance(node_type, list) and "ImageObject" in node_type)
+
+
+def _collect_json_ld_images(node: Any, urls: List[str], as_image: bool = False) -> None:
+    if isinstance(node, str):
+        if as_image:
+            urls.append(node)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_json_ld_images(item, urls, as_image)
+    elif isinstance(node, dict):
+        # Under image/logo/thumbnailUrl a dict is an ImageObject even without @type; elsewhere only typed
+        # ImageObjects count, so a VideoObject's contentUrl is never reported as an image
+        if as_image or _is_image_object(node):
+            url = node.get("contentUrl") or node.get("url")
+            if isinstance(url, str):
+                urls.append(url)
+        for key, value in node.items():
+            if isinstance(value, (dict, list)) or key in JSON_LD_IMAGE_KEYS:
+                _collect_json_ld_images(value, urls, key in JSON_LD_IMAGE_KEYS)
+
+
+def json_ld_image_urls(text: str) -> List[str]:
+    try:
+        data = json.loads(text, strict=False)
+    except ValueError:
+        return []
+    urls: List[str] = []
+    _collect_json_ld_images(data, urls)
+    return urls
+
+
+class _Stylesheet(NamedTuple):
+    image_urls: List[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class StylesheetCache:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        ttl: float = DEFAULT_STYLESHEET_TTL,
+        maxsize: int = 1024,
+        timeout: float = 10,
+        max_bytes: int = DEFAULT_STYLESHEET_MAX_BYTES,
+        allow_private: bool = False
+    ):
+        if session is None:
+            from firecrawl_client import get_shared_session
+
+            session = get_shared_session()
+        self.session = session
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.allow_private = allow_private
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        # A fixed pool of striped locks keeps concurrent fetches of one URL single-flight without growing per URL
+        self._url_locks = [threading.Lock() for _ in range(STYLESHEET_LOCK_STRIPES)]
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        return self._url_locks[hash(url) % len(self._url_locks)]
+
+    def _get_entry(self, url: str) -> Optional[_Stylesheet]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def _set_entry(self, url: str, entry: _Stylesheet) -> None:
+        with self._lock:
+            self._entries[url] = entry
+
+    def _fetch(self, url: str, cached: Optional[_Stylesheet]) -> _Stylesheet:
+        headers = {"Accept": "text/css,*/*;q=0.1"}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        with guarded_request(
+            self.session, "GET", url, self.allow_private, headers=headers, timeout=self.timeout, stream=True
+        ) as response:
+            if response.status_code == 304 and cached is not None:
+                metrics.inc("stylesheet_requests_total", result="revalidated")
+                return cached._replace(fetched_at=time.time())
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+
+            body = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise ValueError("Stylesheet too large")
+            css = bytes(body).decode(response.encoding or "utf-8", errors="replace")
+
+            metrics.inc("stylesheet_requests_total", result="fetched")
+            return _Stylesheet(
+                [urljoin(url, image_url) for image_url in css_image_urls(css)],
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                time.time()
+            )
+
+    def image_urls(self, url: str) -> List[str]:
+        cached = self._get_entry(url)
+        if cached is not None and time.time() - cached.fetched_at < self.ttl:
+            metrics.inc("stylesheet_requests_total", result="hit")
+            return cached.image_urls
+
+        with self._url_lock(url):
+            cached = self._get_entry(url)
+            if cached is not None and time.time() - cached.fetched_at < self.ttl:
+                metrics.inc("stylesheet_requests_total", result="hit")
+                return cached.image_urls
+
+            try:
+                entry = self._fetch(url, cached)
+            except (requests.RequestException, ValueError):
+                metrics.inc("stylesheet_requests_total", result="error")
+                retry_at = time.time() - self.ttl + min(self.ttl, STYLESHEET_ERROR_RETRY)
+                if cached is None:
+                    cached = _Stylesheet([], None, None, retry_at)
+                self._set_entry(url, cached._replace(fetched_at=retry_at))
+                return cached.image_urls
+
+            self._set_entry(url, entry)
+            return entry.image_urls
+
+    def image_urls_many(self, urls: Iterable[str]) -> List[str]:
+        return [image_url for url in urls for image_url in self.image_urls(url)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache: Optional[StylesheetCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_stylesheet_cache() -> StylesheetCache:
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = StylesheetCache()
+        return _shared_cache
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ("requests", "validators", "firecrawl_client", "image_probe", "extract_pool", "lxml")
+API_KEY = "fc-bench-app-key"
+URL_LABEL = "Enter URL to scrape"
+
+# Filled in by the wrapper script, which times each execution of the app script itself. AppTest's own
+# wall time per run is dominated by its polling loop, so it is reported separately.
+SCRIPT_SECONDS: List[float] = []
+SCRIPT_CODE: Dict[str, object] = {}
+
+_WRAPPER = """import time
+import bench_app
+code = bench_app.SCRIPT_CODE.get({script!r})
+if code is None:
+    with open({script!r}) as f:
+        code = bench_app.SCRIPT_CODE[{script!r}] = compile(f.read(), {script!r}, "exec")
+start = time.perf_counter()
+try:
+    exec(code, {{"__name__": "__main__", "__file__": {script!r}}})
+finally:
+    bench_app.SCRIPT_SECONDS.append(time.perf_counter() - start)
+"""
+
+
+def _cold_start(script: str) -> Dict[str, object]:
+    from streamlit.testing.v1 import AppTest
+
+    before = set(sys.modules)
+    at = AppTest.from_file(script, default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - start
+    start = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - start
+    loaded = set(sys.modules) - before
+    return {
+        "first_run_ms": round(first_run * 1000, 1),
+        "second_run_ms": round(rerun * 1000, 1),
+        "modules_loaded": len(loaded),
+        "heavy_loaded": sorted(name for name in HEAVY_MODULES if name in loaded),
+    }
+
+
+def _cold_starts(script: str, runs: int) -> List[Dict[str, object]]:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--cold", "--script", script],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "IMAGE_SCRAPER_CACHE_PATH": os.devnull},
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def _ms(values: List[float]) -> str:
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, max(int(len(values) * 0.95 + 0.5) - 1, 0))]
+    return f"{statistics.mean(values) * 1000:>9.1f}{p95 * 1000:>9.1f}"
+
+
+def _sessions(script: str, sessions: int, reruns: int, disk_entries: int, tmp: str) -> Dict[str, List[float]]:
+    import bench_app
+    from fake_firecrawl import FakeFirecrawl
+
+    fake = FakeFirecrawl(page_kb=[32], tags=100).start()
+    os.environ["FIRECRAWL_BASE_URL"] = fake.base_url
+    os.environ["FIRECRAWL_PLAN"] = "growth"
+    from streamlit.testing.v1 import AppTest
+    from cache_utils import DiskCache, clear_cache, configure_disk_cache
+
+    path = os.path.join(tmp, "cache.sqlite3")
+    disk = DiskCache(path)
+    urls = [f"https://cdn.example.com/{i}.jpg" for i in range(100)]
+    for i in range(disk_entries):
+        disk.set(f"bench:{i}", urls)
+    disk.close()
+    configure_disk_cache(path)
+    timings: Dict[str, List[float]] = {}
+
+    def timed(phase: str, run) -> None:
+        start = time.perf_counter()
+        run()
+        timings.setdefault(f"{phase} (AppTest)", []).append(time.perf_counter() - start)
+        timings.setdefault(f"{phase} (script)", []).append(bench_app.SCRIPT_SECONDS[-1])
+
+    wrapper = os.path.join(tmp, "bench_app_wrapper.py")
+    with open(wrapper, "w") as f:
+        f.write(_WRAPPER.format(script=script))
+    try:
+        for session in range(sessions):
+            at = AppTest.from_file(wrapper, default_timeout=60)
+            timed("first render", at.run)
+            timed("enter key", lambda: at.text_input(key="api_key_input").input(API_KEY).run())
+            next(field for field in at.text_input if field.label == URL_LABEL).input(f"https://shop.example.com/{session}/")
+            timed("submit", lambda: at.button[0].click().run())
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            if not any("unique image" in element.value for element in at.markdown):
+                raise RuntimeError("Submit did not scrape the page")
+            for _ in range(reruns):
+                timed("rerun", at.run)
+    finally:
+        fake.stop()
+        clear_cache()
+        configure_disk_cache(None)
+    return dict(sorted(timings.items(), key=lambda item: item[0].endswith("(AppTest)")))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time app.py cold starts and reruns with Streamlit's AppTest")
+    parser.add_argument("--script", default=os.path.join(ROOT, "app.py"), help="app script to time (default: app.py)")
+    parser.add_argument("--sessions", type=int, default=10, help="simulated sessions (default: 10)")
+    parser.add_argument("--reruns", type=int, default=20, help="plain reruns per session after a scrape (default: 20)")
+    parser.add_argument("--cold-runs", type=int, default=3, help="fresh interpreters for cold-start timing (default: 3)")
+    parser.add_argument("--disk-entries", type=int, default=2000, help="entries preloaded into the disk cache tier (default: 2000)")
+    parser.add_argument("--cold", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    script = os.path.abspath(args.script)
+
+    if args.cold:
+        print(json.dumps(_cold_start(script)))
+        return 0
+
+    cold = _cold_starts(script, args.cold_runs)
+    print(f"{script}")
+    print(
+        f"cold start: first run {statistics.median(r['first_run_ms'] for r in cold):.1f} ms, "
+        f"second run {statistics.median(r['second_run_ms'] for r in cold):.1f} ms, "
+        f"{cold[0]['modules_loaded']} modules loaded, heavy: {', '.join(cold[0]['heavy_loaded']) or 'none'}"
+    )
+
+    os.environ["STREAMLIT_LOGGER_LEVEL"] = "error"
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = _sessions(script, args.sessions, args.reruns, args.disk_entries, tmp)
+    print(f"{'phase':<24}{'count':>7}{'mean ms':>9}{'p95 ms':>9}")
+    for phase, values in timings.items():
+        print(f"{phase:<24}{len(values):>7}{_ms(values)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
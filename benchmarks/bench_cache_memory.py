@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zlib
+from os.path import commonprefix
+from typing import Any, Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cache_utils import CompactUrlList
+from firecrawl_client import extract_image_urls_from_html
+from synthetic import generate_page
+
+PAGE_URL = "https://shop.example.com/catalog/"
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def front_encode(urls: List[str]) -> bytes:
+    out = bytearray()
+    previous = ""
+    for url in urls:
+        shared = len(commonprefix((previous, url)))
+        suffix = url[shared:].encode("utf-8")
+        _write_varint(shared, out)
+        _write_varint(len(suffix), out)
+        out += suffix
+        previous = url
+    return bytes(out)
+
+
+def front_decode(data: bytes) -> List[str]:
+    urls: List[str] = []
+    previous = ""
+    pos = 0
+    while pos < len(data):
+        shared, pos = _read_varint(data, pos)
+        length, pos = _read_varint(data, pos)
+        previous = previous[:shared] + data[pos:pos + length].decode("utf-8")
+        urls.append(previous)
+        pos += length
+    return urls
+
+
+def _page_urls(count: int) -> List[str]:
+    html = generate_page(count * 400, count * 2, seed=1)
+    return extract_image_urls_from_html(html, PAGE_URL)[:count]
+
+
+def _mixed_urls(count: int) -> List[str]:
+    rng = random.Random(2)
+    hosts = [f"https://img{i}.example-{i % 17}.net" for i in range(200)]
+    return [f"{rng.choice(hosts)}/{rng.getrandbits(64):016x}/{i}.jpg" for i in range(count)]
+
+
+def _measure(label: str, urls: List[str], encode: Callable[[List[str]], Any], decode: Callable[[Any], List[str]]) -> None:
+    tracemalloc.start()
+    copies = [url.encode().decode() for url in urls]
+    stored = encode(copies)
+    del copies
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    decoded = decode(stored)
+    decode_ms = (time.perf_counter() - start) * 1000
+    assert decoded == urls
+    print(f"{label:<24}{current / len(urls) * 10000 / 1024:>14.1f}{decode_ms / len(urls) * 10000:>16.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Memory per 10k cached URLs for each storage format")
+    parser.add_argument("--urls", type=int, default=50_000, help="URLs per list (default: 50000)")
+    args = parser.parse_args(argv)
+
+    for name, urls in (("page", _page_urls(args.urls)), ("mixed hosts", _mixed_urls(args.urls))):
+        print(f"{name}: {len(urls)} URLs, {sum(len(url) for url in urls) / len(urls):.0f} chars on average")
+        print(f"{'format':<24}{'KiB / 10k':>14}{'decode ms / 10k':>16}")
+        _measure("list[str] (before)", urls, list, list)
+        _measure("json", urls, lambda items: json.dumps(items).encode(), json.loads)
+        _measure("front-coded", urls, front_encode, front_decode)
+        _measure("zlib(front-coded)", urls, lambda items: zlib.compress(front_encode(items)), lambda blob: front_decode(zlib.decompress(blob)))
+        _measure("zlib(json) (now)", urls, CompactUrlList.from_urls, CompactUrlList.to_list)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from firecrawl_client import EXTRACTION_ENGINES, extract_image_urls_from_html
+from synthetic import generate_page
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BASE_URL = "https://shop.example.com/catalog/"
+
+
+class Scenario(NamedTuple):
+    name: str
+    target_bytes: int
+    image_tags: int
+    style_ratio: float
+    nesting_depth: int
+    quick: bool
+
+
+SCENARIOS = [
+    Scenario("small-10kb", 10_000, 10, 0.1, 4, True),
+    Scenario("listing-1mb", 1_000_000, 5_000, 0.1, 4, True),
+    Scenario("style-heavy-2mb", 2_000_000, 2_000, 0.9, 4, True),
+    Scenario("deep-nesting", 500_000, 100, 0.1, 200, True),
+    Scenario("catalog-20mb", 20_000_000, 100_000, 0.1, 1, False),
+]
+
+
+def _available_engines() -> List[str]:
+    engines = []
+    for engine in EXTRACTION_ENGINES:
+        try:
+            extract_image_urls_from_html("<img src='/a.jpg'>", BASE_URL, engine=engine)
+        except ImportError:
+            continue
+        engines.append(engine)
+    return engines
+
+
+def run_scenario(scenario: Scenario, engine: str, repeat: int) -> Dict[str, float]:
+    html = generate_page(scenario.target_bytes, scenario.image_tags, scenario.style_ratio, scenario.nesting_depth)
+    size_mb = len(html.encode("utf-8")) / 1_000_000
+    tags = html.count("<img") + html.count("<source")
+
+    timings = []
+    urls: List[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        urls = extract_image_urls_from_html(html, BASE_URL, engine=engine)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    tracemalloc.start()
+    extract_image_urls_from_html(html, BASE_URL, engine=engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "size_mb": round(size_mb, 3),
+        "tags": tags,
+        "urls": len(urls),
+        "seconds": round(best, 6),
+        "mb_per_s": round(size_mb / best, 3),
+        "tags_per_s": round(tags / best, 1),
+        "peak_mb": round(peak / 1_000_000, 3),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current["mb_per_s"] < previous["mb_per_s"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {current['mb_per_s']:.2f} MB/s vs baseline {previous['mb_per_s']:.2f} MB/s"
+            )
+        if current["peak_mb"] > previous["peak_mb"] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak memory {current['peak_mb']:.2f} MB vs baseline {previous['peak_mb']:.2f} MB"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark extract_image_urls_from_html on synthetic pages")
+    parser.add_argument("--engine", choices=EXTRACTION_ENGINES, action="append", help="engine(s) to run (default: all installed)")
+    parser.add_argument("--quick", action="store_true", help="skip the multi-megabyte catalog scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario; the best one is reported")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON path")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (default: 0.2)")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit non-zero on regressions; only meaningful against a baseline recorded on this machine"
+    )
+    args = parser.parse_args(argv)
+
+    engines = args.engine or _available_engines()
+    scenarios = [s for s in SCENARIOS if s.quick or not args.quick]
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'scenario':<28}{'MB':>9}{'tags':>9}{'sec':>10}{'MB/s':>9}{'tags/s':>12}{'peak MB':>10}")
+    for engine in engines:
+        for scenario in scenarios:
+            key = f"{scenario.name}[{engine}]"
+            result = run_scenario(scenario, engine, args.repeat)
+            results[key] = result
+            print(
+                f"{key:<28}{result['size_mb']:>9.2f}{result['tags']:>9}{result['seconds']:>10.4f}"
+                f"{result['mb_per_s']:>9.2f}{result['tags_per_s']:>12.0f}{result['peak_mb']:>10.2f}"
+            )
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    # The committed baseline comes from one machine, so differences are only reported unless --check is given
+    label = "REGRESSION" if args.check else "DIFF"
+    for regression in regressions:
+        print(f"{label} {regression}")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cache_utils import clear_cache, configure_disk_cache, get_cached_result, result_cache_key, single_flight
+from fake_firecrawl import add_server_arguments, server_from_args
+from firecrawl_client import FirecrawlClient
+from rate_limit import PLAN_LIMITS, get_scheduler
+
+PAGE_URL = "https://shop.example.com/catalog/"
+
+
+class Sample(NamedTuple):
+    seconds: float
+    outcome: str
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(math.ceil(fraction * len(sorted_values)) - 1, 0))
+    return sorted_values[index]
+
+
+def _error_kind(error: Exception) -> str:
+    return str(error).split(":", 1)[0] or type(error).__name__
+
+
+def _scrape(client: FirecrawlClient, url: str, use_cache: bool) -> Sample:
+    start = time.perf_counter()
+    try:
+        if not use_cache:
+            client.scrape_images(url)
+            outcome = "fetched"
+        elif get_cached_result(result_cache_key(client.api_key, url)):
+            outcome = "cached"
+        else:
+            single_flight(result_cache_key(client.api_key, url), lambda: client.scrape_images(url))
+            outcome = "fetched"
+    except ValueError as e:
+        outcome = f"error: {_error_kind(e)}"
+    return Sample(time.perf_counter() - start, outcome)
+
+
+def run_load(
+    client: FirecrawlClient,
+    requests: int,
+    unique: int,
+    concurrency: int,
+    use_cache: bool = True,
+    seed: int = 0
+) -> Dict[str, object]:
+    rng = random.Random(seed)
+    urls = [f"{PAGE_URL}{rng.randrange(unique)}/" for _ in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(lambda url: _scrape(client, url, use_cache), urls))
+    wall = time.perf_counter() - start
+
+    outcomes: Dict[str, int] = {}
+    for sample in samples:
+        outcomes[sample.outcome] = outcomes.get(sample.outcome, 0) + 1
+    errors = sum(count for outcome, count in outcomes.items() if outcome.startswith("error"))
+
+    latency = {}
+    groups = {"all": samples, "fetched": [s for s in samples if s.outcome == "fetched"], "cached": [s for s in samples if s.outcome == "cached"]}
+    for name, group in groups.items():
+        values = sorted(s.seconds * 1000 for s in group)
+        if values:
+            latency[name] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50), 1),
+                "p95_ms": round(percentile(values, 0.95), 1),
+                "p99_ms": round(percentile(values, 0.99), 1),
+                "max_ms": round(values[-1], 1),
+            }
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "queue_seconds": round(client.queue_seconds, 3),
+        "outcomes": outcomes,
+        "latency": latency,
+    }
+
+
+def _print_report(report: Dict[str, object], statuses: Optional[Dict[int, int]]) -> None:
+    print(
+        f"{report['requests']} requests, concurrency {report['concurrency']}: "
+        f"{report['wall_seconds']:.2f}s, {report['throughput_rps']:.1f} req/s, error rate {report['error_rate']:.2%}"
+    )
+    print(f"{'latency':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in report["latency"].items():
+        print(f"{name:<10}{row['count']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    for outcome, count in sorted(report["outcomes"].items()):
+        print(f"  {outcome}: {count}")
+    if report["queue_seconds"]:
+        print(f"  rate limit queue: {report['queue_seconds']:.2f}s total")
+    if statuses:
+        print("  server responses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Drive concurrent scrapes through the client and cache against a fake Firecrawl")
+    parser.add_argument("--requests", type=int, default=500, help="total scrapes (default: 500)")
+    parser.add_argument("--unique", type=int, default=200, help="distinct page URLs; repeats hit the cache (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent scrapes (default: 16)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the result cache")
+    parser.add_argument("--disk-cache", action="store_true", help="include a fresh on-disk cache tier")
+    parser.add_argument("--plan", choices=PLAN_LIMITS, help="queue requests within this plan's rate limits")
+    parser.add_argument("--max-retries", type=int, default=3, help="client retries on 429/503 (default: 3)")
+    parser.add_argument("--base-url", help="target an already running server instead of starting a fake one")
+    parser.add_argument("--api-key", default="fc-load-test", help="API key sent to the server (default: fc-load-test)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_disk_cache(os.path.join(tmp, "cache.sqlite3") if args.disk_cache else None)
+        clear_cache()
+        try:
+            fake = None if args.base_url else server_from_args(args).start()
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            client = FirecrawlClient(
+                args.api_key,
+                base_url=args.base_url or fake.base_url,
+                pool_size=args.concurrency,
+                max_retries=args.max_retries,
+                scheduler=get_scheduler(args.api_key, PLAN_LIMITS[args.plan]) if args.plan else None
+            )
+            report = run_load(client, args.requests, max(args.unique, 1), args.concurrency, not args.no_cache, args.seed)
+        finally:
+            if fake is not None:
+                fake.stop()
+            configure_disk_cache(None)
+
+    if args.json:
+        report["server_statuses"] = fake.statuses if fake is not None else None
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report, fake.statuses if fake is not None else None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import url_normalize
+from url_normalize import DEFAULT_CDN_RULES, UrlCanonicalizer, canonicalize_urls
+
+BASE_URL = "https://shop.example.com/catalog/"
+
+
+def generate_pages(pages: int, urls_per_page: int, shared_ratio: float, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    shared = [f"/assets/icon-{i}.svg" for i in range(max(1, int(urls_per_page * shared_ratio)))]
+    result = []
+    for page in range(pages):
+        raw = list(shared)
+        for i in range(urls_per_page - len(shared)):
+            product = rng.randrange(urls_per_page * 2)
+            variant = rng.choice((
+                f"images/p{product}.jpg",
+                f"/catalog/images/p{product}.jpg#zoom",
+                f"https://SHOP.example.com:443/catalog/images/p{product}.jpg",
+                f"https://acme.imgix.net/p{product}.jpg?w={rng.choice((200, 400, 800))}",
+                f"https://cdn.shopify.com/s/files/1/p{product}_{rng.choice((100, 300))}x.jpg?v=1",
+            ))
+            raw.append(variant)
+        result.append(list(dict.fromkeys(raw)))
+    return result
+
+
+def legacy_normalize(raw_urls: List[str], base_url: str) -> Tuple[List[str], int]:
+    absolute_urls: List[str] = []
+    seen: Set[str] = set()
+    collapsed = 0
+    for url in raw_urls:
+        url = url.strip()
+        if not url or url.startswith("data:") or url.startswith("javascript:"):
+            continue
+        normalized_url = urlparse(urljoin(base_url, url))._replace(fragment="").geturl()
+        if normalized_url in seen:
+            collapsed += 1
+        else:
+            seen.add(normalized_url)
+            absolute_urls.append(normalized_url)
+    return absolute_urls, collapsed
+
+
+def _measure(label: str, pages: List[List[str]], run: Callable[[List[str]], Tuple[List[str], int]]) -> None:
+    start = time.perf_counter()
+    kept = collapsed = 0
+    for raw in pages:
+        urls, page_collapsed = run(raw)
+        kept += len(urls)
+        collapsed += page_collapsed
+    seconds = time.perf_counter() - start
+    total = sum(len(raw) for raw in pages)
+    print(f"{label:<28}{seconds:>10.3f}{total / seconds / 1000:>12.1f}{kept:>10}{collapsed:>11}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the legacy URL normalization loop with the canonicalizer")
+    parser.add_argument("--pages", type=int, default=200, help="pages per run (default: 200)")
+    parser.add_argument("--urls", type=int, default=2000, help="image URLs per page (default: 2000)")
+    parser.add_argument("--shared", type=float, default=0.2, help="share of URLs repeated on every page (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    pages = generate_pages(args.pages, args.urls, args.shared)
+
+    print(f"{'mode':<28}{'sec':>10}{'k urls/s':>12}{'kept':>10}{'collapsed':>11}")
+    _measure("legacy urljoin loop", pages, lambda raw: legacy_normalize(raw, BASE_URL))
+
+    for label, canonicalizer in (("canonicalizer", UrlCanonicalizer()), ("+ CDN rules", UrlCanonicalizer(DEFAULT_CDN_RULES))):
+        url_normalize._join.cache_clear()
+        _measure(f"{label} (cold)", pages, lambda raw: canonicalize_urls(raw, BASE_URL, canonicalizer))
+        _measure(f"{label} (warm)", pages, lambda raw: canonicalize_urls(raw, BASE_URL, canonicalizer))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extract_pool import ExtractionPool
+from firecrawl_client import extract_image_urls_from_html
+from synthetic import generate_page
+
+PAGE_URL = "https://shop.example.com/catalog/"
+
+
+class _StallMonitor:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_stall = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            self.max_stall = max(self.max_stall, now - last - self.interval)
+            last = now
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def _measure(label: str, pages: List[Tuple[str, str]], run: Callable[[], int], baseline: Optional[float]) -> float:
+    with _StallMonitor() as monitor:
+        start = time.perf_counter()
+        urls = run()
+        seconds = time.perf_counter() - start
+    speedup = f"{baseline / seconds:.2f}x" if baseline else "1.00x"
+    print(f"{label:<20}{seconds:>10.3f}{len(pages) / seconds:>10.2f}{speedup:>10}{monitor.max_stall * 1000:>14.1f}{urls:>10}")
+    return seconds
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare inline extraction with the process-pool offload")
+    parser.add_argument("--pages", type=int, default=16, help="pages per run (default: 16)")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="synthetic page size in MB (default: 2)")
+    parser.add_argument("--tags", type=int, default=5000, help="image tags per page (default: 5000)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="largest pool size to try")
+    args = parser.parse_args(argv)
+
+    pages = [
+        (generate_page(int(args.size_mb * 1_000_000), args.tags, seed=seed), f"{PAGE_URL}{seed}/")
+        for seed in range(args.pages)
+    ]
+
+    print(f"{args.pages} pages of {args.size_mb} MB, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<20}{'sec':>10}{'pages/s':>10}{'speedup':>10}{'max stall ms':>14}{'urls':>10}")
+    baseline = _measure(
+        "inline", pages, lambda: sum(len(extract_image_urls_from_html(html, url)) for html, url in pages), None
+    )
+
+    counts = [1 << power for power in range(args.max_workers.bit_length()) if 1 << power < args.max_workers]
+    for workers in counts + [args.max_workers]:
+        pool = ExtractionPool(max_workers=workers, threshold=0)
+        pool.warm()
+        try:
+            _measure(
+                f"pool x{workers}", pages, lambda: sum(len(urls) for urls in pool.extract_many(pages)), baseline
+            )
+        finally:
+            pool.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
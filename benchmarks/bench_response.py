@@ -0,0 +1,80 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import firecrawl_client
+from firecrawl_client import FirecrawlClient, extract_image_urls_from_html
+from synthetic import generate_page
+
+PAGE_URL = "https://shop.example.com/catalog/"
+
+
+def _make_response(payload: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response.raw = io.BytesIO(payload)
+    return response
+
+
+class _ReplaySession:
+    def __init__(self, payload: bytes):
+        self.payload = payload
+
+    def request(self, method, url, **kwargs):
+        return _make_response(self.payload)
+
+
+def _buffered_scrape(payload: bytes) -> List[str]:
+    response = _make_response(payload)
+    data = response.json()
+    html_content = data.get("data", {}).get("html", "")
+    return extract_image_urls_from_html(html_content, PAGE_URL)
+
+
+def _measure(label: str, run: Callable[[], List[str]]) -> None:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    urls = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{seconds:>10.3f}{peak / 1_000_000:>12.2f}{len(urls):>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare peak memory of buffered and streaming scrape responses")
+    parser.add_argument("--size-mb", type=float, default=20.0, help="synthetic page size in MB (default: 20)")
+    parser.add_argument("--tags", type=int, default=50_000, help="image tags in the synthetic page")
+    args = parser.parse_args(argv)
+
+    html = generate_page(int(args.size_mb * 1_000_000), args.tags, nesting_depth=1)
+    payload = json.dumps({"success": True, "data": {"html": html}}).encode()
+    del html
+
+    client = FirecrawlClient("fc-bench", session=_ReplaySession(payload))
+    orjson_module = firecrawl_client.orjson
+
+    print(f"payload: {len(payload) / 1_000_000:.2f} MB")
+    print(f"{'mode':<28}{'sec':>10}{'peak MB':>12}{'urls':>10}")
+    _measure("buffered response.json()", lambda: _buffered_scrape(payload))
+    firecrawl_client.orjson = None
+    _measure("streaming + json", lambda: client.scrape_images(PAGE_URL))
+    firecrawl_client.orjson = orjson_module
+    if orjson_module is not None:
+        _measure("streaming + orjson", lambda: client.scrape_images(PAGE_URL))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from synthetic import generate_page
+
+LatencyModel = Callable[[random.Random], float]
+
+
+def parse_latency(spec: str) -> LatencyModel:
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(":")] if params else []
+    except ValueError:
+        values = None
+    if kind in ("0", "none") and values == []:
+        return lambda rng: 0.0
+    if kind == "fixed" and values and len(values) == 1:
+        seconds = values[0] / 1000
+        return lambda rng: seconds
+    if kind == "uniform" and values and len(values) == 2:
+        low, high = values[0] / 1000, values[1] / 1000
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal" and values and len(values) == 2:
+        median, sigma = values[0] / 1000, values[1]
+        return lambda rng: median * rng.lognormvariate(0.0, sigma)
+    raise ValueError(f"Invalid latency spec: {spec!r} (expected fixed:MS, uniform:MIN_MS:MAX_MS or lognormal:MEDIAN_MS:SIGMA)")
+
+
+def load_fixtures(directory: str) -> List[str]:
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    if not pages:
+        raise ValueError(f"No .html fixtures in {directory}")
+    return pages
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeFirecrawl:
+    def __init__(
+        self,
+        latency: LatencyModel = parse_latency("0"),
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: float = 1.0,
+        page_kb: Sequence[int] = (64,),
+        tags: int = 200,
+        fixtures: Optional[List[str]] = None,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.page_kb = list(page_kb)
+        self.tags = tags
+        self.fixtures = fixtures
+        self.seed = seed
+        self.requests = 0
+        self.statuses: Dict[int, int] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies: Dict[int, str] = {}
+        self.server = _Server((host, port), self._handler())
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def _page_json(self, url: str) -> str:
+        index = zlib.crc32(url.encode())
+        if self.fixtures is not None:
+            index %= len(self.fixtures)
+        else:
+            index %= len(self.page_kb)
+        with self._lock:
+            body = self._bodies.get(index)
+        if body is None:
+            if self.fixtures is not None:
+                html = self.fixtures[index]
+            else:
+                html = generate_page(self.page_kb[index] * 1024, self.tags, seed=self.seed + index)
+            body = json.dumps(html)
+            with self._lock:
+                self._bodies[index] = body
+        return body
+
+    def _outcome(self) -> Tuple[float, int]:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency(self._rng)
+            roll = self._rng.random()
+            error_status = self._rng.choice((500, 502, 503))
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, error_status
+        return delay, 200
+
+    def _count(self, status: int) -> None:
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+                fake._count(status)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                if self.headers.get("Authorization", "").strip() not in ("", "Bearer"):
+                    return True
+                self._send(401, b'{"success":false,"error":"Unauthorized"}')
+                return False
+
+            def do_GET(self):
+                if self.path.rstrip("/") != "/v2/team/credit-usage":
+                    self._send(404, b'{"success":false,"error":"Not found"}')
+                elif self._authorized():
+                    self._send(200, b'{"success":true,"data":{"remaining_credits":1000000}}')
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.rstrip("/") != "/v2/scrape":
+                    self._send(404, b'{"success":false,"error":"Not found"}')
+                    return
+                if not self._authorized():
+                    return
+                delay, status = fake._outcome()
+                time.sleep(delay)
+                if status == 429:
+                    body = b'{"success":false,"error":"Rate limit exceeded"}'
+                    self._send(429, body, {"Retry-After": f"{fake.retry_after:g}"})
+                elif status != 200:
+                    self._send(status, b'{"success":false,"error":"Injected failure"}')
+                else:
+                    url = payload.get("url", "")
+                    body = (
+                        '{"success":true,"data":{"html":' + fake._page_json(url)
+                        + ',"metadata":{"sourceURL":' + json.dumps(url) + ',"statusCode":200}}}'
+                    )
+                    self._send(200, body.encode())
+
+        return Handler
+
+    def start(self) -> "FakeFirecrawl":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeFirecrawl":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="lognormal:300:0.5", help="fixed:MS, uniform:MIN_MS:MAX_MS or lognormal:MEDIAN_MS:SIGMA (default: lognormal:300:0.5)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of scrapes answered with 429 (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of scrapes answered with 500/502/503 (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s (default: 1)")
+    parser.add_argument("--page-kb", default="64", help="comma-separated synthetic page sizes in KB, picked per URL (default: 64)")
+    parser.add_argument("--tags", type=int, default=200, help="image tags per synthetic page (default: 200)")
+    parser.add_argument("--fixtures", metavar="DIR", help="replay recorded .html files instead of synthetic pages")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+
+
+def server_from_args(args: argparse.Namespace, host: str = "127.0.0.1", port: int = 0) -> FakeFirecrawl:
+    return FakeFirecrawl(
+        latency=parse_latency(args.latency),
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        page_kb=[int(size) for size in args.page_kb.split(",") if size.strip()],
+        tags=args.tags,
+        fixtures=load_fixtures(args.fixtures) if args.fixtures else None,
+        seed=args.seed,
+        host=host,
+        port=port
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Firecrawl /v2/scrape endpoint")
+    parser.add_argument("--host", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=3002, help="port (default: 3002)")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        fake = server_from_args(args, args.host, args.port)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Fake Firecrawl listening on {fake.base_url}", flush=True)
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
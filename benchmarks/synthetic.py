@@ -0,0 +1,74 @@
+import random
+from typing import List
+
+_EXTENSIONS = ("jpg", "png", "webp", "gif", "svg")
+
+
+def _image_url(rng: random.Random, index: int) -> str:
+    ext = rng.choice(_EXTENSIONS)
+    if rng.random() < 0.5:
+        return f"/media/catalog/product/{index % 997}/{index}.{ext}"
+    return f"https://cdn.example.com/assets/{index % 31}/image-{index}.{ext}?v={index % 7}"
+
+
+def _image_tag(rng: random.Random, index: int) -> str:
+    kind = rng.random()
+    url = _image_url(rng, index)
+    if kind < 0.5:
+        return f'<img src="{url}" alt="Product {index}" loading="lazy" class="product-image">'
+    if kind < 0.7:
+        return f'<img data-src="{url}" data-lazy-src="{url}?lazy=1" class="lazy">'
+    if kind < 0.9:
+        return (
+            f'<picture><source srcset="{url} 1x, {url}?dpr=2 2x" type="image/webp">'
+            f'<img src="{url}" srcset="{url} 480w, {url}?w=800 800w"></picture>'
+        )
+    return f'<div data-bg="{url}" data-background-image="{url}"></div>'
+
+
+def _style(rng: random.Random, index: int) -> str:
+    declarations = [
+        "display:flex", "margin:0 auto", "padding:12px 16px", "color:#333",
+        "font-family:Helvetica,Arial,sans-serif", "border-radius:4px", "box-shadow:0 1px 2px rgba(0,0,0,.2)",
+    ]
+    rng.shuffle(declarations)
+    background = f"background-image:url('{_image_url(rng, index)}')" if rng.random() < 0.5 else "background:none"
+    return ";".join(declarations + [background])
+
+
+def generate_page(
+    target_bytes: int,
+    image_tags: int,
+    style_ratio: float = 0.1,
+    nesting_depth: int = 4,
+    seed: int = 0
+) -> str:
+    rng = random.Random(seed)
+    head = "<!DOCTYPE html><html><head><title>Synthetic catalog</title></head><body>"
+    tail = "</body></html>"
+    open_tags = "".join(f'<div class="level-{level}">' for level in range(nesting_depth))
+    close_tags = "</div>" * nesting_depth
+
+    blocks: List[str] = []
+    for index in range(image_tags):
+        block = _image_tag(rng, index)
+        if rng.random() < style_ratio:
+            block = f'<div style="{_style(rng, index)}">{block}</div>'
+        blocks.append(f"{open_tags}{block}{close_tags}")
+
+    page = head + "".join(blocks)
+    filler_index = 0
+    parts = [page]
+    size = len(page) + len(tail)
+    while size < target_bytes:
+        filler = (
+            f'<p class="description" style="{_style(rng, filler_index)}">'
+            f"Item {filler_index} lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+            if rng.random() < style_ratio
+            else f'<p class="description">Item {filler_index} lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>'
+        )
+        parts.append(filler)
+        size += len(filler)
+        filler_index += 1
+    parts.append(tail)
+    return "".join(parts)
@@ -1,19 +1,409 @@
-from cachetools import TTLCache
-from typing import Optional, List, Any
+from cachetools import TLRUCache, TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, NamedTuple, Optional, List, Any, Set, Tuple
 import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from metrics import metrics
+
+DEFAULT_TTL = 600
+DEFAULT_MEMORY_CACHE_BYTES = int(os.environ.get("IMAGE_SCRAPER_MEMORY_CACHE_BYTES", 32 * 1024 * 1024))
+DEFAULT_DISK_CACHE_PATH = os.environ.get(
+    "IMAGE_SCRAPER_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "image_scraper_cache.sqlite3")
+)
+DEFAULT_DISK_CACHE_BYTES = int(os.environ.get("IMAGE_SCRAPER_CACHE_BYTES", 64 * 1024 * 1024))
+DEFAULT_DISK_CACHE_TTL = int(os.environ.get("IMAGE_SCRAPER_CACHE_TTL", DEFAULT_TTL))
+DEFAULT_STALE_TTL = int(os.environ.get("IMAGE_SCRAPER_CACHE_STALE_TTL", 300))
+DEFAULT_REFRESH_AHEAD = float(os.environ.get("IMAGE_SCRAPER_CACHE_REFRESH_AHEAD", 0.8))
+DEFAULT_REFRESH_WORKERS = 2
+DEFAULT_DISK_TOUCH_INTERVAL = 60.0
+DEFAULT_FOLLOWER_TIMEOUT = 120.0
+VALID_KEY_TTL = 3600
+INVALID_KEY_TTL = 300
+
+class _InstrumentedTTLCache(TTLCache):
+    def popitem(self):
+        item = super().popitem()
+        metrics.inc("cache_evictions_total", tier="memory")
+        return item
+
+
+class CompactUrlList:
+    __slots__ = ("blob", "count", "created_at")
+
+    def __init__(self, blob: bytes, count: int, created_at: float):
+        self.blob = blob
+        self.count = count
+        self.created_at = created_at
+
+    @classmethod
+    def from_urls(cls, urls: List[str], created_at: Optional[float] = None) -> "CompactUrlList":
+        blob = zlib.compress(json.dumps(urls, separators=(",", ":")).encode(), 6)
+        return cls(blob, len(urls), time.time() if created_at is None else created_at)
+
+    def to_list(self) -> List[str]:
+        return json.loads(zlib.decompress(self.blob))
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.blob)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def _entry_size(value: CompactUrlList) -> int:
+    return value.nbytes + sys.getsizeof("0" * 64)
+
+
+class CachedResult(NamedTuple):
+    value: List[str]
+    age: float
+    stale: bool
+    refresh_due: bool
+
+
+def _cached_result(value: List[str], created_at: float, ttl: float) -> CachedResult:
+    age = max(time.time() - created_at, 0.0)
+    return CachedResult(value, age, age >= ttl, age >= ttl * _refresh_ahead)
+
+
+_memory_ttl = DEFAULT_TTL
+_refresh_ahead = DEFAULT_REFRESH_AHEAD
+_cache = _InstrumentedTTLCache(
+    maxsize=DEFAULT_MEMORY_CACHE_BYTES, ttl=DEFAULT_TTL + DEFAULT_STALE_TTL, getsizeof=_entry_size
+)
+_cache_lock = threading.Lock()
+
+
+def _validation_expiry(key: str, value: Tuple[bool, str], now: float) -> float:
+    return now + (VALID_KEY_TTL if value[0] else INVALID_KEY_TTL)
+
+
+_validation_cache = TLRUCache(maxsize=1000, ttu=_validation_expiry, timer=time.monotonic)
+_validation_lock = threading.Lock()
+
+
+class DiskCache:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+        ttl: float = DEFAULT_DISK_CACHE_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        touch_interval: float = DEFAULT_DISK_TOUCH_INTERVAL
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get_entry(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        now = time.time()
+        if max_age is None:
+            max_age = self.ttl + self.stale_ttl
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at, accessed_at FROM entries WHERE key = ? AND created_at > ?",
+                (key, now - max_age)
+            ).fetchone()
+            if row is None:
+                return None
+            # Recency only needs to be roughly right for eviction, so hot keys don't write on every hit
+            if now - row[2] >= self.touch_interval:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key, self.ttl)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        blob = json.dumps(value, separators=(",", ":")).encode()
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now)
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM entries WHERE created_at <= ?", (now - self.ttl - self.stale_ttl,))
+        if conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] <= self.max_bytes:
+            return
+        evicted = conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running FROM entries) "
+            "WHERE running > ?)",
+            (self.max_bytes,)
+        ).rowcount
+        if evicted > 0:
+            metrics.inc("cache_evictions_total", evicted, tier="disk")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self) -> Tuple[int, int]:
+        with self._lock:
+            row = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return row[0], row[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_disk_cache: Optional[DiskCache] = DiskCache(DEFAULT_DISK_CACHE_PATH)
+
+
+def configure_disk_cache(
+    path: Optional[str],
+    max_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+    ttl: float = DEFAULT_DISK_CACHE_TTL,
+    stale_ttl: float = DEFAULT_STALE_TTL
+) -> None:
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+    _disk_cache = DiskCache(path, max_bytes=max_bytes, ttl=ttl, stale_ttl=stale_ttl) if path else None
+
+
+def result_cache_key(api_key: str, url: str, stylesheets: bool = False, crawl: Optional[Tuple[int, int]] = None) -> str:
+    prefix = f"{api_key[:8]}:css" if stylesheets else api_key[:8]
+    if crawl is not None:
+        limit, depth = crawl
+        return f"{prefix}:crawl:{limit}:{depth}:{url}"
+    return f"{prefix}:{url}"
 
-_cache = TTLCache(maxsize=100, ttl=600)
 
 def _hash_key(key: str) -> str:
     return hashlib.sha256(key.encode()).hexdigest()
 
-def get_cached_result(cache_key: str) -> Optional[List[str]]:
+def _set_memory(hashed_key: str, value: List[str], created_at: Optional[float] = None) -> None:
+    compact = CompactUrlList.from_urls(value, created_at)
+    with _cache_lock:
+        try:
+            _cache[hashed_key] = compact
+        except ValueError:
+            _cache.pop(hashed_key, None)
+            metrics.inc("cache_oversized_total", tier="memory")
+
+def get_cached_entry(cache_key: str, allow_stale: bool = True) -> Optional[CachedResult]:
     hashed_key = _hash_key(cache_key)
-    return _cache.get(hashed_key)
+    with _cache_lock:
+        compact = _cache.get(hashed_key)
+        # The TTLCache clock starts at insertion, so an entry promoted from disk is checked against its original age
+        max_age = _cache.ttl if allow_stale else _memory_ttl
+    if compact is not None and time.time() - compact.created_at < max_age:
+        metrics.inc("cache_hits_total", tier="memory")
+        return _cached_result(compact.to_list(), compact.created_at, _memory_ttl)
+    metrics.inc("cache_misses_total", tier="memory")
+    if _disk_cache is None:
+        return None
+
+    try:
+        entry = _disk_cache.get_entry(hashed_key, None if allow_stale else _disk_cache.ttl)
+    except sqlite3.Error:
+        return None
+    if entry is None:
+        metrics.inc("cache_misses_total", tier="disk")
+        return None
+    metrics.inc("cache_hits_total", tier="disk")
+    value, created_at = entry
+    _set_memory(hashed_key, value, created_at)
+    return _cached_result(value, created_at, _disk_cache.ttl)
+
+def get_cached_result(cache_key: str) -> Optional[List[str]]:
+    entry = get_cached_entry(cache_key, allow_stale=False)
+    return entry.value if entry is not None else None
 
 def set_cached_result(cache_key: str, value: List[str]) -> None:
     hashed_key = _hash_key(cache_key)
-    _cache[hashed_key] = value
+    _set_memory(hashed_key, value)
+    if _disk_cache is not None:
+        try:
+            _disk_cache.set(hashed_key, value)
+        except sqlite3.Error:
+            pass
+
+def get_cached_validation(api_key: str) -> Optional[Tuple[bool, str]]:
+    with _validation_lock:
+        return _validation_cache.get(_hash_key(api_key))
+
+def set_cached_validation(api_key: str, is_valid: bool, message: str) -> None:
+    with _validation_lock:
+        _validation_cache[_hash_key(api_key)] = (is_valid, message)
+
+def configure_memory_cache(
+    max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES,
+    ttl: float = DEFAULT_TTL,
+    stale_ttl: float = DEFAULT_STALE_TTL,
+    refresh_ahead: float = DEFAULT_REFRESH_AHEAD
+) -> None:
+    global _cache, _memory_ttl, _refresh_ahead
+    with _cache_lock:
+        _cache = _InstrumentedTTLCache(maxsize=max_bytes, ttl=ttl + stale_ttl, getsizeof=_entry_size)
+        _memory_ttl = ttl
+        _refresh_ahead = refresh_ahead
+
+def cache_stats() -> Dict[str, Any]:
+    with _cache_lock:
+        _cache.expire()
+        stats: Dict[str, Any] = {
+            "memory_entries": len(_cache),
+            "memory_bytes": _cache.currsize,
+            "memory_max_bytes": _cache.maxsize,
+            "memory_urls": sum(compact.count for compact in _cache.values()),
+        }
+    if _disk_cache is not None:
+        try:
+            stats["disk_entries"], stats["disk_bytes"] = _disk_cache.stats()
+        except sqlite3.Error:
+            pass
+    return stats
 
 def clear_cache() -> None:
-    _cache.clear()
\ No newline at end of file
+    with _cache_lock:
+        _cache.clear()
+    with _validation_lock:
+        _validation_cache.clear()
+    if _disk_cache is not None:
+        try:
+            _disk_cache.clear()
+        except sqlite3.Error:
+            pass
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[List[str]] = None
+        self.error: Optional[BaseException] = None
+
+
+_in_flight: Dict[str, _InFlight] = {}
+_in_flight_lock = threading.Lock()
+
+
+def single_flight(
+    cache_key: str,
+    fetch: Callable[[], List[str]],
+    timeout: Optional[float] = DEFAULT_FOLLOWER_TIMEOUT,
+    refresh: bool = False
+) -> List[str]:
+    hashed_key = _hash_key(cache_key)
+    with _in_flight_lock:
+        call = _in_flight.get(hashed_key)
+        is_leader = call is None
+        if is_leader:
+            call = _InFlight()
+            _in_flight[hashed_key] = call
+
+    if not is_leader:
+        metrics.inc("coalesced_requests_total")
+        if not call.done.wait(timeout):
+            raise ValueError("Request timeout: an identical scrape is still in progress")
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    try:
+        value = None if refresh else get_cached_result(cache_key)
+        if not value:
+            value = fetch()
+            if value:
+                set_cached_result(cache_key, value)
+        call.value = value
+        return value
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[hashed_key]
+        call.done.set()
+
+
+_refresh_executor = ThreadPoolExecutor(max_workers=DEFAULT_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_refreshing: Set[str] = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh(cache_key: str, hashed_key: str, fetch: Callable[[], List[str]]) -> None:
+    try:
+        single_flight(cache_key, fetch, refresh=True)
+        metrics.inc("cache_refreshes_total", result="done")
+    except Exception:
+        metrics.inc("cache_refreshes_total", result="error")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(hashed_key)
+
+
+def schedule_refresh(cache_key: str, fetch: Callable[[], List[str]]) -> bool:
+    hashed_key = _hash_key(cache_key)
+    with _refreshing_lock:
+        if hashed_key in _refreshing:
+            return False
+        _refreshing.add(hashed_key)
+    metrics.inc("cache_refreshes_total", result="scheduled")
+    _refresh_executor.submit(_refresh, cache_key, hashed_key, fetch)
+    return True
+
+
+def is_refreshing(cache_key: str) -> bool:
+    with _refreshing_lock:
+        return _hash_key(cache_key) in _refreshing
+
+
+def get_or_refresh(cache_key: str, fetch: Callable[[], List[str]]) -> Optional[CachedResult]:
+    entry = get_cached_entry(cache_key)
+    if entry is not None and entry.refresh_due:
+        schedule_refresh(cache_key, fetch)
+    return entry
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from cache_utils import configure_disk_cache, get_cached_result, result_cache_key, set_cached_result
+from asset_discovery import get_stylesheet_cache
+from delta_store import FingerprintStore, ImageDelta
+from endpoints import DEFAULT_ENDPOINTS, get_router
+from extract_pool import ExtractionPool
+from firecrawl_client import DEFAULT_BASE_URL, FirecrawlClient
+from rate_limit import PLAN_LIMITS, PRIORITY_BATCH, get_scheduler
+
+
+class _TimedClient(FirecrawlClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations: Dict[str, float] = {}
+        self._durations_lock = threading.Lock()
+
+    def _record(self, url: str, start: float) -> None:
+        with self._durations_lock:
+            self.durations[url] = time.perf_counter() - start
+
+    def scrape_images(self, url: str, timeout: int = 30) -> List[str]:
+        start = time.perf_counter()
+        try:
+            return super().scrape_images(url, timeout)
+        finally:
+            self._record(url, start)
+
+    def scrape_image_delta(self, url: str, store: FingerprintStore, timeout: int = 30) -> ImageDelta:
+        start = time.perf_counter()
+        try:
+            return super().scrape_image_delta(url, store, timeout)
+        finally:
+            self._record(url, start)
+
+
+def _read_urls(source: TextIO) -> Iterator[str]:
+    for line in source:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def _emit(out: TextIO, record: Dict) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m firecrawl_client",
+        description="Scrape image URLs for every page URL in a file (or stdin) and stream NDJSON records to stdout."
+    )
+    parser.add_argument("input", nargs="?", default="-", help="file with one URL per line (default: stdin)")
+    parser.add_argument("--api-key", default=os.environ.get("FIRECRAWL_API_KEY", ""), help="Firecrawl API key (default: $FIRECRAWL_API_KEY)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Firecrawl API base URL")
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        metavar="URL[|KEY]",
+        help="route across several Firecrawl endpoints, each with an optional API key; repeatable (default: $FIRECRAWL_ENDPOINTS)"
+    )
+    parser.add_argument("--workers", type=_positive_int, default=8, help="concurrent scrapes (default: 8)")
+    parser.add_argument("--per-host", type=_positive_int, default=2, help="concurrent scrapes per target host (default: 2)")
+    parser.add_argument("--timeout", type=_positive_int, default=30, help="per-request timeout in seconds (default: 30)")
+    parser.add_argument("--no-disk-cache", action="store_true", help="use the in-memory cache tier only")
+    parser.add_argument("--plan", choices=PLAN_LIMITS, help="queue requests to stay within this Firecrawl plan's limits")
+    parser.add_argument("--extract-workers", type=int, default=0, help="parse large pages in this many worker processes (default: 0, inline)")
+    parser.add_argument("--stylesheets", action="store_true", help="also scan linked stylesheets for images (cached across pages)")
+    parser.add_argument("--delta", metavar="PATH", help="fingerprint store; emit only images added or removed since the last run")
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $FIRECRAWL_API_KEY)")
+    if args.no_disk_cache:
+        configure_disk_cache(None)
+
+    if args.input == "-":
+        urls = list(_read_urls(sys.stdin))
+    else:
+        with open(args.input) as f:
+            urls = list(_read_urls(f))
+    # Repeated input URLs are scraped (and billed) once and reported once
+    urls = list(dict.fromkeys(urls))
+
+    out = sys.stdout
+    started = time.perf_counter()
+    cache_hits = errors = images = unchanged = 0
+    misses: List[str] = []
+    delta_store = FingerprintStore(args.delta) if args.delta else None
+
+    if delta_store is not None:
+        misses = urls
+    else:
+        for url in urls:
+            cached = get_cached_result(result_cache_key(args.api_key, url, args.stylesheets))
+            if cached:
+                cache_hits += 1
+                images += len(cached)
+                _emit(out, {"url": url, "image_urls": cached, "count": len(cached), "cached": True, "elapsed_ms": 0.0, "error": None})
+            else:
+                misses.append(url)
+
+    scheduler = get_scheduler(args.api_key, PLAN_LIMITS[args.plan]) if args.plan else None
+    extraction_pool = ExtractionPool(args.extract_workers) if args.extract_workers > 0 else None
+    client = _TimedClient(
+        args.api_key,
+        base_url=args.base_url,
+        pool_size=args.workers,
+        scheduler=scheduler,
+        priority=PRIORITY_BATCH,
+        extraction_pool=extraction_pool,
+        stylesheet_cache=get_stylesheet_cache() if args.stylesheets else None,
+        endpoints=get_router(",".join(args.endpoint) if args.endpoint else DEFAULT_ENDPOINTS)
+    )
+    batch = client.scrape_images_many(
+        misses, max_workers=args.workers, per_host_limit=args.per_host, timeout=args.timeout, delta_store=delta_store
+    )
+    for url, result in batch:
+        elapsed_ms = round(client.durations.get(url, 0.0) * 1000, 1)
+        if isinstance(result, Exception):
+            errors += 1
+            _emit(out, {"url": url, "image_urls": [], "count": 0, "cached": False, "elapsed_ms": elapsed_ms, "error": str(result)})
+            continue
+        if isinstance(result, ImageDelta):
+            images += len(result.added)
+            unchanged += result.unchanged
+            _emit(out, {
+                "url": url,
+                "added": result.added,
+                "removed": result.removed,
+                "unchanged": result.unchanged,
+                "count": result.total,
+                "elapsed_ms": elapsed_ms,
+                "error": None
+            })
+            continue
+        if result:
+            set_cached_result(result_cache_key(args.api_key, url, args.stylesheets), result)
+        images += len(result)
+        _emit(out, {"url": url, "image_urls": result, "count": len(result), "cached": False, "elapsed_ms": elapsed_ms, "error": None})
+
+    if extraction_pool is not None:
+        extraction_pool.shutdown()
+
+    durations = sorted(client.durations.values())
+    summary = {
+        "pages": len(urls),
+        "cache_hits": cache_hits,
+        "fetched": len(misses),
+        "errors": errors,
+        "unchanged": unchanged,
+        "images": images,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "queue_seconds": round(client.queue_seconds, 3),
+        "mean_fetch_ms": round(sum(durations) / len(durations) * 1000, 1) if durations else 0.0,
+        "max_fetch_ms": round(durations[-1] * 1000, 1) if durations else 0.0,
+    }
+    if client.router is not None:
+        summary["endpoints"] = client.router.stats()
+    sys.stderr.write(json.dumps({"summary": summary}) + "\n")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+from bisect import bisect_left
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class PageFingerprint(NamedTuple):
+    html_hash: str
+    extractor_version: str
+    urls: List[str]
+    updated_at: float
+
+
+class ImageDelta(NamedTuple):
+    url: str
+    added: List[str]
+    removed: List[str]
+    unchanged: bool
+    total: int
+
+
+def _encode_urls(sorted_urls: List[str]) -> bytes:
+    return zlib.compress("\n".join(sorted_urls).encode("utf-8"), 6)
+
+
+def _decode_urls(blob: bytes) -> List[str]:
+    data = zlib.decompress(blob).decode("utf-8")
+    return data.split("\n") if data else []
+
+
+def _contains(sorted_urls: List[str], url: str) -> bool:
+    index = bisect_left(sorted_urls, url)
+    return index < len(sorted_urls) and sorted_urls[index] == url
+
+
+def diff_image_urls(previous_sorted: List[str], current: List[str]) -> Tuple[List[str], List[str]]:
+    added = [url for url in current if not _contains(previous_sorted, url)]
+    current_sorted = sorted(current)
+    removed = [url for url in previous_sorted if not _contains(current_sorted, url)]
+    return added, removed
+
+
+class FingerprintStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "url TEXT PRIMARY KEY, html_hash TEXT NOT NULL, extractor_version TEXT NOT NULL, "
+                "urls BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, url: str) -> Optional[PageFingerprint]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT html_hash, extractor_version, urls, updated_at FROM fingerprints WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return PageFingerprint(row[0], row[1], _decode_urls(row[2]), row[3])
+
+    def set(self, url: str, html_hash: str, extractor_version: str, image_urls: List[str]) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO fingerprints (url, html_hash, extractor_version, urls, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, html_hash, extractor_version, _encode_urls(sorted(set(image_urls))), time.time())
+            )
+
+    def delete(self, url: str) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM fingerprints WHERE url = ?", (url,))
+
+    def update(
+        self,
+        url: str,
+        html_hash: str,
+        extractor_version: Optional[str],
+        extract: Callable[[], List[str]]
+    ) -> ImageDelta:
+        previous = self.get(url)
+        if previous is not None and previous.html_hash == html_hash and previous.extractor_version == extractor_version:
+            return ImageDelta(url, [], [], True, len(previous.urls))
+
+        image_urls = extract()
+        added, removed = diff_image_urls(previous.urls if previous is not None else [], image_urls)
+        # An empty version never matches, so an unversioned extraction is always redone
+        self.set(url, html_hash, extractor_version or "", image_urls)
+        return ImageDelta(url, added, removed, False, len(image_urls))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,184 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import math
+import os
+import threading
+import time
+
+from metrics import metrics
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_ENDPOINTS = os.environ.get("FIRECRAWL_ENDPOINTS", "")
+DEFAULT_DECAY = 10.0
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 30.0
+DEFAULT_STALE_AFTER = 60.0
+
+
+class EndpointError(ValueError):
+    def __init__(self, message: str, status: Optional[int] = None, maybe_delivered: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.maybe_delivered = maybe_delivered
+
+    @property
+    def is_failure(self) -> bool:
+        return self.status is None or self.status >= 500
+
+
+class Endpoint:
+    def __init__(self, url: str, api_key: Optional[str] = None):
+        self.url = url.rstrip("/")
+        self.api_key = api_key or None
+        self.state = STATE_CLOSED
+        self.ewma: Optional[float] = None
+        self.sampled_at = 0.0
+        self.outstanding = 0
+        self.failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r})"
+
+
+EndpointSpec = Union[str, Tuple[str, Optional[str]], Endpoint]
+
+
+def parse_endpoints(spec: str) -> List[Endpoint]:
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, api_key = item.partition("|")
+        endpoints.append(Endpoint(url.strip(), api_key.strip() or None))
+    return endpoints
+
+
+def _as_endpoint(spec: EndpointSpec) -> Endpoint:
+    if isinstance(spec, Endpoint):
+        return spec
+    if isinstance(spec, str):
+        return Endpoint(spec)
+    return Endpoint(*spec)
+
+
+class EndpointRouter:
+    def __init__(
+        self,
+        endpoints: Iterable[EndpointSpec],
+        decay: float = DEFAULT_DECAY,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+        stale_after: float = DEFAULT_STALE_AFTER
+    ):
+        self.endpoints = [_as_endpoint(spec) for spec in endpoints]
+        if not self.endpoints:
+            raise ValueError("At least one endpoint is required")
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.decay = decay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _cost(self, endpoint: Endpoint, now: float) -> float:
+        # Unmeasured endpoints, and ones idle long enough that their latency is stale, cost nothing so they get probed.
+        if endpoint.ewma is None or now - endpoint.sampled_at > self.stale_after:
+            return 0.0
+        return endpoint.ewma * (endpoint.outstanding + 1)
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == STATE_OPEN and now - endpoint.opened_at >= self.cooldown:
+            endpoint.state = STATE_HALF_OPEN
+        if endpoint.state == STATE_OPEN:
+            return False
+        return endpoint.state == STATE_CLOSED or endpoint.outstanding == 0
+
+    def acquire(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        now = time.monotonic()
+        with self._lock:
+            remaining = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not remaining:
+                raise ValueError("No Firecrawl endpoint left to try")
+            candidates = [endpoint for endpoint in remaining if self._available(endpoint, now)]
+            if candidates:
+                endpoint = min(candidates, key=lambda e: (self._cost(e, now), e.outstanding))
+            else:
+                # Every endpoint is ejected: probe the one that has been out the longest rather than fail outright.
+                endpoint = min(remaining, key=lambda e: e.opened_at)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        return endpoint
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        latency: Optional[float] = None,
+        error: Optional[EndpointError] = None
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is not None and error.is_failure:
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.state == STATE_HALF_OPEN or endpoint.failures >= self.failure_threshold:
+                    if endpoint.state != STATE_OPEN:
+                        metrics.inc("endpoint_ejections_total", endpoint=endpoint.url)
+                    endpoint.state = STATE_OPEN
+                    endpoint.opened_at = now
+                result = "failure"
+            else:
+                endpoint.failures = 0
+                endpoint.state = STATE_CLOSED
+                if latency is not None and error is None:
+                    self._observe(endpoint, latency, now)
+                result = "ok" if error is None else "rejected"
+        metrics.inc("endpoint_requests_total", endpoint=endpoint.url, result=result)
+
+    def _observe(self, endpoint: Endpoint, latency: float, now: float) -> None:
+        if endpoint.ewma is None or latency > endpoint.ewma:
+            endpoint.ewma = latency
+        else:
+            weight = math.exp(-(now - endpoint.sampled_at) / self.decay)
+            endpoint.ewma = endpoint.ewma * weight + latency * (1 - weight)
+        endpoint.sampled_at = now
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "state": endpoint.state,
+                    "ewma_ms": round(endpoint.ewma * 1000, 1) if endpoint.ewma is not None else None,
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                }
+                for endpoint in self.endpoints
+            ]
+
+
+_routers: Dict[Tuple[Tuple[str, Optional[str]], ...], EndpointRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(spec: str = DEFAULT_ENDPOINTS) -> Optional[EndpointRouter]:
+    endpoints = parse_endpoints(spec)
+    if not endpoints:
+        return None
+    key = tuple((endpoint.url, endpoint.api_key) for endpoint in endpoints)
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = _routers[key] = EndpointRouter(endpoints)
+    return router
@@ -0,0 +1,158 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+import multiprocessing
+import os
+import threading
+
+from asset_discovery import StylesheetCache
+from metrics import metrics
+from srcset import SelectionPolicy
+
+DEFAULT_OFFLOAD_THRESHOLD = 1024 * 1024
+DEFAULT_EXTRACT_WORKERS = int(os.environ.get("IMAGE_SCRAPER_EXTRACT_WORKERS", os.cpu_count() or 1))
+
+Html = Union[str, bytes]
+
+
+def _extract_in_worker(
+    html: Html,
+    base_url: str,
+    engine: str,
+    policy: Optional[SelectionPolicy]
+) -> Tuple[List[str], List[str]]:
+    from firecrawl_client import extract_page_assets
+
+    return extract_page_assets(html, base_url, engine=engine, policy=policy)
+
+
+class ExtractionPool:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+        engine: str = "html.parser"
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.engine = engine
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self) -> None:
+        executor = self._pool()
+        for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+
+    def _submit(self, html: Html, base_url: str, policy: Optional[SelectionPolicy]) -> Optional[Future]:
+        if len(html) < self.threshold or (policy is not None and policy.media is not None):
+            return None
+        try:
+            return self._pool().submit(_extract_in_worker, html, base_url, self.engine, policy)
+        except (BrokenProcessPool, RuntimeError):
+            return None
+
+    def _assets(
+        self,
+        future: Optional[Future],
+        html: Html,
+        base_url: str,
+        policy: Optional[SelectionPolicy]
+    ) -> Tuple[List[str], List[str]]:
+        assets = None
+        if future is not None:
+            try:
+                with metrics.span("offload"):
+                    assets = future.result()
+                metrics.inc("extractions_total", mode="pool")
+            except BrokenProcessPool:
+                executor = self._executor
+                if executor is not None:
+                    self._reset(executor)
+
+        if assets is None:
+            metrics.inc("extractions_total", mode="inline")
+            assets = _extract_in_worker(html, base_url, self.engine, policy)
+        return assets
+
+    def _result(
+        self,
+        future: Optional[Future],
+        html: Html,
+        base_url: str,
+        policy: Optional[SelectionPolicy],
+        stylesheets: Optional[StylesheetCache]
+    ) -> List[str]:
+        from firecrawl_client import add_stylesheet_images
+
+        image_urls, stylesheet_urls = self._assets(future, html, base_url, policy)
+        if stylesheets is not None:
+            image_urls = add_stylesheet_images(image_urls, stylesheet_urls, stylesheets)
+        return image_urls
+
+    def extract(
+        self,
+        html: Html,
+        base_url: str,
+        policy: Optional[SelectionPolicy] = None,
+        stylesheets: Optional[StylesheetCache] = None
+    ) -> List[str]:
+        if not html:
+            return []
+        return self._result(self._submit(html, base_url, policy), html, base_url, policy, stylesheets)
+
+    def extract_assets(
+        self,
+        html: Html,
+        base_url: str,
+        policy: Optional[SelectionPolicy] = None
+    ) -> Tuple[List[str], List[str]]:
+        if not html:
+            return [], []
+        return self._assets(self._submit(html, base_url, policy), html, base_url, policy)
+
+    def extract_many(
+        self,
+        pages: Iterable[Tuple[Html, str]],
+        policy: Optional[SelectionPolicy] = None,
+        stylesheets: Optional[StylesheetCache] = None
+    ) -> Iterator[List[str]]:
+        submitted = [(self._submit(html, base_url, policy), html, base_url) for html, base_url in pages]
+        for future, html, base_url in submitted:
+            yield self._result(future, html, base_url, policy, stylesheets) if html else []
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_shared_pool: Optional[ExtractionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers: int = DEFAULT_EXTRACT_WORKERS, warm: bool = False) -> Optional[ExtractionPool]:
+    global _shared_pool
+    if max_workers < 1:
+        return None
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ExtractionPool(max_workers)
+            if warm:
+                threading.Thread(target=_shared_pool.warm, name="warm-extraction-pool", daemon=True).start()
+        return _shared_pool
@@ -1,130 +1,931 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import re
-from typing import List, Set
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+import codecs
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from asset_discovery import META_IMAGE_PROPERTIES, StylesheetCache, css_image_urls, json_ld_image_urls
+from cache_utils import get_cached_validation, set_cached_validation
+from delta_store import FingerprintStore, ImageDelta
+from endpoints import Endpoint, EndpointError, EndpointRouter, EndpointSpec
+from extract_pool import ExtractionPool
+from html_store import HtmlStore
+from metrics import metrics
+from rate_limit import PRIORITY_INTERACTIVE, RequestScheduler
+from srcset import ImageCandidate, SelectionPolicy, parse_srcset
+from url_normalize import DEFAULT_CANONICALIZER, UrlCanonicalizer, canonicalize_urls
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_BASE_URL = os.environ.get("FIRECRAWL_BASE_URL", "https://api.firecrawl.dev/v2")
+EXTRACTOR_VERSION = "5"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+DEFAULT_CRAWL_MAX_WAIT = 600.0
+CRAWL_SECONDS_PER_PAGE = 2.0
+RETRYABLE_STATUS_CODES = (429, 503)
+
+_CHUNK_SIZE = 256 * 1024
+_ERROR_BODY_BYTES = 4096
+
+_sessions: Dict[int, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shared_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[pool_size] = session
+        return session
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+
+def _json_loads(body: Union[bytes, bytearray]) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _read_body(response: requests.Response, max_bytes: Optional[int]) -> bytearray:
+    content_length = response.headers.get("Content-Length")
+    if max_bytes is not None and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ValueError(f"Response too large: {content_length} bytes exceeds the {max_bytes} byte limit")
+
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+        body += chunk
+        if max_bytes is not None and len(body) > max_bytes:
+            raise ValueError(f"Response too large: exceeds the {max_bytes} byte limit")
+    return body
+
+
+def _error_text(response: requests.Response) -> str:
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=_ERROR_BODY_BYTES):
+        body += chunk
+        if len(body) >= _ERROR_BODY_BYTES:
+            break
+    return bytes(body[:_ERROR_BODY_BYTES]).decode(response.encoding or "utf-8", errors="replace")[:200]
+
+
+class CrawlPage(NamedTuple):
+    url: str
+    image_urls: List[str]
+    new_image_urls: List[str]
+    completed: int
+    total: int
+
+
+def crawl_max_wait(limit: int) -> float:
+    return max(DEFAULT_CRAWL_MAX_WAIT, limit * CRAWL_SECONDS_PER_PAGE)
+
+
+class ImageCrawl:
+    def __init__(
+        self,
+        client: "FirecrawlClient",
+        job_id: str,
+        poll_interval: float = 2.0,
+        max_wait: float = DEFAULT_CRAWL_MAX_WAIT,
+        timeout: int = 30,
+        endpoint: Optional[Endpoint] = None
+    ):
+        self.client = client
+        self.job_id = job_id
+        self.endpoint = endpoint
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.status = "scraping"
+        self.timed_out = False
+        self.completed = 0
+        self.total = 0
+        self.pages_seen = 0
+        self._image_urls: Dict[str, None] = {}
+
+    @property
+    def image_urls(self) -> List[str]:
+        return list(self._image_urls)
+
+    def _status_url(self) -> str:
+        base_url = self.endpoint.url if self.endpoint is not None else self.client.base_url
+        return f"{base_url}/crawl/{self.job_id}?skip={self.pages_seen}"
+
+    def _page(self, item: Dict[str, Any]) -> CrawlPage:
+        metadata = item.get("metadata") or {}
+        page_url = metadata.get("sourceURL") or metadata.get("url") or ""
+        image_urls = self.client._extract(page_url, item.get("html") or "")
+
+        new_image_urls = [url for url in image_urls if url not in self._image_urls]
+        for url in new_image_urls:
+            self._image_urls[url] = None
+
+        return CrawlPage(page_url, image_urls, new_image_urls, self.completed, self.total)
+
+    def __iter__(self) -> Iterator[CrawlPage]:
+        deadline = time.monotonic() + self.max_wait
+
+        while True:
+            next_url: Optional[str] = self._status_url()
+            while next_url:
+                api_key = self.endpoint.api_key if self.endpoint is not None else None
+                data = self.client._call("GET", next_url, self.timeout, api_key=api_key)
+                if data.get("success") is False or data.get("status") == "failed":
+                    raise ValueError(f"Crawl failed: {data.get('error', 'Unknown error')}")
+
+                self.status = data.get("status", self.status)
+                self.completed = data.get("completed", self.completed)
+                self.total = data.get("total", self.total)
+
+                items = data.get("data") or []
+                next_url = data.get("next") if items else None
+                del data
+
+                for item in items:
+                    self.pages_seen += 1
+                    yield self._page(item)
+
+            if self.status == "completed":
+                return
+            if time.monotonic() + self.poll_interval > deadline:
+                # Stop polling but keep every page collected so far; callers check timed_out
+                self.timed_out = True
+                return
+            time.sleep(self.poll_interval)
+
+
+class QueueTimer:
+    def __init__(self):
+        self.seconds = 0.0
+
 
 class FirecrawlClient:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        session: Optional[requests.Session] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        retry_deadline: float = 60.0,
+        html_store: Optional[HtmlStore] = None,
+        max_response_bytes: Optional[int] = DEFAULT_MAX_RESPONSE_BYTES,
+        image_policy: Optional[SelectionPolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        extraction_pool: Optional[ExtractionPool] = None,
+        stylesheet_cache: Optional[StylesheetCache] = None,
+        endpoints: Optional[Union[EndpointRouter, Sequence[EndpointSpec]]] = None
+    ):
         self.api_key = api_key
-        self.base_url = "https://api.firecrawl.dev/v2"
+        self.base_url = base_url
+        if endpoints is None or isinstance(endpoints, EndpointRouter):
+            self.router = endpoints
+        else:
+            self.router = EndpointRouter(endpoints) if endpoints else None
+        self.session = session if session is not None else get_shared_session(pool_size)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_deadline = retry_deadline
+        self.html_store = html_store
+        self.max_response_bytes = max_response_bytes
+        self.image_policy = image_policy
+        self.scheduler = scheduler
+        self.priority = priority
+        self.extraction_pool = extraction_pool
+        self.stylesheet_cache = stylesheet_cache
+        self.queue_seconds = 0.0
+        self._queue_lock = threading.Lock()
+        self._local = threading.local()
 
-    def scrape_images(self, url: str, timeout: int = 30) -> List[str]:
+    def _headers(self, api_key: Optional[str] = None) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {api_key or self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @contextmanager
+    def _slot(self, timeout: float) -> Iterator[None]:
+        if self.scheduler is None:
+            yield
+            return
+        with self.scheduler.slot(self.priority, timeout) as waited:
+            with self._queue_lock:
+                self.queue_seconds += waited
+            timer = getattr(self._local, "queue_timer", None)
+            if timer is not None:
+                timer.seconds += waited
+            yield
+
+    @contextmanager
+    def track_queue_time(self) -> Iterator[QueueTimer]:
+        # queue_seconds is shared by every caller of this client; the timer only counts this thread's waits
+        previous = getattr(self._local, "queue_timer", None)
+        timer = self._local.queue_timer = QueueTimer()
+        try:
+            yield timer
+        finally:
+            self._local.queue_timer = previous
+            if previous is not None:
+                previous.seconds += timer.seconds
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        return self._backoff_delay(attempt)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        timeout: float,
+        payload: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        api_key: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        idempotent: bool = True
+    ) -> requests.Response:
+        deadline = time.monotonic() + self.retry_deadline
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout("Retry deadline exceeded")
+
+            response: Optional[requests.Response] = None
+            try:
+                with self._slot(remaining):
+                    response = self.session.request(
+                        method,
+                        url,
+                        headers=self._headers(api_key),
+                        json=payload,
+                        timeout=min(timeout, max(deadline - time.monotonic(), 0.001)),
+                        stream=stream
+                    )
+            except requests.ConnectionError as e:
+                # A request that may have reached the server is only resent when sending it twice is harmless
+                if attempt >= max_retries or not (idempotent or _never_sent(e)):
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRYABLE_STATUS_CODES)
+                if not retryable or attempt >= max_retries:
+                    return response
+                delay = self._retry_delay(response, attempt)
+                if response.status_code == 429 and self.scheduler is not None:
+                    self.scheduler.penalize(delay)
+
+            if time.monotonic() + delay >= deadline:
+                if response is not None:
+                    return response
+                raise requests.Timeout("Retry deadline exceeded")
+
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def check_api_key(self, timeout: float = 5) -> Tuple[bool, str]:
         if not self.api_key:
+            return False, "No API key provided"
+
+        try:
+            self._call_api("GET", "/team/credit-usage", timeout, max_retries=0)
+        except EndpointError as e:
+            if e.status == 429:
+                return True, "API key valid (rate limited)"
+            if e.status is not None:
+                raise ValueError(f"Error: {e.status}")
+            raise ValueError("Connection timeout" if "timeout" in str(e).lower() else "Connection failed")
+        except ValueError as e:
+            if str(e).startswith("401"):
+                return False, "Invalid API key"
+            raise
+        return True, "Connection successful"
+
+    def _call(
+        self,
+        method: str,
+        url: str,
+        timeout: float,
+        payload: Optional[Dict[str, Any]] = None,
+        api_key: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        idempotent: bool = True
+    ) -> Dict[str, Any]:
+        if not (api_key or self.api_key):
             raise ValueError("API key is required")
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        try:
+            with metrics.span("fetch"):
+                response = self._request(
+                    method,
+                    url,
+                    timeout,
+                    payload=payload,
+                    stream=True,
+                    api_key=api_key,
+                    max_retries=max_retries,
+                    idempotent=idempotent
+                )
+                try:
+                    if response.status_code == 401:
+                        raise ValueError("401 Unauthorized: Invalid API key")
+                    elif response.status_code == 429:
+                        raise EndpointError("429 Too Many Requests: Rate limit exceeded", 429, maybe_delivered=False)
+                    elif response.status_code >= 500:
+                        raise EndpointError(f"HTTP {response.status_code}: {_error_text(response)}", response.status_code)
+                    elif response.status_code != 200:
+                        raise ValueError(f"HTTP {response.status_code}: {_error_text(response)}")
+
+                    body = _read_body(response, self.max_response_bytes)
+                finally:
+                    response.close()
+
+            metrics.inc("response_bytes_total", len(body))
+            with metrics.span("decode"):
+                return _json_loads(body)
+
+        except requests.Timeout as e:
+            raise EndpointError("Request timeout: Page took too long to respond", maybe_delivered=not _never_sent(e))
+        except requests.RequestException as e:
+            raise EndpointError(f"Network error: {str(e)}", maybe_delivered=not _never_sent(e))
+
+    def _call_api(
+        self,
+        method: str,
+        path: str,
+        timeout: float,
+        payload: Optional[Dict[str, Any]] = None,
+        idempotent: bool = True,
+        max_retries: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], Optional[Endpoint]]:
+        if self.router is None:
+            data = self._call(
+                method, f"{self.base_url}{path}", timeout, payload, max_retries=max_retries, idempotent=idempotent
+            )
+            return data, None
+
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self.router.acquire(tried)
+            tried.append(endpoint)
+            last = len(tried) >= len(self.router)
+            start = time.monotonic()
+            try:
+                data = self._call(
+                    method,
+                    f"{endpoint.url}{path}",
+                    timeout,
+                    payload,
+                    api_key=endpoint.api_key,
+                    max_retries=max_retries if last else 0,
+                    idempotent=idempotent
+                )
+            except EndpointError as e:
+                self.router.release(endpoint, time.monotonic() - start, e)
+                if last or (not idempotent and e.maybe_delivered):
+                    raise
+                metrics.inc("endpoint_failovers_total")
+                continue
+            except BaseException:
+                self.router.release(endpoint)
+                raise
+            self.router.release(endpoint, time.monotonic() - start)
+            return data, endpoint
 
+    def _extract(self, url: str, html_content: str) -> List[str]:
+        if not html_content:
+            return []
+
+        if self.html_store is not None:
+            digest = self.html_store.put(url, html_content)
+            return extract_with_store(
+                self.html_store,
+                digest,
+                url,
+                html_content,
+                policy=self.image_policy,
+                pool=self.extraction_pool,
+                stylesheets=self.stylesheet_cache
+            )
+
+        if self.extraction_pool is not None:
+            return self.extraction_pool.extract(html_content, url, self.image_policy, self.stylesheet_cache)
+        return extract_image_urls_from_html(
+            html_content, url, policy=self.image_policy, stylesheets=self.stylesheet_cache
+        )
+
+    def _scrape_html(self, url: str, timeout: int) -> str:
         payload = {
             "url": url,
             "formats": ["html"]
         }
 
+        data, _ = self._call_api("POST", "/scrape", timeout, payload=payload)
+
+        if not data.get("success"):
+            raise ValueError(f"API error: {data.get('error', 'Unknown error')}")
+
+        html_content = data.get("data", {}).get("html", "")
+        del data
+        return html_content
+
+    def scrape_images(self, url: str, timeout: int = 30) -> List[str]:
+        return self._extract(url, self._scrape_html(url, timeout))
+
+    def scrape_image_delta(self, url: str, store: FingerprintStore, timeout: int = 30) -> ImageDelta:
+        html_content = self._scrape_html(url, timeout)
+        html_hash = hashlib.sha256(html_content.encode("utf-8")).hexdigest()
+        # Linked stylesheets can change while the HTML stays the same, so with them the page is always re-extracted
+        version = _extraction_version(self.image_policy) if self.stylesheet_cache is None else None
+        return store.update(url, html_hash, version, lambda: self._extract(url, html_content))
+
+    def crawl_images(
+        self,
+        url: str,
+        limit: int = 100,
+        max_depth: int = 2,
+        poll_interval: float = 2.0,
+        max_wait: Optional[float] = None,
+        timeout: int = 30
+    ) -> ImageCrawl:
+        payload = {
+            "url": url,
+            "limit": limit,
+            "maxDiscoveryDepth": max_depth,
+            "scrapeOptions": {"formats": ["html"]}
+        }
+
+        # Each accepted POST starts a paid crawl job, so it is never resent once it may have been delivered
+        data, endpoint = self._call_api("POST", "/crawl", timeout, payload=payload, idempotent=False)
+
+        if not data.get("success") or not data.get("id"):
+            raise ValueError(f"API error: {data.get('error', 'Unknown error')}")
+
+        if max_wait is None:
+            max_wait = crawl_max_wait(limit)
+        return ImageCrawl(
+            self, data["id"], poll_interval=poll_interval, max_wait=max_wait, timeout=timeout, endpoint=endpoint
+        )
+
+    def scrape_images_many(
+        self,
+        urls: Iterable[str],
+        max_workers: int = 8,
+        per_host_limit: int = 2,
+        timeout: int = 30,
+        delta_store: Optional[FingerprintStore] = None
+    ) -> Iterator[Tuple[str, Union[List[str], ImageDelta, Exception]]]:
+        if max_workers < 1 or per_host_limit < 1:
+            raise ValueError("max_workers and per_host_limit must be at least 1")
+
+        pending = deque(urls)
+        active_per_host: Dict[str, int] = {}
+        in_flight = {}
+
+        def host_of(url: str) -> str:
+            return urlparse(url).netloc.lower()
+
+        def fill(executor: ThreadPoolExecutor) -> None:
+            deferred = deque()
+            while pending and len(in_flight) < max_workers:
+                url = pending.popleft()
+                host = host_of(url)
+                if active_per_host.get(host, 0) >= per_host_limit:
+                    deferred.append(url)
+                    continue
+                active_per_host[host] = active_per_host.get(host, 0) + 1
+                if delta_store is not None:
+                    in_flight[executor.submit(self.scrape_image_delta, url, delta_store, timeout)] = url
+                else:
+                    in_flight[executor.submit(self.scrape_images, url, timeout)] = url
+            deferred.extend(pending)
+            pending.clear()
+            pending.extend(deferred)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
         try:
-            response = requests.post(
-                f"{self.base_url}/scrape",
-                headers=headers,
-                json=payload,
-                timeout=timeout
-            )
+            fill(executor)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    active_per_host[host_of(url)] -= 1
+                    try:
+                        result: Union[List[str], ImageDelta, Exception] = future.result()
+                    except Exception as e:
+                        result = e
+                    yield url, result
+                fill(executor)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            if response.status_code == 401:
-                raise ValueError("401 Unauthorized: Invalid API key")
-            elif response.status_code == 429:
-                raise ValueError("429 Too Many Requests: Rate limit exceeded")
-            elif response.status_code != 200:
-                raise ValueError(f"HTTP {response.status_code}: {response.text[:200]}")
 
-            data = response.json()
+EXTRACTION_ENGINES = ("html.parser", "lxml")
 
-            if not data.get("success"):
-                raise ValueError(f"API error: {data.get('error', 'Unknown error')}")
 
-            html_content = data.get("data", {}).get("html", "")
+def _first_srcset_url(srcset: str) -> Optional[str]:
+    candidates = parse_srcset(srcset)
+    return candidates[0].url if candidates else None
 
-            if not html_content:
-                return []
 
-            return extract_image_urls_from_html(html_content, url)
+def _int_attr(value: Optional[str]) -> Optional[int]:
+    if value and value.strip().isdigit():
+        return int(value.strip())
+    return None
 
-        except requests.Timeout:
-            raise ValueError("Request timeout: Page took too long to respond")
-        except requests.RequestException as e:
-            raise ValueError(f"Network error: {str(e)}")
 
+class _ImageUrlCollector:
+    def __init__(self, policy: Optional[SelectionPolicy] = None):
+        self.urls: Dict[str, None] = {}
+        self.candidates = 0
+        self.policy = policy
+        self.stylesheets: Dict[str, None] = {}
+        self._picture: Optional[List[ImageCandidate]] = None
+        self._text_tag: Optional[str] = None
+        self._text: List[str] = []
+
+    def _add(self, value: Optional[str]) -> None:
+        if value:
+            self.candidates += 1
+            self.urls[value] = None
+
+    def _select(self, candidates: List[ImageCandidate], intrinsic_width: Optional[int] = None) -> None:
+        selected = self.policy.select(candidates, intrinsic_width)
+        if selected is not None:
+            self._add(selected.url)
+
+    def _handle_responsive(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if tag == "picture":
+            self._picture = []
+        elif tag == "source":
+            candidates = [
+                candidate._replace(type=attrs.get("type"), media=attrs.get("media"))
+                for candidate in parse_srcset(attrs.get("srcset") or "")
+            ]
+            if self._picture is not None:
+                self._picture.extend(candidates)
+            elif candidates:
+                self._select(candidates)
+        elif tag == "img":
+            candidates = parse_srcset(attrs.get("srcset") or "")
+            if not any(candidate.width is not None or candidate.density in (None, 1.0) for candidate in candidates):
+                for name in ("data-src", "data-lazy-src", "src"):
+                    value = attrs.get(name)
+                    if value and not value.startswith("data:"):
+                        candidates.append(ImageCandidate(value))
+                        break
+            if self._picture is not None:
+                candidates = self._picture + candidates
+                self._picture = None
+            self._select(candidates, _int_attr(attrs.get("width")))
+
+    def _handle_discovery(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if tag == "meta":
+            name = (attrs.get("property") or attrs.get("name") or "").strip().lower()
+            if name in META_IMAGE_PROPERTIES:
+                self._add(attrs.get("content"))
+        elif tag == "link":
+            rel = (attrs.get("rel") or "").lower().split()
+            if "stylesheet" in rel and attrs.get("href"):
+                self.stylesheets[attrs["href"]] = None
+            if "preload" in rel and (attrs.get("as") or "").lower() == "image":
+                self._add(attrs.get("href") or _first_srcset_url(attrs.get("imagesrcset") or ""))
+        elif tag == "style" or (tag == "script" and (attrs.get("type") or "").strip().lower() == "application/ld+json"):
+            self._text_tag = tag
+            self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._text_tag is not None:
+            self._text.append(data)
+
+    def handle_end(self, tag: str) -> None:
+        if tag == "picture" and self._picture is not None:
+            self._select(self._picture)
+            self._picture = None
+        elif tag == self._text_tag:
+            text = "".join(self._text)
+            self._text_tag = None
+            self._text = []
+            for url in css_image_urls(text) if tag == "style" else json_ld_image_urls(text):
+                self._add(url)
+
+    def handle_element(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        if self.policy is not None:
+            self._handle_responsive(tag, attrs)
+        else:
+            if tag == "img":
+                self._add(attrs.get("src"))
+                self._add(attrs.get("data-src"))
+                self._add(attrs.get("data-lazy-src"))
+
+            if tag in ("img", "source"):
+                srcset = attrs.get("srcset")
+                if srcset:
+                    self._add(_first_srcset_url(srcset))
+
+        if tag in ("meta", "link", "style", "script"):
+            self._handle_discovery(tag, attrs)
+
+        style = attrs.get("style")
+        if style:
+            for url in css_image_urls(style):
+                self._add(url)
+
+        self._add(attrs.get("data-bg"))
+        self._add(attrs.get("data-background-image"))
+
+
+class _StdlibImageParser(HTMLParser):
+    def __init__(self, collector: _ImageUrlCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.handle_element(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.collector.handle_end(tag)
+
+    def handle_data(self, data):
+        self.collector.handle_data(data)
+
+
+class _LxmlImageTarget:
+    def __init__(self, collector: _ImageUrlCollector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):
+            self.collector.handle_element(tag, dict(attrib))
+
+    def end(self, tag):
+        if isinstance(tag, str):
+            self.collector.handle_end(tag)
+
+    def data(self, data):
+        self.collector.handle_data(data)
+
+    def close(self):
+        return None
 
-def extract_image_urls_from_html(html: str, base_url: str) -> List[str]:
+
+def _collect_image_urls(
+    html: Union[str, bytes],
+    engine: str,
+    encoding: str,
+    policy: Optional[SelectionPolicy] = None
+) -> _ImageUrlCollector:
+    collector = _ImageUrlCollector(policy)
+
+    if engine == "html.parser":
+        parser = _StdlibImageParser(collector)
+        if isinstance(html, str):
+            parser.feed(html)
+        else:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            view = memoryview(html)
+            for start in range(0, len(view), _CHUNK_SIZE):
+                parser.feed(decoder.decode(view[start:start + _CHUNK_SIZE]))
+            parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    elif engine == "lxml":
+        from lxml import etree
+
+        target = _LxmlImageTarget(collector)
+        if isinstance(html, str):
+            parser = etree.HTMLParser(target=target)
+        else:
+            parser = etree.HTMLParser(target=target, encoding=encoding)
+        parser.feed(html)
+        parser.close()
+    else:
+        raise ValueError(f"Unknown extraction engine: {engine!r} (expected one of {EXTRACTION_ENGINES})")
+
+    return collector
+
+
+def extract_page_assets(
+    html: Union[str, bytes],
+    base_url: str,
+    engine: str = "html.parser",
+    encoding: str = "utf-8",
+    canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+    policy: Optional[SelectionPolicy] = None
+) -> Tuple[List[str], List[str]]:
     if not html:
-        return []
-
-    soup = BeautifulSoup(html, "html.parser")
-    image_urls: Set[str] = set()
-
-    for img in soup.find_all("img"):
-        src = img.get("src")
-        if src:
-            image_urls.add(src)
-
-        data_src = img.get("data-src")
-        if data_src:
-            image_urls.add(data_src)
-
-        data_lazy_src = img.get("data-lazy-src")
-        if data_lazy_src:
-            image_urls.add(data_lazy_src)
-
-        srcset = img.get("srcset")
-        if srcset:
-            first_url = srcset.split(",")[0].strip()
-            url_part = first_url.split(" ")[0]
-            if url_part:
-                image_urls.add(url_part)
-
-    for source in soup.find_all("source"):
-        srcset = source.get("srcset")
-        if srcset:
-            first_url = srcset.split(",")[0].strip()
-            url_part = first_url.split(" ")[0]
-            if url_part:
-                image_urls.add(url_part)
-
-    style_pattern = re.compile(r'url\(["\']?([^)"\']+)["\']?\)', re.IGNORECASE)
-    for element in soup.find_all(style=True):
-        style = element.get("style", "")
-        matches = style_pattern.findall(style)
-        for match in matches:
-            if any(ext in match.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp']):
-                image_urls.add(match)
-
-    for element in soup.find_all(attrs={"data-bg": True}):
-        data_bg = element.get("data-bg")
-        if data_bg:
-            image_urls.add(data_bg)
-
-    for element in soup.find_all(attrs={"data-background-image": True}):
-        bg_image = element.get("data-background-image")
-        if bg_image:
-            image_urls.add(bg_image)
-
-    absolute_urls: List[str] = []
-    seen: Set[str] = set()
-
-    for url in image_urls:
-        url = url.strip()
-        if not url or url.startswith("data:") or url.startswith("javascript:"):
-            continue
+        return [], []
 
-        try:
-            absolute_url = urljoin(base_url, url)
-            normalized_url = urlparse(absolute_url)._replace(fragment="").geturl()
+    with metrics.span("parse"):
+        collector = _collect_image_urls(html, engine, encoding, policy)
+
+    with metrics.span("normalize"):
+        absolute_urls, collapsed = canonicalize_urls(collector.urls, base_url, canonicalizer)
+        stylesheet_urls, _ = canonicalize_urls(collector.stylesheets, base_url, canonicalizer)
+
+    if metrics.enabled:
+        metrics.inc("html_bytes_total", len(html))
+        metrics.inc("urls_total", collector.candidates, stage="extracted")
+        metrics.inc("urls_total", len(absolute_urls), stage="deduplicated")
+        metrics.inc("urls_collapsed_total", collapsed)
+
+    return absolute_urls, stylesheet_urls
+
+
+def add_stylesheet_images(
+    image_urls: List[str],
+    stylesheet_urls: List[str],
+    stylesheets: StylesheetCache,
+    canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER
+) -> List[str]:
+    if not stylesheet_urls:
+        return image_urls
+
+    with metrics.span("stylesheets"):
+        linked_urls = stylesheets.image_urls_many(stylesheet_urls)
+    merged_urls, _ = canonicalize_urls(image_urls + linked_urls, "", canonicalizer)
+    return merged_urls
+
+
+def extract_image_urls_from_html(
+    html: Union[str, bytes],
+    base_url: str,
+    engine: str = "html.parser",
+    encoding: str = "utf-8",
+    canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+    policy: Optional[SelectionPolicy] = None,
+    stylesheets: Optional[StylesheetCache] = None
+) -> List[str]:
+    image_urls, stylesheet_urls = extract_page_assets(html, base_url, engine, encoding, canonicalizer, policy)
+    if stylesheets is not None:
+        image_urls = add_stylesheet_images(image_urls, stylesheet_urls, stylesheets, canonicalizer)
+    return image_urls
+
+
+def _extraction_version(policy: Optional[SelectionPolicy]) -> Optional[str]:
+    if policy is None:
+        return EXTRACTOR_VERSION
+    if policy.key is None:
+        return None
+    return f"{EXTRACTOR_VERSION}+{policy.key}"
 
-            if normalized_url not in seen:
-                seen.add(normalized_url)
-                absolute_urls.append(normalized_url)
-        except Exception:
+
+def extract_with_store(
+    store: HtmlStore,
+    digest: str,
+    base_url: str,
+    html: Optional[Union[str, bytes]] = None,
+    engine: str = "html.parser",
+    policy: Optional[SelectionPolicy] = None,
+    pool: Optional[ExtractionPool] = None,
+    stylesheets: Optional[StylesheetCache] = None
+) -> List[str]:
+    # Linked stylesheets change independently of the HTML, so only the page's own assets are memoized and
+    # stylesheet images are merged in on every call, through the StylesheetCache's TTL and ETag revalidation
+    version = _extraction_version(policy)
+    image_urls = stylesheet_urls = None
+    if version is not None:
+        image_urls = store.get_extraction(digest, version, base_url)
+        if stylesheets is not None:
+            stylesheet_urls = store.get_extraction(digest, f"{version}+stylesheets", base_url)
+
+    if image_urls is None or (stylesheets is not None and stylesheet_urls is None):
+        if html is None:
+            html = store.get_bytes(digest)
+        if pool is not None:
+            image_urls, stylesheet_urls = pool.extract_assets(html, base_url, policy)
+        else:
+            image_urls, stylesheet_urls = extract_page_assets(html, base_url, engine=engine, policy=policy)
+        if version is not None:
+            store.set_extraction(digest, version, base_url, image_urls)
+            if stylesheets is not None:
+                store.set_extraction(digest, f"{version}+stylesheets", base_url, stylesheet_urls)
+
+    if stylesheets is not None:
+        image_urls = add_stylesheet_images(image_urls, stylesheet_urls, stylesheets)
+    return image_urls
+
+
+def reextract_stored_pages(
+    store: HtmlStore,
+    engine: str = "html.parser",
+    policy: Optional[SelectionPolicy] = None
+) -> Iterator[Tuple[str, List[str]]]:
+    for url in store.urls():
+        latest = store.latest(url)
+        if latest is None:
             continue
+        yield url, extract_with_store(store, latest[0], url, engine=engine, policy=policy)
+
+
+_validation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="validate-api-key")
+_validations: Dict[Tuple[str, str, int], Future] = {}
+_validations_lock = threading.Lock()
+
+
+def validate_api_key(
+    api_key: str,
+    base_url: str = DEFAULT_BASE_URL,
+    timeout: float = 5,
+    endpoints: Optional[EndpointRouter] = None
+) -> Tuple[bool, str]:
+    cached = get_cached_validation(api_key)
+    if cached is not None:
+        return cached
+
+    try:
+        is_valid, message = FirecrawlClient(api_key, base_url=base_url, endpoints=endpoints).check_api_key(timeout)
+    except ValueError as e:
+        return False, str(e)
+
+    set_cached_validation(api_key, is_valid, message)
+    return is_valid, message
+
+
+def validate_api_key_async(
+    api_key: str,
+    base_url: str = DEFAULT_BASE_URL,
+    timeout: float = 5,
+    endpoints: Optional[EndpointRouter] = None
+) -> "Future[Tuple[bool, str]]":
+    cached = get_cached_validation(api_key)
+    if cached is not None:
+        future: Future = Future()
+        future.set_result(cached)
+        return future
+
+    key = (api_key, base_url, id(endpoints))
+    with _validations_lock:
+        future = _validations.get(key)
+        is_new = future is None
+        if is_new:
+            future = _validation_executor.submit(validate_api_key, api_key, base_url, timeout, endpoints)
+            _validations[key] = future
+    if is_new:
+        future.add_done_callback(lambda _: _forget_validation(key))
+    return future
+
+
+def _forget_validation(key: Tuple[str, str, int]) -> None:
+    with _validations_lock:
+        _validations.pop(key, None)
+
+
+if __name__ == "__main__":
+    from cli import main
 
-    return absolute_urls
\ No newline at end of file
+    raise SystemExit(main())
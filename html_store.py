@@ -0,0 +1,144 @@
+from typing import Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS = ("zlib", "zstd")
+
+
+class HtmlStore:
+    def __init__(self, root: str, compression: str = "zlib"):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression!r} (expected one of {COMPRESSIONS})")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+
+        self.root = root
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                os.path.join(self.root, "index.sqlite3"), timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fetches ("
+                "url TEXT NOT NULL, fetched_at REAL NOT NULL, html_hash TEXT NOT NULL, "
+                "PRIMARY KEY (url, fetched_at))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "html_hash TEXT NOT NULL, extractor_version TEXT NOT NULL, base_url TEXT NOT NULL, "
+                "urls TEXT NOT NULL, PRIMARY KEY (html_hash, extractor_version, base_url))"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _object_path(self, digest: str, compression: str) -> str:
+        suffix = "zst" if compression == "zstd" else "zlib"
+        return os.path.join(self.root, "objects", digest[:2], f"{digest[2:]}.{suffix}")
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(data)
+        return zlib.compress(data, 6)
+
+    def put(self, url: str, html: str, fetched_at: Optional[float] = None) -> str:
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, self.compression)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._compress(data))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO fetches (url, fetched_at, html_hash) VALUES (?, ?, ?)",
+                (url, fetched_at if fetched_at is not None else time.time(), digest)
+            )
+        return digest
+
+    def get_bytes(self, digest: str) -> bytes:
+        path = self._object_path(digest, "zlib")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return zlib.decompress(f.read())
+
+        path = self._object_path(digest, "zstd")
+        if os.path.exists(path):
+            if zstandard is None:
+                raise ValueError("Reading zstd objects requires the 'zstandard' package")
+            with open(path, "rb") as f:
+                return zstandard.ZstdDecompressor().decompress(f.read())
+
+        raise KeyError(digest)
+
+    def get(self, digest: str) -> str:
+        return self.get_bytes(digest).decode("utf-8")
+
+    def latest(self, url: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT html_hash, fetched_at FROM fetches WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def history(self, url: str) -> List[Tuple[str, float]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT html_hash, fetched_at FROM fetches WHERE url = ? ORDER BY fetched_at",
+                (url,)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def urls(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection().execute("SELECT DISTINCT url FROM fetches ORDER BY url").fetchall()
+        for row in rows:
+            yield row[0]
+
+    def get_extraction(self, digest: str, extractor_version: str, base_url: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT urls FROM extractions WHERE html_hash = ? AND extractor_version = ? AND base_url = ?",
+                (digest, extractor_version, base_url)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_extraction(self, digest: str, extractor_version: str, base_url: str, urls: List[str]) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO extractions (html_hash, extractor_version, base_url, urls) VALUES (?, ?, ?, ?)",
+                (digest, extractor_version, base_url, json.dumps(urls, separators=(",", ":")))
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
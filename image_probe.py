@@ -0,0 +1,219 @@
+import requests
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import struct
+import threading
+
+from firecrawl_client import get_shared_session
+from url_guard import guarded_request
+
+DEFAULT_RANGE_BYTES = 64 * 1024
+DEFAULT_PROBE_WORKERS = 8
+
+_probe_cache = TTLCache(maxsize=10000, ttl=3600)
+_probe_cache_lock = threading.Lock()
+
+
+class ImageInfo(NamedTuple):
+    url: str
+    status: Optional[int]
+    content_type: Optional[str]
+    size: Optional[int]
+    format: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        (length,) = struct.unpack(">H", data[i + 2:i + 4])
+        i += 2 + length
+    return None
+
+
+def _webp_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30 and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25 and data[20] == 0x2F:
+        b0, b1, b2, b3 = data[21:25]
+        return 1 + (b0 | (b1 & 0x3F) << 8), 1 + (b1 >> 6 | b2 << 2 | (b3 & 0x0F) << 10)
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def parse_image_header(data: bytes) -> Optional[Tuple[str, Optional[int], Optional[int]]]:
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(data) < 24:
+            return "png", None, None
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        if len(data) < 10:
+            return "gif", None, None
+        width, height = struct.unpack("<HH", data[6:10])
+        return "gif", width, height
+    if data.startswith(b"\xff\xd8"):
+        dimensions = _jpeg_dimensions(data)
+        return ("jpeg",) + (dimensions or (None, None))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        dimensions = _webp_dimensions(data)
+        return ("webp",) + (dimensions or (None, None))
+    if data.startswith(b"BM") and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        return "bmp", width, abs(height)
+    return None
+
+
+def _total_size(response: requests.Response) -> Optional[int]:
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    if response.status_code == 200:
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit():
+            return int(length)
+    return None
+
+
+def _media_type(response: requests.Response) -> Optional[str]:
+    content_type = response.headers.get("Content-Type")
+    if not content_type:
+        return None
+    return content_type.split(";")[0].strip().lower()
+
+
+class ImageProber:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        max_workers: int = DEFAULT_PROBE_WORKERS,
+        range_bytes: int = DEFAULT_RANGE_BYTES,
+        timeout: float = 10,
+        cache: Optional[TTLCache] = _probe_cache,
+        allow_private: bool = False
+    ):
+        self.session = session if session is not None else get_shared_session(max_workers)
+        self.max_workers = max_workers
+        self.range_bytes = range_bytes
+        self.timeout = timeout
+        self.cache = cache
+        self.allow_private = allow_private
+
+    def _read_prefix(self, url: str) -> Tuple[requests.Response, bytes]:
+        response = guarded_request(
+            self.session,
+            "GET",
+            url,
+            self.allow_private,
+            headers={"Range": f"bytes=0-{self.range_bytes - 1}"},
+            timeout=self.timeout,
+            stream=True
+        )
+        try:
+            data = bytearray()
+            if response.status_code < 400:
+                for chunk in response.iter_content(chunk_size=8192):
+                    data += chunk
+                    if len(data) >= self.range_bytes:
+                        break
+        finally:
+            response.close()
+        return response, bytes(data[:self.range_bytes])
+
+    def _probe(self, url: str) -> ImageInfo:
+        status = content_type = size = None
+        try:
+            head = guarded_request(self.session, "HEAD", url, self.allow_private, timeout=self.timeout)
+            if head.status_code not in (405, 501):
+                status, content_type, size = head.status_code, _media_type(head), _total_size(head)
+                if status >= 400:
+                    return ImageInfo(url, status, content_type, size)
+                if content_type and not content_type.startswith("image/"):
+                    return ImageInfo(url, status, content_type, size)
+                if content_type == "image/svg+xml":
+                    return ImageInfo(url, status, content_type, size, format="svg")
+
+            response, data = self._read_prefix(url)
+        except (requests.RequestException, ValueError) as e:
+            return ImageInfo(url, status, content_type, size, error=str(e))
+
+        if status is None:
+            status, content_type = response.status_code, _media_type(response)
+        if response.status_code >= 400:
+            return ImageInfo(url, response.status_code, content_type, size)
+        if size is None:
+            size = _total_size(response)
+
+        header = parse_image_header(data)
+        if header is None:
+            return ImageInfo(url, status, content_type, size)
+        image_format, width, height = header
+        return ImageInfo(url, status, content_type, size, image_format, width, height)
+
+    def probe(self, url: str) -> ImageInfo:
+        if self.cache is not None:
+            with _probe_cache_lock:
+                cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        info = self._probe(url)
+        if self.cache is not None and info.error is None:
+            with _probe_cache_lock:
+                self.cache[url] = info
+        return info
+
+    def probe_many(self, urls: Iterable[str]) -> Iterator[ImageInfo]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(self.probe, urls)
+
+
+def filter_images(
+    infos: Iterable[ImageInfo],
+    min_width: int = 0,
+    min_height: int = 0,
+    min_bytes: int = 0,
+    content_types: Optional[Sequence[str]] = ("image/",),
+    allow_unknown_size: bool = True
+) -> List[ImageInfo]:
+    kept: List[ImageInfo] = []
+    for info in infos:
+        if not info.ok:
+            continue
+        if content_types and not (info.content_type and info.content_type.startswith(tuple(content_types))):
+            continue
+        if info.size is not None and info.size < min_bytes:
+            continue
+        if info.width is None or info.height is None:
+            if (min_width or min_height) and not allow_unknown_size:
+                continue
+        elif info.width < min_width or info.height < min_height:
+            continue
+        kept.append(info)
+    return kept
@@ -0,0 +1,137 @@
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+import os
+import threading
+import time
+
+METRIC_PREFIX = "image_scraper_"
+
+LabelSet = Tuple[Tuple[str, str], ...]
+Hook = Callable[[str, str, float, Dict[str, str]], None]
+
+_NULL_SPAN = nullcontext()
+
+
+def _label_set(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe("stage_seconds", time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._summaries: Dict[str, Dict[LabelSet, List[float]]] = {}
+        self._hooks: List[Hook] = []
+
+    def span(self, stage: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = _label_set(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        self._notify("counter", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = _label_set(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            totals = series.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += value
+        self._notify("summary", name, value, labels)
+
+    def add_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def _notify(self, kind: str, name: str, value: float, labels: Dict[str, str]) -> None:
+        for hook in self._hooks:
+            hook(kind, name, value, labels)
+
+    def counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_set(labels), 0)
+
+    def summary(self, name: str, **labels: str) -> Tuple[int, float]:
+        with self._lock:
+            count, total = self._summaries.get(name, {}).get(_label_set(labels), (0, 0.0))
+        return count, total
+
+    def counters(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [
+                (name, dict(labels), value)
+                for name in sorted(self._counters)
+                for labels, value in sorted(self._counters[name].items())
+            ]
+
+    def summaries(self) -> List[Tuple[str, Dict[str, str], int, float]]:
+        with self._lock:
+            return [
+                (name, dict(labels), count, total)
+                for name in sorted(self._summaries)
+                for labels, (count, total) in sorted(self._summaries[name].items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                metric = f"{METRIC_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+            for name in sorted(self._summaries):
+                metric = f"{METRIC_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} summary")
+                for labels, (count, total) in sorted(self._summaries[name].items()):
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+metrics = Metrics(enabled=os.environ.get("IMAGE_SCRAPER_METRICS", "") == "1")
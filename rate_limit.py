@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from metrics import metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class RateLimit(NamedTuple):
+    requests_per_minute: float
+    max_concurrency: int
+
+
+PLAN_LIMITS: Dict[str, RateLimit] = {
+    "free": RateLimit(10, 2),
+    "hobby": RateLimit(100, 5),
+    "standard": RateLimit(500, 50),
+    "growth": RateLimit(5000, 100),
+}
+DEFAULT_PLAN = os.environ.get("FIRECRAWL_PLAN", "free").lower()
+
+
+def plan_limit(plan: str) -> RateLimit:
+    try:
+        return PLAN_LIMITS[plan.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown plan: {plan!r} (expected one of {tuple(PLAN_LIMITS)})")
+
+
+class RequestScheduler:
+    def __init__(self, limit: RateLimit):
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.in_flight = 0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.configure(limit)
+        self._tokens = float(self.burst)
+
+    def configure(self, limit: RateLimit) -> None:
+        if limit.requests_per_minute <= 0 or limit.max_concurrency < 1:
+            raise ValueError("requests_per_minute must be positive and max_concurrency at least 1")
+        with self._cond:
+            self.limit = limit
+            self.rate = limit.requests_per_minute / 60.0
+            self.burst = limit.max_concurrency
+            self._cond.notify_all()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_time(self, entry: Tuple[int, int], now: float) -> Optional[float]:
+        if self._waiters[0] != entry or self.in_flight >= self.limit.max_concurrency:
+            return None
+        return max(self._blocked_until - now, (1 - self._tokens) / self.rate, 0.0)
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> float:
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(entry, now)
+                    if wait == 0.0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise ValueError("Request timeout: waited too long for a rate limit slot")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.in_flight += 1
+            waited = time.monotonic() - start
+            self.granted += 1
+            self.total_wait += waited
+            self._cond.notify_all()
+
+        metrics.observe("queue_seconds", waited, priority=str(priority))
+        return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Iterator[float]:
+        waited = self.acquire(priority, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def penalize(self, seconds: float) -> None:
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "waiting": len(self._waiters),
+                "in_flight": self.in_flight,
+                "tokens": round(self._tokens, 3),
+                "granted": self.granted,
+                "mean_wait_seconds": self.total_wait / self.granted if self.granted else 0.0,
+            }
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(api_key: str, limit: RateLimit) -> RequestScheduler:
+    key = hashlib.sha256(api_key.encode()).hexdigest()
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = RequestScheduler(limit)
+    if scheduler.limit != limit:
+        scheduler.configure(limit)
+    return scheduler
@@ -0,0 +1,98 @@
+from html import escape
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import posixpath
+
+NO_EXTENSION = "(none)"
+PAGE_SIZES = (50, 100, 250, 500)
+
+
+def url_extension(url: str) -> str:
+    extension = posixpath.splitext(urlparse(url).path)[1].lower().lstrip(".")
+    return extension or NO_EXTENSION
+
+
+def url_domain(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def paginate(items: Sequence[str], page: int, page_size: int) -> Tuple[List[str], int]:
+    total_pages = max(1, -(-len(items) // page_size))
+    page = min(max(page, 1), total_pages)
+    start = (page - 1) * page_size
+    return list(items[start:start + page_size]), total_pages
+
+
+def is_web_url(url: str) -> bool:
+    return urlparse(url).scheme.lower() in ("http", "https")
+
+
+def _thumbnail_cell(url: str, size: int) -> str:
+    if not is_web_url(url):
+        return (
+            f'<span style="width:{size}px;height:{size}px;overflow:hidden;word-break:break-all;font-size:11px">'
+            f'{escape(url)}</span>'
+        )
+    return (
+        f'<a href="{escape(url)}" target="_blank" rel="noopener noreferrer">'
+        f'<img src="{escape(url)}" loading="lazy" decoding="async" '
+        f'style="width:{size}px;height:{size}px;object-fit:contain;background:#262730;border-radius:4px" '
+        f'title="{escape(url)}"></a>'
+    )
+
+
+def thumbnail_grid_html(urls: Iterable[str], size: int = 120) -> str:
+    cells = "".join(_thumbnail_cell(url, size) for url in urls)
+    return f'<div style="display:flex;flex-wrap:wrap;gap:8px">{cells}</div>'
+
+
+class ResultSet:
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self._text: Optional[str] = None
+        self._extensions: Optional[List[str]] = None
+        self._domains: Optional[List[str]] = None
+        self._filtered: Dict[Tuple[Tuple[str, ...], Tuple[str, ...], str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self.urls)
+        return self._text
+
+    @property
+    def extensions(self) -> List[str]:
+        if self._extensions is None:
+            self._extensions = sorted({url_extension(url) for url in self.urls})
+        return self._extensions
+
+    @property
+    def domains(self) -> List[str]:
+        if self._domains is None:
+            self._domains = sorted({url_domain(url) for url in self.urls})
+        return self._domains
+
+    def filter(
+        self,
+        extensions: Optional[Sequence[str]] = None,
+        domains: Optional[Sequence[str]] = None,
+        query: str = ""
+    ) -> List[str]:
+        key = (tuple(sorted(extensions or ())), tuple(sorted(domains or ())), query.strip().lower())
+        if not any(key):
+            return self.urls
+
+        filtered = self._filtered.get(key)
+        if filtered is None:
+            wanted_extensions, wanted_domains, needle = set(key[0]), set(key[1]), key[2]
+            filtered = [
+                url for url in self.urls
+                if (not wanted_extensions or url_extension(url) in wanted_extensions)
+                and (not wanted_domains or url_domain(url) in wanted_domains)
+                and (not needle or needle in url.lower())
+            ]
+            self._filtered = {key: filtered}
+        return filtered
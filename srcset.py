@@ -0,0 +1,177 @@
+from typing import Callable, List, NamedTuple, Optional, Sequence
+import re
+
+SELECTION_STRATEGIES = ("first", "smallest", "largest", "target")
+
+_WHITESPACE = " \t\n\r\f"
+_INTEGER = re.compile(r"^[0-9]+$")
+_FLOAT = re.compile(r"^-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?$")
+_EXTENSION_TYPES = {
+    ".avif": "image/avif",
+    ".webp": "image/webp",
+    ".jxl": "image/jxl",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
+
+
+class ImageCandidate(NamedTuple):
+    url: str
+    width: Optional[int] = None
+    density: Optional[float] = None
+    type: Optional[str] = None
+    media: Optional[str] = None
+
+
+def _parse_descriptors(url: str, descriptors: List[str]) -> Optional[ImageCandidate]:
+    width: Optional[int] = None
+    density: Optional[float] = None
+    height: Optional[int] = None
+
+    for descriptor in descriptors:
+        value, kind = descriptor[:-1], descriptor[-1:]
+        if kind == "w" and width is None and density is None and _INTEGER.match(value) and int(value) > 0:
+            width = int(value)
+        elif kind == "x" and width is None and density is None and height is None and _FLOAT.match(value) and float(value) >= 0:
+            density = float(value)
+        elif kind == "h" and height is None and density is None and _INTEGER.match(value) and int(value) > 0:
+            height = int(value)
+        else:
+            return None
+
+    if height is not None and width is None:
+        return None
+    return ImageCandidate(url, width=width, density=density)
+
+
+def parse_srcset(srcset: str) -> List[ImageCandidate]:
+    candidates: List[ImageCandidate] = []
+    position = 0
+    length = len(srcset)
+
+    while True:
+        while position < length and (srcset[position] in _WHITESPACE or srcset[position] == ","):
+            position += 1
+        if position >= length:
+            return candidates
+
+        start = position
+        while position < length and srcset[position] not in _WHITESPACE:
+            position += 1
+        url = srcset[start:position]
+
+        descriptors: List[str] = []
+        if url.endswith(","):
+            url = url.rstrip(",")
+        else:
+            current = ""
+            in_parens = False
+            while position < length:
+                char = srcset[position]
+                if in_parens:
+                    current += char
+                    if char == ")":
+                        in_parens = False
+                elif char in _WHITESPACE:
+                    if current:
+                        descriptors.append(current)
+                        current = ""
+                elif char == ",":
+                    position += 1
+                    break
+                else:
+                    current += char
+                    if char == "(":
+                        in_parens = True
+                position += 1
+            if current:
+                descriptors.append(current)
+
+        if url:
+            candidate = _parse_descriptors(url, descriptors)
+            if candidate is not None:
+                candidates.append(candidate)
+
+
+def guess_image_type(url: str) -> Optional[str]:
+    path = url.split("#", 1)[0].split("?", 1)[0].lower()
+    dot = path.rfind(".")
+    if dot == -1 or "/" in path[dot:]:
+        return None
+    return _EXTENSION_TYPES.get(path[dot:])
+
+
+class SelectionPolicy:
+    def __init__(
+        self,
+        strategy: str = "first",
+        target_width: Optional[int] = None,
+        dpr: float = 1.0,
+        preferred_types: Sequence[str] = (),
+        media: Optional[Callable[[str], bool]] = None,
+        media_key: Optional[str] = None
+    ):
+        if strategy not in SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown selection strategy: {strategy!r} (expected one of {SELECTION_STRATEGIES})")
+        if strategy == "target" and not target_width:
+            raise ValueError("The target strategy needs a target_width")
+        self.strategy = strategy
+        self.target_width = target_width
+        self.dpr = dpr
+        self.preferred_types = tuple(preferred_types)
+        self.media = media
+        self.media_key = media_key
+
+    @property
+    def key(self) -> Optional[str]:
+        key = f"{self.strategy}:{self.target_width}:{self.dpr}:{','.join(self.preferred_types)}"
+        if self.media is None:
+            return key
+        # A callable has no stable identity, so results are only memoized when the caller names it
+        return f"{key}:media={self.media_key}" if self.media_key else None
+
+    def accepts_media(self, media: Optional[str]) -> bool:
+        if not media or media.strip().lower() == "all":
+            return True
+        return self.media is not None and self.media(media)
+
+    def _type_rank(self, candidate: ImageCandidate) -> int:
+        candidate_type = candidate.type or guess_image_type(candidate.url)
+        if candidate_type in self.preferred_types:
+            return self.preferred_types.index(candidate_type)
+        return len(self.preferred_types)
+
+    def _scale(self, candidate: ImageCandidate, intrinsic_width: Optional[int]) -> float:
+        if candidate.width is not None:
+            return candidate.width
+        density = candidate.density if candidate.density is not None else 1.0
+        return density * (intrinsic_width or self.target_width or 1)
+
+    def select(self, candidates: Sequence[ImageCandidate], intrinsic_width: Optional[int] = None) -> Optional[ImageCandidate]:
+        candidates = [candidate for candidate in candidates if self.accepts_media(candidate.media)]
+        if not candidates:
+            return None
+        if self.strategy == "first":
+            return candidates[0]
+
+        if self.preferred_types:
+            best_rank = min(self._type_rank(candidate) for candidate in candidates)
+            candidates = [candidate for candidate in candidates if self._type_rank(candidate) == best_rank]
+
+        if intrinsic_width is None and any(candidate.width is not None for candidate in candidates):
+            candidates = [candidate for candidate in candidates if candidate.width is not None]
+
+        scaled = [(self._scale(candidate, intrinsic_width), candidate) for candidate in candidates]
+        if self.strategy == "smallest":
+            return min(scaled, key=lambda item: item[0])[1]
+        if self.strategy == "largest":
+            return max(scaled, key=lambda item: item[0])[1]
+
+        needed = self.target_width * self.dpr
+        large_enough = [item for item in scaled if item[0] >= needed]
+        if large_enough:
+            return min(large_enough, key=lambda item: item[0])[1]
+        return max(scaled, key=lambda item: item[0])[1]
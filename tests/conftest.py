@@ -0,0 +1,146 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cache_utils
+from firecrawl_client import EXTRACTION_ENGINES
+
+
+@pytest.fixture(autouse=True)
+def isolated_disk_cache(monkeypatch):
+    # clear_cache() also empties the disk tier, which defaults to the cache file shared with the app and CLI
+    monkeypatch.setattr(cache_utils, "_disk_cache", None)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = None
+        self.bytes_read = 0
+        self._data = json.dumps(body if body is not None else {}).encode()
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self._data), chunk_size):
+            chunk = self._data[start:start + chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.kwargs = None
+
+    def _next(self, **kwargs):
+        self.calls += 1
+        self.kwargs = kwargs
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def request(self, method, url, **kwargs):
+        return self._next(url=url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self._next(url=url, **kwargs)
+
+
+class StubRequest(NamedTuple):
+    method: str
+    path: str
+    headers: dict
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class StubServer:
+    def __init__(self, handle):
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                request = StubRequest(self.command, self.path, dict(self.headers), body)
+                stub.requests.append(request)
+                status, data, *extra = handle(request)
+                headers = dict(extra[0]) if extra else {}
+                if not isinstance(data, bytes):
+                    data = json.dumps(data).encode()
+                    headers.setdefault("Content-Type", "application/json")
+                headers.setdefault("Content-Length", str(len(data)))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+            do_GET = do_POST = do_HEAD = _respond
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    def url(self, path=""):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(handle):
+        server = StubServer(handle)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def make_response():
+    return FakeResponse
+
+
+@pytest.fixture
+def make_session():
+    return FakeSession
+
+
+@pytest.fixture
+def scrape_response():
+    def build(html='<img src="/a.jpg">'):
+        return FakeResponse(200, {"success": True, "data": {"html": html}})
+    return build
+
+
+@pytest.fixture(params=EXTRACTION_ENGINES)
+def engine(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return request.param
@@ -0,0 +1,133 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from asset_discovery import StylesheetCache, css_image_urls, json_ld_image_urls
+from firecrawl_client import extract_image_urls_from_html
+
+STYLESHEET = b"""
+/* url(/commented-out.png) */
+@font-face { src: url(/fonts/brand.woff2) format("woff2"); }
+@import url("base.css");
+.hero { background-image: url("../img/hero.jpg"); }
+.icon { background: url(https://cdn.example.com/icons?id=7) no-repeat; }
+.mask { filter: url(#blur); }
+"""
+
+
+@pytest.fixture
+def asset_server(stub_server):
+    def handle(request):
+        if request.path == "/missing.css":
+            return 404, b""
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, b""
+        return 200, STYLESHEET, {"Content-Type": "text/css; charset=utf-8", "ETag": '"v1"'}
+
+    return stub_server(handle)
+
+
+def test_css_image_urls_skips_fonts_imports_and_fragments():
+    assert css_image_urls(STYLESHEET.decode()) == ["../img/hero.jpg", "https://cdn.example.com/icons?id=7"]
+
+
+def test_json_ld_image_urls():
+    text = '''{"@context": "https://schema.org", "@graph": [
+        {"@type": "Product", "image": ["/p1.jpg", "/p2.jpg"], "brand": {"logo": "/logo.svg"}},
+        {"@type": "Article", "image": {"@type": "ImageObject", "contentUrl": "/article.webp"}}
+    ]}'''
+
+    assert json_ld_image_urls(text) == ["/p1.jpg", "/p2.jpg", "/logo.svg", "/article.webp"]
+    assert json_ld_image_urls("{not json") == []
+
+
+def test_json_ld_image_objects_and_video_content():
+    text = '''[
+        {"@type": "Organization", "logo": {"@type": "ImageObject", "url": "/logo.png"}},
+        {"@type": "NewsArticle", "image": {"@type": "ImageObject", "url": "/lead.jpg", "width": 1200}},
+        {"@type": "Recipe", "image": [{"url": "/r1.jpg"}, "/r2.jpg"]},
+        {"@type": "VideoObject", "contentUrl": "/v.mp4", "thumbnailUrl": "/v.jpg"},
+        {"@type": "ImageObject", "contentUrl": "/photo.jpg", "url": "/photo-page"}
+    ]'''
+
+    assert json_ld_image_urls(text) == ["/logo.png", "/lead.jpg", "/r1.jpg", "/r2.jpg", "/v.jpg", "/photo.jpg"]
+
+
+def test_extract_discovers_head_and_structured_images(engine):
+    html = '''
+    <html><head>
+        <meta property="og:image" content="/og.jpg">
+        <meta name="twitter:image" content="https://cdn.example.com/card.png">
+        <link rel="preload" as="image" href="/hero.avif">
+        <link rel="preload" as="font" href="/font.woff2">
+        <style>.banner { background: url('/banner.jpg'); } .f { src: url(/x.ttf); }</style>
+        <script type="application/ld+json">{"@type": "Product", "image": "/product.jpg"}</script>
+        <script>var fake = "url(/not-css.png)";</script>
+    </head><body>
+        <div style="background-image: url(https://images.example.com/photo?id=1)"></div>
+    </body></html>
+    '''
+    urls = extract_image_urls_from_html(html, "https://example.com", engine=engine)
+
+    assert urls == [
+        "https://example.com/og.jpg",
+        "https://cdn.example.com/card.png",
+        "https://example.com/hero.avif",
+        "https://example.com/banner.jpg",
+        "https://example.com/product.jpg",
+        "https://images.example.com/photo?id=1",
+    ]
+
+
+def test_linked_stylesheets_are_fetched_once_and_revalidated(engine, asset_server):
+    cache = StylesheetCache(ttl=60, allow_private=True)
+    html = f'<link rel="stylesheet" href="{asset_server.url()}/css/site.css"><img src="/a.jpg">'
+
+    first = extract_image_urls_from_html(html, "https://example.com", engine=engine, stylesheets=cache)
+    second = extract_image_urls_from_html(html, "https://example.org", engine=engine, stylesheets=cache)
+    cache.ttl = 0
+    third = extract_image_urls_from_html(html, "https://example.com", engine=engine, stylesheets=cache)
+
+    assert first == [
+        "https://example.com/a.jpg",
+        f"{asset_server.url()}/img/hero.jpg",
+        "https://cdn.example.com/icons?id=7",
+    ]
+    assert second[1:] == first[1:]
+    assert third == first
+    assert [(r.path, r.headers.get("If-None-Match")) for r in asset_server.requests] == [
+        ("/css/site.css", None),
+        ("/css/site.css", '"v1"'),
+    ]
+
+
+def test_failed_stylesheets_are_not_refetched_per_page(asset_server):
+    cache = StylesheetCache(ttl=600, allow_private=True)
+    url = f"{asset_server.url()}/missing.css"
+
+    assert cache.image_urls(url) == []
+    assert cache.image_urls(url) == []
+
+    assert [r.path for r in asset_server.requests] == ["/missing.css"]
+
+
+def test_stylesheets_on_non_public_hosts_are_not_fetched(make_session):
+    session = make_session([])
+    cache = StylesheetCache(session=session)
+
+    for url in ("http://127.0.0.1:8080/site.css", "http://169.254.169.254/latest/meta-data/", "file:///etc/passwd"):
+        assert cache.image_urls(url) == []
+    assert session.calls == 0
+
+
+def test_stylesheet_locks_do_not_grow_with_urls(make_session):
+    cache = StylesheetCache(session=make_session([]), maxsize=8)
+    locks = list(cache._url_locks)
+
+    for index in range(1000):
+        cache.image_urls(f"http://127.0.0.1/{index}.css")
+
+    assert cache._url_locks == locks
+    assert len(cache._entries) == 8
@@ -0,0 +1,371 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cache_utils
+from cache_utils import (
+    CompactUrlList,
+    DiskCache,
+    cache_stats,
+    clear_cache,
+    configure_disk_cache,
+    configure_memory_cache,
+    get_cached_entry,
+    get_cached_result,
+    get_or_refresh,
+    is_refreshing,
+    result_cache_key,
+    schedule_refresh,
+    set_cached_result,
+    single_flight,
+)
+
+
+@pytest.fixture
+def disk_cache_path(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    configure_disk_cache(path)
+    yield path
+    clear_cache()
+    configure_disk_cache(None)
+
+
+def test_disk_tier_survives_cold_memory_cache(disk_cache_path):
+    set_cached_result("key:https://example.com", ["https://example.com/a.jpg"])
+    cache_utils._cache.clear()
+
+    assert get_cached_result("key:https://example.com") == ["https://example.com/a.jpg"]
+    assert cache_utils._hash_key("key:https://example.com") in cache_utils._cache
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = DiskCache(path)
+    reader = DiskCache(path)
+
+    writer.set("k", ["https://example.com/a.jpg"])
+
+    assert reader.get("k") == ["https://example.com/a.jpg"]
+
+
+def test_disk_tier_evicts_least_recently_used_over_budget(tmp_path):
+    cache = DiskCache(str(tmp_path / "lru.sqlite3"), max_bytes=150, touch_interval=0)
+    value = ["x" * 40]
+
+    cache.set("a", value)
+    cache.set("b", value)
+    cache.set("c", value)
+    assert cache.get("a") == value
+    cache.set("d", value)
+
+    assert cache.total_bytes() <= 150
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("d") == value
+
+
+def test_disk_tier_hits_only_touch_entries_after_interval(tmp_path):
+    cache = DiskCache(str(tmp_path / "touch.sqlite3"), touch_interval=60)
+    cache.set("k", ["https://example.com/a.jpg"])
+    conn = cache._connection()
+    conn.execute("UPDATE entries SET accessed_at = accessed_at - 30")
+    touched = conn.execute("SELECT accessed_at FROM entries").fetchone()[0]
+
+    assert cache.get("k") == ["https://example.com/a.jpg"]
+    assert conn.execute("SELECT accessed_at FROM entries").fetchone()[0] == touched
+
+    conn.execute("UPDATE entries SET accessed_at = accessed_at - 60")
+    assert cache.get("k") == ["https://example.com/a.jpg"]
+    assert conn.execute("SELECT accessed_at FROM entries").fetchone()[0] > touched
+
+
+def test_disk_tier_expires_entries(tmp_path):
+    cache = DiskCache(str(tmp_path / "ttl.sqlite3"), ttl=-1)
+    cache.set("k", ["https://example.com/a.jpg"])
+
+    assert cache.get("k") is None
+
+
+def test_result_cache_key_separates_options():
+    keys = {
+        result_cache_key("fc-12345678abc", "https://example.com"),
+        result_cache_key("fc-12345678abc", "https://example.com", stylesheets=True),
+        result_cache_key("fc-12345678abc", "https://example.com", crawl=(10, 2)),
+        result_cache_key("fc-12345678abc", "https://example.com", stylesheets=True, crawl=(10, 2)),
+    }
+
+    assert len(keys) == 4
+    assert result_cache_key("fc-12345678abc", "https://example.com") == "fc-12345:https://example.com"
+
+
+def test_memory_only_when_disk_tier_disabled():
+    configure_disk_cache(None)
+    set_cached_result("key:https://example.com", ["https://example.com/a.jpg"])
+    cache_utils._cache.clear()
+
+    assert get_cached_result("key:https://example.com") is None
+
+
+@pytest.fixture
+def memory_cache():
+    configure_disk_cache(None)
+    clear_cache()
+    yield
+    clear_cache()
+
+
+class FakeScraper:
+    def __init__(self, result=None, error=None):
+        self.result = result if result is not None else ["https://example.com/a.jpg"]
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def scrape_images(self, url):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    started = threading.Barrier(count + 1)
+
+    def worker(index):
+        started.wait()
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    time.sleep(0.1)
+    return threads, results
+
+
+def test_single_flight_coalesces_concurrent_fetches(memory_cache):
+    scraper = FakeScraper()
+    threads, results = run_concurrently(
+        8, lambda: single_flight("k:https://example.com", lambda: scraper.scrape_images("https://example.com"))
+    )
+    scraper.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert scraper.calls == 1
+    assert all(result == ["https://example.com/a.jpg"] for result in results)
+    assert get_cached_result("k:https://example.com") == ["https://example.com/a.jpg"]
+
+
+def test_single_flight_shares_errors(memory_cache):
+    scraper = FakeScraper(error=ValueError("429 Too Many Requests: Rate limit exceeded"))
+    threads, results = run_concurrently(
+        5, lambda: single_flight("k:https://example.com", lambda: scraper.scrape_images("https://example.com"))
+    )
+    scraper.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert scraper.calls == 1
+    assert all(isinstance(result, ValueError) and "429" in str(result) for result in results)
+    assert get_cached_result("k:https://example.com") is None
+
+
+def test_single_flight_follower_times_out(memory_cache):
+    scraper = FakeScraper()
+    leader = threading.Thread(
+        target=single_flight, args=("k:https://example.com", lambda: scraper.scrape_images("https://example.com"))
+    )
+    leader.start()
+    while cache_utils._hash_key("k:https://example.com") not in cache_utils._in_flight:
+        pass
+
+    with pytest.raises(ValueError, match="timeout"):
+        single_flight("k:https://example.com", lambda: scraper.scrape_images("https://example.com"), timeout=0.05)
+
+    scraper.release.set()
+    leader.join(5)
+    assert scraper.calls == 1
+
+
+def test_single_flight_serves_cache_without_fetching(memory_cache):
+    scraper = FakeScraper()
+    set_cached_result("k:https://example.com", ["https://example.com/cached.jpg"])
+
+    assert single_flight("k:https://example.com", lambda: scraper.scrape_images("https://example.com")) == [
+        "https://example.com/cached.jpg"
+    ]
+    assert scraper.calls == 0
+
+
+@pytest.fixture
+def small_memory_cache():
+    configure_disk_cache(None)
+    clear_cache()
+    yield
+    configure_memory_cache()
+
+
+def test_memory_tier_is_budgeted_by_bytes(small_memory_cache):
+    small = ["https://example.com/a.jpg"]
+    large = [f"https://example.com/gallery/{i}/{i * 7919 % 104729:x}.jpg" for i in range(5000)]
+    set_cached_result("k:probe", small)
+    configure_memory_cache(max_bytes=cache_stats()["memory_bytes"] * 20)
+
+    for i in range(10):
+        set_cached_result(f"k:small:{i}", small)
+    set_cached_result("k:large", large)
+
+    assert get_cached_result("k:large") is None
+    assert all(get_cached_result(f"k:small:{i}") == small for i in range(10))
+    assert cache_stats()["memory_entries"] == 10
+
+
+def test_memory_tier_stores_urls_compactly(small_memory_cache):
+    urls = [f"https://cdn.example.com/products/{i:06d}/main.jpg" for i in range(10000)]
+    set_cached_result("k:page", urls)
+    stats = cache_stats()
+
+    assert get_cached_result("k:page") == urls
+    assert stats["memory_entries"] == 1
+    assert stats["memory_urls"] == 10000
+    assert stats["memory_bytes"] < sum(len(url) for url in urls) / 10
+
+
+def test_cache_stats_include_disk_tier(disk_cache_path):
+    set_cached_result("k:a", ["https://example.com/a.jpg"])
+
+    stats = cache_stats()
+
+    assert stats["disk_entries"] == 1
+    assert stats["disk_bytes"] > 0
+
+
+def test_compact_url_list_round_trips():
+    urls = [f"https://example.com/{i}/café.jpg" for i in range(300)]
+    compact = CompactUrlList.from_urls(urls)
+
+    assert len(compact) == 300
+    assert compact.to_list() == urls
+    assert compact.nbytes < sum(len(url) for url in urls)
+
+
+def age_entry(cache_key, seconds):
+    cache_utils._cache[cache_utils._hash_key(cache_key)].created_at -= seconds
+
+
+def wait_for_refresh(cache_key):
+    deadline = time.monotonic() + 5
+    while is_refreshing(cache_key) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fresh_entry_is_served_without_refresh(memory_cache):
+    set_cached_result("k:page", ["https://example.com/old.jpg"])
+    calls = []
+
+    entry = get_or_refresh("k:page", lambda: calls.append(1) or ["https://example.com/new.jpg"])
+
+    assert entry.value == ["https://example.com/old.jpg"]
+    assert not entry.stale and not entry.refresh_due
+    assert calls == []
+
+
+def test_entry_near_expiry_is_refreshed_ahead(memory_cache):
+    set_cached_result("k:page", ["https://example.com/old.jpg"])
+    age_entry("k:page", cache_utils.DEFAULT_TTL * 0.9)
+
+    entry = get_or_refresh("k:page", lambda: ["https://example.com/new.jpg"])
+    wait_for_refresh("k:page")
+
+    assert entry.value == ["https://example.com/old.jpg"]
+    assert entry.refresh_due and not entry.stale
+    assert get_cached_result("k:page") == ["https://example.com/new.jpg"]
+    assert get_cached_entry("k:page").age < 5
+
+
+def test_expired_entry_is_served_stale_while_refreshing(memory_cache):
+    set_cached_result("k:page", ["https://example.com/old.jpg"])
+    age_entry("k:page", cache_utils.DEFAULT_TTL + 1)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return ["https://example.com/new.jpg"]
+
+    entry = get_or_refresh("k:page", fetch)
+
+    assert entry.stale and entry.value == ["https://example.com/old.jpg"]
+    assert get_cached_result("k:page") is None
+    release.set()
+    wait_for_refresh("k:page")
+    assert get_cached_result("k:page") == ["https://example.com/new.jpg"]
+
+
+def test_refreshes_are_deduplicated_per_key(memory_cache):
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["https://example.com/new.jpg"]
+
+    assert schedule_refresh("k:page", fetch)
+    assert not schedule_refresh("k:page", fetch)
+    assert schedule_refresh("k:other", fetch)
+    release.set()
+    wait_for_refresh("k:page")
+    wait_for_refresh("k:other")
+
+    assert len(calls) == 2
+
+
+def test_failed_refresh_keeps_stale_entry(memory_cache):
+    set_cached_result("k:page", ["https://example.com/old.jpg"])
+    age_entry("k:page", cache_utils.DEFAULT_TTL + 1)
+
+    def fetch():
+        raise ValueError("Request timeout")
+
+    get_or_refresh("k:page", fetch)
+    wait_for_refresh("k:page")
+
+    assert get_cached_entry("k:page").value == ["https://example.com/old.jpg"]
+    assert not is_refreshing("k:page")
+
+
+def test_promoted_entry_keeps_its_original_stale_deadline(disk_cache_path):
+    window = cache_utils._disk_cache.ttl + cache_utils._disk_cache.stale_ttl
+    conn = cache_utils._disk_cache._connection()
+    set_cached_result("k:page", ["https://example.com/a.jpg"])
+    conn.execute("UPDATE entries SET created_at = created_at - ?", (window - 10,))
+    cache_utils._cache.clear()
+
+    assert get_cached_entry("k:page").stale
+
+    age_entry("k:page", 20)
+    conn.execute("UPDATE entries SET created_at = created_at - 20")
+    assert get_cached_entry("k:page") is None
+
+
+def test_stale_window_ends_on_disk_tier(tmp_path):
+    cache = DiskCache(str(tmp_path / "stale.sqlite3"), ttl=10, stale_ttl=10)
+    cache.set("k", ["https://example.com/a.jpg"])
+    conn = cache._connection()
+    conn.execute("UPDATE entries SET created_at = created_at - 15")
+
+    assert cache.get("k") is None
+    assert cache.get_entry("k")[0] == ["https://example.com/a.jpg"]
+
+    conn.execute("UPDATE entries SET created_at = created_at - 10")
+    assert cache.get_entry("k") is None
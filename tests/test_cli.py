@@ -0,0 +1,122 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cli
+from cache_utils import clear_cache, configure_disk_cache
+
+
+@pytest.fixture
+def scrape_server(stub_server):
+    def handle(request):
+        url = request.json()["url"]
+        if "broken" in url:
+            return 500, {"success": False, "error": "boom"}
+        html = f'<img src="/{len(server.requests)}.jpg"><img src="/shared.png">'
+        return 200, {"success": True, "data": {"html": html}}
+
+    server = stub_server(handle)
+    return server
+
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    configure_disk_cache(None)
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def run_cli(monkeypatch, capsys, stdin_text, *args):
+    monkeypatch.setattr(sys, "stdin", io.StringIO(stdin_text))
+    code = cli.main(["--api-key", "fc-test-key", "--no-disk-cache", *args])
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    summary = json.loads(captured.err.strip().splitlines()[-1])["summary"]
+    return code, records, summary
+
+
+def test_cli_streams_one_record_per_page(monkeypatch, capsys, scrape_server):
+    code, records, summary = run_cli(
+        monkeypatch, capsys,
+        "https://a.test/\n\n# comment\nhttps://b.test/page\n",
+        "--base-url", scrape_server.url("/v2"), "--workers", "2"
+    )
+
+    assert code == 0
+    assert {record["url"] for record in records} == {"https://a.test/", "https://b.test/page"}
+    for record in records:
+        assert record["error"] is None
+        assert record["cached"] is False
+        assert record["count"] == 2
+        assert record["image_urls"][1] == f"https://{record['url'].split('/')[2]}/shared.png"
+    assert summary["pages"] == 2
+    assert summary["fetched"] == 2
+    assert summary["cache_hits"] == 0
+
+
+def test_cli_shares_cache_between_runs(monkeypatch, capsys, scrape_server):
+    run_cli(monkeypatch, capsys, "https://a.test/\n", "--base-url", scrape_server.url("/v2"))
+    code, records, summary = run_cli(monkeypatch, capsys, "https://a.test/\n", "--base-url", scrape_server.url("/v2"))
+
+    assert code == 0
+    assert [r.json()["url"] for r in scrape_server.requests] == ["https://a.test/"]
+    assert records[0]["cached"] is True
+    assert summary["cache_hits"] == 1
+    assert summary["fetched"] == 0
+
+
+def test_cli_reports_errors_per_page(monkeypatch, capsys, tmp_path, scrape_server):
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://broken.test/\nhttps://ok.test/\n")
+
+    code, records, summary = run_cli(monkeypatch, capsys, "", str(url_file), "--base-url", scrape_server.url("/v2"))
+
+    by_url = {record["url"]: record for record in records}
+    assert code == 1
+    assert "HTTP 500" in by_url["https://broken.test/"]["error"]
+    assert by_url["https://ok.test/"]["error"] is None
+    assert summary["errors"] == 1
+
+
+def test_cli_delta_mode_emits_changes(monkeypatch, capsys, tmp_path, scrape_server):
+    delta_path = str(tmp_path / "fingerprints.sqlite3")
+
+    run_cli(monkeypatch, capsys, "https://a.test/\n", "--base-url", scrape_server.url("/v2"), "--delta", delta_path)
+    code, records, summary = run_cli(
+        monkeypatch, capsys, "https://a.test/\n", "--base-url", scrape_server.url("/v2"), "--delta", delta_path
+    )
+
+    assert code == 0
+    assert [r.json()["url"] for r in scrape_server.requests] == ["https://a.test/", "https://a.test/"]
+    assert records[0]["added"] == ["https://a.test/2.jpg"]
+    assert records[0]["removed"] == ["https://a.test/1.jpg"]
+    assert records[0]["unchanged"] is False
+    assert records[0]["count"] == 2
+    assert summary["images"] == 1
+
+
+def test_cli_scrapes_repeated_urls_once(monkeypatch, capsys, scrape_server):
+    code, records, summary = run_cli(
+        monkeypatch, capsys,
+        "https://a.test/\nhttps://b.test/\nhttps://a.test/\n",
+        "--base-url", scrape_server.url("/v2"), "--workers", "2"
+    )
+
+    assert code == 0
+    assert sorted(record["url"] for record in records) == ["https://a.test/", "https://b.test/"]
+    assert len(scrape_server.requests) == 2
+    assert summary["pages"] == summary["fetched"] == 2
+
+
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_cli_rejects_non_positive_workers(monkeypatch, capsys, value):
+    with pytest.raises(SystemExit) as exc:
+        run_cli(monkeypatch, capsys, "https://a.test/\n", "--workers", value)
+
+    assert exc.value.code == 2
+    assert "positive integer" in capsys.readouterr().err
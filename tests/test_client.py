@@ -0,0 +1,248 @@
+import threading
+import time
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cache_utils
+from cache_utils import clear_cache, get_cached_validation
+from firecrawl_client import FirecrawlClient, validate_api_key, validate_api_key_async
+
+
+class FakeClient(FirecrawlClient):
+    def __init__(self, delay: float = 0.01):
+        super().__init__("fc-test")
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def scrape_images(self, url, timeout=30):
+        host = url.split("/")[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        try:
+            time.sleep(self.delay)
+            if "bad" in url:
+                raise ValueError("429 Too Many Requests: Rate limit exceeded")
+            return [f"{url}/image.jpg"]
+        finally:
+            with self.lock:
+                self.active[host] -= 1
+
+
+def test_scrape_many_yields_every_url():
+    client = FakeClient()
+    urls = [f"https://site{i % 3}.com/page{i}" for i in range(12)]
+
+    results = dict(client.scrape_images_many(urls, max_workers=4))
+
+    assert set(results) == set(urls)
+    assert results[urls[0]] == [f"{urls[0]}/image.jpg"]
+
+
+def test_scrape_many_isolates_errors_per_url():
+    client = FakeClient()
+    urls = ["https://a.com/ok", "https://a.com/bad", "https://b.com/ok"]
+
+    results = dict(client.scrape_images_many(urls))
+
+    assert isinstance(results["https://a.com/bad"], ValueError)
+    assert "429" in str(results["https://a.com/bad"])
+    assert results["https://a.com/ok"] == ["https://a.com/ok/image.jpg"]
+    assert results["https://b.com/ok"] == ["https://b.com/ok/image.jpg"]
+
+
+def test_scrape_many_respects_per_host_limit():
+    client = FakeClient(delay=0.02)
+    urls = [f"https://same.com/p{i}" for i in range(8)] + [f"https://other.com/p{i}" for i in range(8)]
+
+    list(client.scrape_images_many(urls, max_workers=8, per_host_limit=2))
+
+    assert client.peak["same.com"] <= 2
+    assert client.peak["other.com"] <= 2
+
+
+def test_scrape_many_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        list(FakeClient().scrape_images_many(["https://a.com"], max_workers=0))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr("firecrawl_client.time.sleep", recorded.append)
+    return recorded
+
+
+def test_retry_honors_retry_after(sleeps, make_response, make_session, scrape_response):
+    session = make_session([make_response(429, headers={"Retry-After": "2"}), scrape_response()])
+    client = FirecrawlClient("fc-test", session=session)
+
+    assert client.scrape_images("https://example.com") == ["https://example.com/a.jpg"]
+    assert session.calls == 2
+    assert sleeps == [2.0]
+
+
+def test_retry_uses_jittered_backoff_on_503(sleeps, make_response, make_session, scrape_response):
+    session = make_session([make_response(503), make_response(503), scrape_response()])
+    client = FirecrawlClient("fc-test", session=session, backoff_base=1.0)
+
+    client.scrape_images("https://example.com")
+
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0
+    assert 0 <= sleeps[1] <= 2.0
+
+
+def test_retry_gives_up_after_max_retries(sleeps, make_response, make_session):
+    session = make_session([make_response(429)] * 3)
+    client = FirecrawlClient("fc-test", session=session, max_retries=2)
+
+    with pytest.raises(ValueError, match="429"):
+        client.scrape_images("https://example.com")
+    assert session.calls == 3
+
+
+def test_retry_stops_when_deadline_budget_is_spent(sleeps, make_response, make_session, scrape_response):
+    session = make_session([make_response(429, headers={"Retry-After": "120"}), scrape_response()])
+    client = FirecrawlClient("fc-test", session=session, retry_deadline=10)
+
+    with pytest.raises(ValueError, match="429"):
+        client.scrape_images("https://example.com")
+    assert session.calls == 1
+    assert sleeps == []
+
+
+def test_unauthorized_is_not_retried(sleeps, make_response, make_session):
+    session = make_session([make_response(401)])
+    client = FirecrawlClient("fc-test", session=session)
+
+    with pytest.raises(ValueError, match="401"):
+        client.scrape_images("https://example.com")
+    assert session.calls == 1
+
+
+def test_scrape_streams_the_response(sleeps, make_session, scrape_response):
+    session = make_session([scrape_response()])
+    FirecrawlClient("fc-test", session=session).scrape_images("https://example.com")
+
+    assert session.kwargs["stream"] is True
+
+
+def test_response_over_cap_is_rejected_from_content_length(sleeps, make_response, make_session):
+    response = make_response(200, {"success": True, "data": {"html": "x"}}, headers={"Content-Length": "5000"})
+    client = FirecrawlClient("fc-test", session=make_session([response]), max_response_bytes=1000)
+
+    with pytest.raises(ValueError, match="too large"):
+        client.scrape_images("https://example.com")
+
+
+def test_response_over_cap_is_aborted_while_streaming(sleeps, make_session, scrape_response):
+    response = scrape_response(html='<img src="/a.jpg">' * 1000)
+    client = FirecrawlClient("fc-test", session=make_session([response]), max_response_bytes=1000)
+
+    with pytest.raises(ValueError, match="too large"):
+        client.scrape_images("https://example.com")
+
+
+def test_error_body_is_read_under_a_small_cap(sleeps, make_response, make_session):
+    response = make_response(502, {"success": False, "error": "x" * 100000})
+    client = FirecrawlClient("fc-test", session=make_session([response]), max_retries=0)
+
+    with pytest.raises(ValueError, match="HTTP 502: {\"success\": false"):
+        client.scrape_images("https://example.com")
+    assert response.bytes_read <= 8192
+
+
+def test_crawl_creation_is_only_retried_when_never_sent(sleeps, make_response, make_session):
+    refused = requests.ConnectionError(MaxRetryError(None, "/crawl", NewConnectionError(None, "Connection refused")))
+    aborted = requests.ConnectionError(ProtocolError("Connection aborted."))
+    created = make_response(200, {"success": True, "id": "job-1"})
+
+    session = make_session([refused, make_response(429), created])
+    assert FirecrawlClient("fc-test", session=session).crawl_images("https://example.com").job_id == "job-1"
+    assert session.calls == 3
+
+    for failure in (aborted, make_response(503)):
+        session = make_session([failure, created])
+        with pytest.raises(ValueError):
+            FirecrawlClient("fc-test", session=session).crawl_images("https://example.com")
+        assert session.calls == 1
+
+
+def test_scrape_decodes_without_orjson(sleeps, monkeypatch, make_session, scrape_response):
+    monkeypatch.setattr("firecrawl_client.orjson", None)
+    client = FirecrawlClient("fc-test", session=make_session([scrape_response()]))
+
+    assert client.scrape_images("https://example.com") == ["https://example.com/a.jpg"]
+
+
+@pytest.mark.parametrize("status, expected", [
+    (200, (True, "Connection successful")),
+    (401, (False, "Invalid API key")),
+    (429, (True, "API key valid (rate limited)")),
+])
+def test_check_api_key_uses_credit_usage_endpoint(status, expected, make_response, make_session):
+    session = make_session([make_response(status)])
+    client = FirecrawlClient("fc-test", session=session)
+
+    assert client.check_api_key() == expected
+    assert session.kwargs["url"].endswith("/team/credit-usage")
+
+
+@pytest.fixture
+def validation_cache(monkeypatch):
+    clear_cache()
+    calls = []
+
+    def fake_check(self, timeout=5):
+        calls.append(self.api_key)
+        if self.api_key == "fc-offline":
+            raise ValueError("Connection failed")
+        return (self.api_key == "fc-good", "Connection successful" if self.api_key == "fc-good" else "Invalid API key")
+
+    monkeypatch.setattr(FirecrawlClient, "check_api_key", fake_check)
+    yield calls
+    clear_cache()
+
+
+def test_validation_is_cached_process_wide(validation_cache):
+    assert validate_api_key("fc-good") == (True, "Connection successful")
+    assert validate_api_key("fc-good") == (True, "Connection successful")
+    assert validate_api_key("fc-bad") == (False, "Invalid API key")
+    assert validate_api_key("fc-bad") == (False, "Invalid API key")
+
+    assert validation_cache == ["fc-good", "fc-bad"]
+    assert get_cached_validation("fc-good") == (True, "Connection successful")
+
+
+def test_invalid_keys_use_their_own_ttl(validation_cache, monkeypatch):
+    monkeypatch.setattr(cache_utils, "INVALID_KEY_TTL", -1)
+
+    validate_api_key("fc-good")
+    validate_api_key("fc-bad")
+    validate_api_key("fc-good")
+    validate_api_key("fc-bad")
+
+    assert validation_cache == ["fc-good", "fc-bad", "fc-bad"]
+
+
+def test_connection_failures_are_not_cached(validation_cache):
+    assert validate_api_key("fc-offline") == (False, "Connection failed")
+    assert validate_api_key("fc-offline") == (False, "Connection failed")
+
+    assert validation_cache == ["fc-offline", "fc-offline"]
+
+
+def test_async_validation_runs_in_background(validation_cache):
+    future = validate_api_key_async("fc-good")
+
+    assert future.result(timeout=5) == (True, "Connection successful")
+    assert validate_api_key_async("fc-good").result(timeout=0) == (True, "Connection successful")
+    assert validation_cache == ["fc-good"]
@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from firecrawl_client import CRAWL_SECONDS_PER_PAGE, DEFAULT_CRAWL_MAX_WAIT, FirecrawlClient, crawl_max_wait
+
+
+PAGES = [
+    {"html": '<img src="/logo.png"><img src="/home.jpg">', "metadata": {"sourceURL": "https://site.test/"}},
+    {"html": '<img src="/logo.png"><img src="/a.jpg">', "metadata": {"sourceURL": "https://site.test/a"}},
+    {"html": '<img src="/logo.png"><img src="b.jpg">', "metadata": {"sourceURL": "https://site.test/b/"}},
+    {"html": "<p>no images</p>", "metadata": {"sourceURL": "https://site.test/c"}},
+    {"html": '<img src="/a.jpg"><img src="/d.webp">', "metadata": {"sourceURL": "https://site.test/d"}},
+]
+
+
+@pytest.fixture
+def crawl_server(stub_server):
+    def start(pages, page_size=2, pages_per_poll=2, fail=False):
+        available = 0
+
+        def handle(request):
+            nonlocal available
+            if request.method == "POST":
+                if request.headers.get("Authorization") != "Bearer fc-test":
+                    return 401, {"success": False, "error": "Unauthorized"}
+                return 200, {"success": True, "id": "job-1", "url": server.url("/v2/crawl/job-1")}
+
+            parsed = urlparse(request.path)
+            if parsed.path != "/v2/crawl/job-1":
+                return 404, {"success": False, "error": "Not found"}
+            if fail:
+                return 200, {"success": True, "status": "failed", "data": []}
+
+            available = min(len(pages), available + pages_per_poll)
+            skip = int(parse_qs(parsed.query).get("skip", ["0"])[0])
+            end = min(available, skip + page_size)
+            return 200, {
+                "success": True,
+                "status": "completed" if available == len(pages) else "scraping",
+                "completed": available,
+                "total": len(pages),
+                "data": pages[skip:end],
+                "next": server.url(f"/v2/crawl/job-1?skip={end}") if end < available else None,
+            }
+
+        server = stub_server(handle)
+        return server
+
+    return start
+
+
+def make_client(server, api_key="fc-test"):
+    return FirecrawlClient(api_key, base_url=server.url("/v2"), pool_size=2)
+
+
+def test_crawl_yields_pages_incrementally_with_global_dedupe(crawl_server):
+    server = crawl_server(PAGES)
+    crawl = make_client(server).crawl_images("https://site.test/", limit=10, max_depth=3, poll_interval=0)
+    pages = list(crawl)
+
+    assert [page.url for page in pages] == [p["metadata"]["sourceURL"] for p in PAGES]
+    assert pages[1].image_urls == ["https://site.test/logo.png", "https://site.test/a.jpg"]
+    assert pages[1].new_image_urls == ["https://site.test/a.jpg"]
+    assert pages[2].image_urls == ["https://site.test/logo.png", "https://site.test/b/b.jpg"]
+    assert pages[3].image_urls == []
+    assert crawl.image_urls == [
+        "https://site.test/logo.png",
+        "https://site.test/home.jpg",
+        "https://site.test/a.jpg",
+        "https://site.test/b/b.jpg",
+        "https://site.test/d.webp",
+    ]
+    assert crawl.status == "completed"
+    assert (crawl.completed, crawl.total) == (5, 5)
+    assert [r.json() for r in server.requests if r.method == "POST"] == [{
+        "url": "https://site.test/",
+        "limit": 10,
+        "maxDiscoveryDepth": 3,
+        "scrapeOptions": {"formats": ["html"]},
+    }]
+
+
+def test_crawl_reports_progress_while_running(crawl_server):
+    server = crawl_server(PAGES, page_size=1, pages_per_poll=1)
+    crawl = make_client(server).crawl_images("https://site.test/", poll_interval=0)
+    first = next(iter(crawl))
+
+    assert first.url == "https://site.test/"
+    assert first.completed == 1
+    assert first.total == 5
+
+
+def test_crawl_failure_raises_value_error(crawl_server):
+    server = crawl_server(PAGES, fail=True)
+    crawl = make_client(server).crawl_images("https://site.test/", poll_interval=0)
+    with pytest.raises(ValueError, match="Crawl failed"):
+        list(crawl)
+
+
+def test_crawl_maps_unauthorized(crawl_server):
+    server = crawl_server(PAGES)
+    with pytest.raises(ValueError, match="401"):
+        make_client(server, api_key="fc-wrong").crawl_images("https://site.test/")
+
+
+def test_crawl_timeout_keeps_pages_collected_so_far(crawl_server):
+    server = crawl_server(PAGES, pages_per_poll=1)
+    crawl = make_client(server).crawl_images("https://site.test/", poll_interval=0.03, max_wait=0.05)
+    pages = list(crawl)
+
+    assert crawl.timed_out
+    assert 0 < len(pages) < len(PAGES)
+    assert crawl.image_urls[:2] == ["https://site.test/logo.png", "https://site.test/home.jpg"]
+
+
+def test_crawl_max_wait_scales_with_page_limit():
+    assert crawl_max_wait(50) == DEFAULT_CRAWL_MAX_WAIT
+    assert crawl_max_wait(10000) == 10000 * CRAWL_SECONDS_PER_PAGE
@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from asset_discovery import StylesheetCache
+from delta_store import FingerprintStore, ImageDelta, diff_image_urls
+from firecrawl_client import FirecrawlClient
+
+
+class FakePageClient(FirecrawlClient):
+    def __init__(self, pages):
+        super().__init__("fc-test-key", session=object())
+        self.pages = pages
+        self.extractions = 0
+
+    def _scrape_html(self, url, timeout):
+        return self.pages[url]
+
+    def _extract(self, url, html_content):
+        self.extractions += 1
+        return super()._extract(url, html_content)
+
+
+@pytest.fixture
+def store(tmp_path):
+    fingerprints = FingerprintStore(str(tmp_path / "fingerprints.sqlite3"))
+    yield fingerprints
+    fingerprints.close()
+
+
+def test_diff_image_urls():
+    added, removed = diff_image_urls(["a", "b", "c"], ["d", "b", "a", "e"])
+
+    assert added == ["d", "e"]
+    assert removed == ["c"]
+
+
+def test_first_update_reports_everything_added(store):
+    delta = store.update("https://example.com/", "h1", "1", lambda: ["x", "y"])
+
+    assert delta == ImageDelta("https://example.com/", ["x", "y"], [], False, 2)
+    assert store.get("https://example.com/").urls == ["x", "y"]
+
+
+def test_unchanged_html_skips_extraction(store):
+    store.update("https://example.com/", "h1", "1", lambda: ["x", "y"])
+
+    def fail():
+        raise AssertionError("extraction should be skipped")
+
+    delta = store.update("https://example.com/", "h1", "1", fail)
+
+    assert delta == ImageDelta("https://example.com/", [], [], True, 2)
+
+
+def test_extractor_version_change_reextracts(store):
+    store.update("https://example.com/", "h1", "1", lambda: ["x"])
+    delta = store.update("https://example.com/", "h1", "2", lambda: ["x", "z"])
+
+    assert delta.unchanged is False
+    assert delta.added == ["z"]
+
+
+def test_fingerprints_persist_across_instances(tmp_path):
+    path = str(tmp_path / "fingerprints.sqlite3")
+    first = FingerprintStore(path)
+    first.update("https://example.com/", "h1", "1", lambda: ["x"])
+    first.close()
+
+    second = FingerprintStore(path)
+    try:
+        assert second.get("https://example.com/").html_hash == "h1"
+        second.delete("https://example.com/")
+        assert second.get("https://example.com/") is None
+    finally:
+        second.close()
+
+
+def test_client_delta_returns_only_changes(store):
+    client = FakePageClient({"https://example.com/": '<img src="/a.jpg"><img src="/b.jpg">'})
+
+    first = client.scrape_image_delta("https://example.com/", store)
+    again = client.scrape_image_delta("https://example.com/", store)
+    client.pages["https://example.com/"] = '<img src="/b.jpg"><img src="/c.jpg">'
+    changed = client.scrape_image_delta("https://example.com/", store)
+
+    assert first.added == ["https://example.com/a.jpg", "https://example.com/b.jpg"]
+    assert again.unchanged is True
+    assert changed.added == ["https://example.com/c.jpg"]
+    assert changed.removed == ["https://example.com/a.jpg"]
+    assert client.extractions == 2
+
+
+def test_enabling_stylesheets_reextracts_unchanged_html(store):
+    client = FakePageClient({"https://example.com/": '<img src="/a.jpg">'})
+    client.scrape_image_delta("https://example.com/", store)
+
+    client.stylesheet_cache = StylesheetCache(session=object())
+    delta = client.scrape_image_delta("https://example.com/", store)
+
+    assert delta.unchanged is False
+    assert client.extractions == 2
+
+
+def test_stylesheet_changes_are_reported_for_unchanged_html(store):
+    client = FakePageClient({"https://example.com/": '<link rel="stylesheet" href="/site.css"><img src="/a.jpg">'})
+    client.stylesheet_cache = SimpleNamespace(image_urls_many=lambda urls: ["https://example.com/v1.jpg"])
+    client.scrape_image_delta("https://example.com/", store)
+
+    client.stylesheet_cache = SimpleNamespace(image_urls_many=lambda urls: ["https://example.com/v2.jpg"])
+    delta = client.scrape_image_delta("https://example.com/", store)
+
+    assert delta.added == ["https://example.com/v2.jpg"]
+    assert delta.removed == ["https://example.com/v1.jpg"]
+
+
+def test_batch_delta_mode(store):
+    client = FakePageClient({"https://a.test/": '<img src="/a.jpg">', "https://b.test/": ""})
+
+    results = dict(client.scrape_images_many(list(client.pages), delta_store=store))
+
+    assert results["https://a.test/"].added == ["https://a.test/a.jpg"]
+    assert results["https://b.test/"].total == 0
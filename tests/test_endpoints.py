@@ -0,0 +1,180 @@
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from endpoints import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, EndpointError, EndpointRouter, get_router, parse_endpoints
+from firecrawl_client import FirecrawlClient, validate_api_key
+
+
+@pytest.fixture
+def firecrawl(stub_server):
+    def start(latency=0.0, status=200):
+        def handle(request):
+            time.sleep(latency)
+            if status != 200:
+                return status, {"success": False, "error": "boom"}
+            if request.path.endswith("/team/credit-usage"):
+                return 200, {"success": True, "data": {"remaining_credits": 100}}
+            if request.path.endswith("/crawl"):
+                return 200, {"success": True, "id": f"crawl-{server.port}"}
+            return 200, {"success": True, "data": {"html": f'<img src="/{server.port}.jpg">', "url": request.json()["url"]}}
+
+        server = stub_server(handle)
+        return server
+
+    return start
+
+
+def unused_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v2"
+
+
+def make_client(router):
+    return FirecrawlClient("fc-test-key", pool_size=4, max_retries=0, endpoints=router)
+
+
+def test_parse_endpoints_with_optional_keys():
+    endpoints = parse_endpoints(" http://fc-1:3002/v2/ , https://api.firecrawl.dev/v2|fc-hosted,")
+
+    assert [(e.url, e.api_key) for e in endpoints] == [
+        ("http://fc-1:3002/v2", None),
+        ("https://api.firecrawl.dev/v2", "fc-hosted"),
+    ]
+    assert get_router("") is None
+    assert get_router("http://a/v2,http://b/v2") is get_router("http://a/v2, http://b/v2")
+
+
+def test_router_prefers_fewest_outstanding_at_equal_latency():
+    router = EndpointRouter(["http://a/v2", "http://b/v2"])
+    a, b = router.endpoints
+    router.release(router.acquire([b]), 0.1)
+    router.release(router.acquire([a]), 0.1)
+
+    first = router.acquire()
+    second = router.acquire()
+
+    assert {first, second} == {a, b}
+
+
+def test_routes_most_traffic_to_the_faster_endpoint(firecrawl):
+    slow = firecrawl(latency=0.08)
+    fast = firecrawl()
+    client = make_client(EndpointRouter([slow.url("/v2"), fast.url("/v2")]))
+    for i in range(12):
+        assert client.scrape_images(f"https://example.com/{i}")
+
+    assert len(slow.requests) == 1
+    assert len(fast.requests) == 11
+
+
+def test_failed_scrape_fails_over_and_breaker_ejects_endpoint(firecrawl):
+    broken = firecrawl(status=500)
+    healthy = firecrawl()
+    router = EndpointRouter([broken.url("/v2"), healthy.url("/v2")], failure_threshold=2, cooldown=60)
+    client = make_client(router)
+    for i in range(5):
+        assert client.scrape_images(f"https://example.com/{i}") == [f"https://example.com/{healthy.port}.jpg"]
+
+    assert len(broken.requests) == 2
+    assert len(healthy.requests) == 5
+    assert [row["state"] for row in router.stats()] == [STATE_OPEN, STATE_CLOSED]
+
+
+def test_unreachable_endpoint_fails_over(firecrawl):
+    healthy = firecrawl()
+    router = EndpointRouter([unused_url(), healthy.url("/v2")], failure_threshold=1)
+    client = make_client(router)
+
+    assert client.scrape_images("https://example.com/")
+    assert client.scrape_images("https://example.com/")
+
+    assert len(healthy.requests) == 2
+    assert router.stats()[0]["errors"] == 1
+
+
+def test_rate_limited_endpoint_fails_over_without_ejection(firecrawl):
+    limited = firecrawl(status=429)
+    healthy = firecrawl()
+    router = EndpointRouter([limited.url("/v2"), healthy.url("/v2")], failure_threshold=1)
+    client = make_client(router)
+
+    assert client.scrape_images("https://example.com/")
+
+    assert len(limited.requests) == 1
+    assert router.stats()[0]["state"] == STATE_CLOSED
+
+
+def test_error_surfaces_when_every_endpoint_fails(firecrawl):
+    a = firecrawl(status=502)
+    b = firecrawl(status=500)
+    client = make_client(EndpointRouter([a.url("/v2"), b.url("/v2")]))
+
+    with pytest.raises(EndpointError, match="HTTP 50"):
+        client.scrape_images("https://example.com/")
+
+    assert len(a.requests) + len(b.requests) == 2
+
+
+def test_each_endpoint_uses_its_own_key(firecrawl):
+    self_hosted = firecrawl(status=500)
+    hosted = firecrawl()
+    client = make_client(EndpointRouter([self_hosted.url("/v2"), (hosted.url("/v2"), "fc-hosted-key")]))
+    client.scrape_images("https://example.com/")
+
+    assert [r.headers["Authorization"] for r in self_hosted.requests] == ["Bearer fc-test-key"]
+    assert [r.headers["Authorization"] for r in hosted.requests] == ["Bearer fc-hosted-key"]
+
+
+def test_half_open_endpoint_gets_one_probe_after_cooldown():
+    router = EndpointRouter(["http://a/v2", "http://b/v2"], failure_threshold=1, cooldown=0.05)
+    a, b = router.endpoints
+    router.release(router.acquire(), 0.01, EndpointError("Network error"))
+    assert a.state == STATE_OPEN
+    assert router.acquire() is b
+
+    time.sleep(0.06)
+    assert router.acquire([b]) is a and a.state == STATE_HALF_OPEN
+    assert router.acquire() is b
+
+    router.release(a, 0.01)
+    assert a.state == STATE_CLOSED
+
+
+def test_crawl_creation_does_not_fail_over_after_server_error(firecrawl):
+    broken = firecrawl(status=503)
+    healthy = firecrawl()
+    client = FirecrawlClient("fc-test-key", max_retries=3, endpoints=EndpointRouter([broken.url("/v2"), healthy.url("/v2")]))
+
+    with pytest.raises(EndpointError, match="HTTP 503"):
+        client.crawl_images("https://example.com/")
+
+    assert len(broken.requests) == 1
+    assert len(healthy.requests) == 0
+
+
+def test_crawl_creation_fails_over_when_never_sent(firecrawl):
+    healthy = firecrawl()
+    client = make_client(EndpointRouter([unused_url(), healthy.url("/v2")]))
+
+    crawl = client.crawl_images("https://example.com/")
+
+    assert crawl.job_id == f"crawl-{healthy.port}"
+    assert len(healthy.requests) == 1
+
+
+def test_key_validation_goes_through_the_router(firecrawl):
+    router = EndpointRouter([unused_url(), firecrawl().url("/v2")], failure_threshold=1)
+
+    assert validate_api_key("fc-router-key", endpoints=router) == (True, "Connection successful")
+
+    unreachable, healthy = router.stats()
+    assert unreachable["state"] == STATE_OPEN
+    assert healthy["requests"] == 1
+    assert healthy["ewma_ms"] is not None
@@ -6,7 +6,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from firecrawl_client import extract_image_urls_from_html
 
 
-def test_extract_basic_img_src():
+def test_extract_basic_img_src(engine):
     html = '''
     <html>
         <body>
@@ -16,14 +16,14 @@ def test_extract_basic_img_src():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/image1.jpg" in urls
     assert "https://example.com/image2.png" in urls
     assert len(urls) == 2
 
 
-def test_extract_data_src_attributes():
+def test_extract_data_src_attributes(engine):
     html = '''
     <html>
         <body>
@@ -33,14 +33,14 @@ def test_extract_data_src_attributes():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/lazy-image.jpg" in urls
     assert "https://example.com/another-lazy.png" in urls
     assert len(urls) == 2
 
 
-def test_extract_srcset_first_url():
+def test_extract_srcset_first_url(engine):
     html = '''
     <html>
         <body>
@@ -50,14 +50,14 @@ def test_extract_srcset_first_url():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/small.jpg" in urls
     assert "https://example.com/webp-image.webp" in urls
     assert len(urls) == 2
 
 
-def test_extract_inline_style_backgrounds():
+def test_extract_inline_style_backgrounds(engine):
     html = '''
     <html>
         <body>
@@ -67,14 +67,14 @@ def test_extract_inline_style_backgrounds():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/bg-image.jpg" in urls
     assert "https://example.com/pattern.png" in urls
     assert len(urls) == 2
 
 
-def test_extract_data_bg_attributes():
+def test_extract_data_bg_attributes(engine):
     html = '''
     <html>
         <body>
@@ -84,14 +84,14 @@ def test_extract_data_bg_attributes():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/hero-bg.jpg" in urls
     assert "https://example.com/section-bg.png" in urls
     assert len(urls) == 2
 
 
-def test_deduplicate_urls():
+def test_deduplicate_urls(engine):
     html = '''
     <html>
         <body>
@@ -102,13 +102,13 @@ def test_deduplicate_urls():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/duplicate.jpg" in urls
     assert len(urls) == 1
 
 
-def test_ignore_data_urls():
+def test_ignore_data_urls(engine):
     html = '''
     <html>
         <body>
@@ -118,14 +118,14 @@ def test_ignore_data_urls():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/real-image.jpg" in urls
     assert len(urls) == 1
     assert not any("data:" in url for url in urls)
 
 
-def test_ignore_javascript_urls():
+def test_ignore_javascript_urls(engine):
     html = '''
     <html>
         <body>
@@ -135,19 +135,19 @@ def test_ignore_javascript_urls():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert "https://example.com/valid-image.png" in urls
     assert len(urls) == 1
     assert not any("javascript:" in url for url in urls)
 
 
-def test_handle_empty_html():
-    urls = extract_image_urls_from_html("", "https://example.com")
+def test_handle_empty_html(engine):
+    urls = extract_image_urls_from_html("", "https://example.com", engine=engine)
     assert urls == []
 
 
-def test_handle_no_images():
+def test_handle_no_images(engine):
     html = '''
     <html>
         <body>
@@ -157,11 +157,11 @@ def test_handle_no_images():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
     assert urls == []
 
 
-def test_preserve_order():
+def test_preserve_order(engine):
     html = '''
     <html>
         <body>
@@ -172,14 +172,14 @@ def test_preserve_order():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     assert urls[0] == "https://example.com/first.jpg"
     assert urls[1] == "https://example.com/second.jpg"
     assert urls[2] == "https://example.com/third.jpg"
 
 
-def test_complex_real_world_example():
+def test_complex_real_world_example(engine):
     html = '''
     <html>
         <body>
@@ -195,7 +195,7 @@ def test_complex_real_world_example():
     </html>
     '''
     base_url = "https://example.com"
-    urls = extract_image_urls_from_html(html, base_url)
+    urls = extract_image_urls_from_html(html, base_url, engine=engine)
 
     expected_urls = {
         "https://example.com/logo.svg",
@@ -206,4 +206,17 @@ def test_complex_real_world_example():
         "https://example.com/section-bg.jpg"
     }
 
-    assert set(urls) == expected_urls
\ No newline at end of file
+    assert set(urls) == expected_urls
+
+
+def test_unknown_engine_rejected():
+    with pytest.raises(ValueError):
+        extract_image_urls_from_html('<img src="/a.jpg">', "https://example.com", engine="regex")
+
+
+def test_extract_from_bytes_matches_str(engine):
+    html = '<img src="/café.jpg"><div style="background: url(/bg.png)"></div>' * 5000
+    base_url = "https://example.com"
+
+    assert extract_image_urls_from_html(html.encode("utf-8"), base_url, engine=engine) == \
+        extract_image_urls_from_html(html, base_url, engine=engine)
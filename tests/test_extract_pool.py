@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from extract_pool import ExtractionPool
+from firecrawl_client import FirecrawlClient, extract_image_urls_from_html
+from metrics import metrics
+from srcset import SelectionPolicy
+
+PAGE = '<img src="/a.jpg"><img srcset="/b.jpg 1x, /b@2x.jpg 2x">' + "<p>filler</p>" * 200
+
+
+@pytest.fixture(scope="module")
+def pool():
+    extraction_pool = ExtractionPool(max_workers=2, threshold=1024)
+    yield extraction_pool
+    extraction_pool.shutdown()
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_large_pages_are_offloaded(pool, enabled_metrics):
+    urls = pool.extract(PAGE, "https://example.com")
+
+    assert urls == extract_image_urls_from_html(PAGE, "https://example.com")
+    assert enabled_metrics.counter("extractions_total", mode="pool") == 1
+
+
+def test_small_pages_stay_inline(pool, enabled_metrics):
+    assert pool.extract('<img src="/a.jpg">', "https://example.com") == ["https://example.com/a.jpg"]
+    assert enabled_metrics.counter("extractions_total", mode="inline") == 1
+
+
+def test_policy_is_applied_in_workers(pool):
+    assert pool.extract(PAGE, "https://example.com", SelectionPolicy("largest")) == [
+        "https://example.com/a.jpg",
+        "https://example.com/b@2x.jpg",
+    ]
+
+
+def test_unpicklable_policy_runs_inline(pool, enabled_metrics):
+    policy = SelectionPolicy("largest", media=lambda media: True)
+
+    assert pool.extract(PAGE, "https://example.com", policy)[0] == "https://example.com/a.jpg"
+    assert enabled_metrics.counter("extractions_total", mode="inline") == 1
+
+
+def test_extract_assets_returns_stylesheet_links(pool):
+    page = '<link rel="stylesheet" href="/site.css">' + PAGE
+
+    assert pool.extract_assets(page, "https://example.com") == (
+        ["https://example.com/a.jpg", "https://example.com/b.jpg"],
+        ["https://example.com/site.css"],
+    )
+    assert pool.extract_assets("", "https://example.com") == ([], [])
+
+
+def test_extract_many_keeps_input_order(pool):
+    pages = [(PAGE, "https://a.test"), ("", "https://b.test"), ('<img src="/c.jpg">', "https://c.test")]
+
+    assert list(pool.extract_many(pages)) == [
+        ["https://a.test/a.jpg", "https://a.test/b.jpg"],
+        [],
+        ["https://c.test/c.jpg"],
+    ]
+
+
+def test_client_uses_the_pool(pool, enabled_metrics):
+    class PageClient(FirecrawlClient):
+        def _scrape_html(self, url, timeout):
+            return PAGE
+
+    client = PageClient("fc-test-key", session=object(), extraction_pool=pool)
+
+    assert client.scrape_images("https://example.com") == ["https://example.com/a.jpg", "https://example.com/b.jpg"]
+    assert enabled_metrics.counter("extractions_total", mode="pool") == 1
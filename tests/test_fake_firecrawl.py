@@ -0,0 +1,69 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+from bench_load import percentile, run_load
+from cache_utils import clear_cache, configure_disk_cache
+from fake_firecrawl import FakeFirecrawl, parse_latency
+from firecrawl_client import FirecrawlClient
+
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    configure_disk_cache(None)
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def test_parse_latency_specs():
+    assert parse_latency("fixed:20")(None) == 0.02
+    assert 0.01 <= parse_latency("uniform:10:30")(random.Random(1)) <= 0.03
+    with pytest.raises(ValueError, match="Invalid latency spec"):
+        parse_latency("lognormal:300")
+
+
+def test_fake_serves_synthetic_pages_and_key_checks():
+    with FakeFirecrawl(page_kb=[4], tags=5) as fake:
+        client = FirecrawlClient("fc-test-key", base_url=fake.base_url)
+
+        assert client.check_api_key() == (True, "Connection successful")
+        assert len(client.scrape_images("https://example.com/a/")) >= 5
+        assert FirecrawlClient("", base_url=fake.base_url).check_api_key() == (False, "No API key provided")
+
+    assert fake.statuses == {200: 2}
+
+
+def test_fake_injects_rate_limits_and_server_errors():
+    with FakeFirecrawl(rate_limit_rate=1.0, retry_after=0) as limited, FakeFirecrawl(error_rate=1.0) as broken:
+        with pytest.raises(ValueError, match="429"):
+            FirecrawlClient("fc-test-key", base_url=limited.base_url, max_retries=1).scrape_images("https://example.com/")
+        with pytest.raises(ValueError, match="HTTP 50"):
+            FirecrawlClient("fc-test-key", base_url=broken.base_url, max_retries=0).scrape_images("https://example.com/")
+
+    assert limited.statuses == {429: 2}
+
+
+def test_load_driver_reports_percentiles_and_cache_hits():
+    with FakeFirecrawl(latency=parse_latency("fixed:5"), page_kb=[2], tags=3) as fake:
+        client = FirecrawlClient("fc-test-key", base_url=fake.base_url, pool_size=4)
+        report = run_load(client, requests=40, unique=5, concurrency=4)
+
+    assert fake.statuses == {200: 5}
+    assert report["outcomes"]["fetched"] + report["outcomes"]["cached"] == 40
+    assert report["error_rate"] == 0.0
+    latency = report["latency"]["all"]
+    assert latency["count"] == 40
+    assert latency["p50_ms"] <= latency["p95_ms"] <= latency["p99_ms"] <= latency["max_ms"]
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,100 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import firecrawl_client
+from firecrawl_client import EXTRACTOR_VERSION, FirecrawlClient, extract_with_store, reextract_stored_pages
+from html_store import HtmlStore
+from srcset import SelectionPolicy
+
+
+PAGE = '<html><body>' + '<img src="/a.jpg">' * 200 + '<img src="/b.png"></body></html>'
+
+
+class FakeStylesheets:
+    def __init__(self, image_urls):
+        self.image_urls = image_urls
+
+    def image_urls_many(self, urls):
+        return [image_url for url in urls for image_url in self.image_urls]
+
+
+def test_store_round_trips_compressed_html(tmp_path):
+    store = HtmlStore(str(tmp_path))
+    digest = store.put("https://example.com", PAGE)
+
+    assert store.get(digest) == PAGE
+    object_files = [f for _, _, files in os.walk(tmp_path / "objects") for f in files]
+    assert len(object_files) == 1
+    assert os.path.getsize(next((tmp_path / "objects").rglob("*.zlib"))) < len(PAGE)
+
+
+def test_store_deduplicates_identical_content(tmp_path):
+    store = HtmlStore(str(tmp_path))
+    first = store.put("https://example.com", PAGE, fetched_at=1.0)
+    second = store.put("https://example.com", PAGE, fetched_at=2.0)
+
+    assert first == second
+    assert len(list((tmp_path / "objects").rglob("*.zlib"))) == 1
+    assert store.history("https://example.com") == [(first, 1.0), (first, 2.0)]
+    assert store.latest("https://example.com") == (first, 2.0)
+
+
+def test_store_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        HtmlStore(str(tmp_path), compression="lz4")
+
+
+def test_client_stores_html_and_memoizes_extraction(tmp_path, make_session, scrape_response):
+    store = HtmlStore(str(tmp_path))
+    client = FirecrawlClient("fc-test", session=make_session([scrape_response(PAGE)]), html_store=store)
+
+    urls = client.scrape_images("https://example.com")
+
+    digest, _ = store.latest("https://example.com")
+    assert urls == ["https://example.com/a.jpg", "https://example.com/b.png"]
+    assert store.get_extraction(digest, EXTRACTOR_VERSION, "https://example.com") == urls
+
+
+def test_policies_differing_only_in_media_do_not_share_memo(tmp_path, make_session, scrape_response):
+    page = '<picture><source media="(max-width: 600px)" srcset="/narrow.jpg"><img src="/wide.jpg"></picture>'
+    store = HtmlStore(str(tmp_path))
+    narrow = SelectionPolicy("first", media=lambda media: "max-width" in media)
+    never = SelectionPolicy("first", media=lambda media: False)
+
+    first = FirecrawlClient("fc-test", session=make_session([scrape_response(page)]), html_store=store, image_policy=narrow)
+    second = FirecrawlClient("fc-test", session=make_session([scrape_response(page)]), html_store=store, image_policy=never)
+
+    assert first.scrape_images("https://example.com") == ["https://example.com/narrow.jpg"]
+    assert second.scrape_images("https://example.com") == ["https://example.com/wide.jpg"]
+
+
+def test_reextract_runs_offline_against_stored_pages(tmp_path, monkeypatch, make_session, scrape_response):
+    store = HtmlStore(str(tmp_path))
+    session = make_session([scrape_response(PAGE)])
+    FirecrawlClient("fc-test", session=session, html_store=store).scrape_images("https://example.com")
+
+    monkeypatch.setattr(firecrawl_client, "EXTRACTOR_VERSION", "test-next")
+    results = dict(reextract_stored_pages(store))
+
+    assert session.calls == 1
+    assert results == {"https://example.com": ["https://example.com/a.jpg", "https://example.com/b.png"]}
+    digest, _ = store.latest("https://example.com")
+    assert store.get_extraction(digest, "test-next", "https://example.com") is not None
+
+
+def test_memoized_pages_still_pick_up_stylesheet_changes(tmp_path, monkeypatch):
+    store = HtmlStore(str(tmp_path))
+    digest = store.put("https://example.com", '<link rel="stylesheet" href="/site.css"><img src="/a.jpg">')
+    stylesheets = FakeStylesheets(["https://example.com/v1.jpg"])
+
+    first = extract_with_store(store, digest, "https://example.com", stylesheets=stylesheets)
+    monkeypatch.setattr(firecrawl_client, "extract_page_assets", lambda *args, **kwargs: pytest.fail("page was re-parsed"))
+    stylesheets.image_urls = ["https://example.com/v2.jpg"]
+    second = extract_with_store(store, digest, "https://example.com", stylesheets=stylesheets)
+
+    assert first == ["https://example.com/a.jpg", "https://example.com/v1.jpg"]
+    assert second == ["https://example.com/a.jpg", "https://example.com/v2.jpg"]
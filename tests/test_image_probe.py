@@ -0,0 +1,207 @@
+import struct
+import sys
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from cachetools import TTLCache
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from image_probe import ImageProber, filter_images, parse_image_header
+
+
+def png(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + b"\x00\x00\x00" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x80\x00\x00" + b"\x00" * 6 + b";"
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    comment = b"\xff\xfe" + struct.pack(">H", 2 + 2000) + b"x" * 2000
+    sof = b"\xff\xc2" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + comment + sof + b"\xff\xd9"
+
+
+def webp_vp8x(width, height):
+    payload = b"VP8X" + struct.pack("<I", 10) + b"\x00\x00\x00\x00" + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", 4 + len(payload)) + b"WEBP" + payload
+
+
+def webp_vp8l(width, height):
+    bits = (width - 1) | (height - 1) << 14
+    payload = b"VP8L" + struct.pack("<I", 5) + b"\x2f" + struct.pack("<I", bits)
+    return b"RIFF" + struct.pack("<I", 4 + len(payload)) + b"WEBP" + payload
+
+
+FIXTURES = {
+    "/hero.png": ("image/png", png(640, 480)),
+    "/pixel.gif": ("image/gif", gif(1, 1)),
+    "/photo.jpg": ("image/jpeg", jpeg(1920, 1080) + b"\x00" * 200000),
+    "/banner.webp": ("image/webp", webp_vp8x(1200, 300)),
+    "/icon.webp": ("image/webp", webp_vp8l(16, 16)),
+    "/logo.svg": ("image/svg+xml", b'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"/>'),
+    "/page.html": ("text/html", b"<html></html>"),
+}
+
+
+@pytest.fixture
+def image_server(stub_server):
+    def start(supports_head=True, supports_range=True):
+        def handle(request):
+            if request.method == "HEAD" and not supports_head:
+                return 405, b""
+            if request.path not in FIXTURES:
+                return 404, b""
+            content_type, body = FIXTURES[request.path]
+            range_header = request.headers.get("Range")
+            if request.method == "GET" and supports_range and range_header:
+                start, end = range_header.split("=")[1].split("-")
+                part = body[int(start):int(end) + 1]
+                content_range = f"bytes {start}-{int(start) + len(part) - 1}/{len(body)}"
+                return 206, part, {"Content-Type": content_type, "Content-Range": content_range}
+            return 200, body, {"Content-Type": content_type}
+
+        return stub_server(handle)
+
+    return start
+
+
+class RedirectSession:
+    def __init__(self, location):
+        self.location = location
+        self.urls = []
+
+    def request(self, method, url, **kwargs):
+        self.urls.append(url)
+        response = SimpleNamespace(status_code=302, headers={"Location": self.location}, is_redirect=True)
+        response.close = lambda: None
+        return response
+
+
+def make_prober(**kwargs):
+    kwargs.setdefault("cache", TTLCache(maxsize=100, ttl=60))
+    kwargs.setdefault("allow_private", True)
+    return ImageProber(max_workers=4, range_bytes=4096, **kwargs)
+
+
+@pytest.mark.parametrize("data, expected", [
+    (png(640, 480), ("png", 640, 480)),
+    (gif(1, 1), ("gif", 1, 1)),
+    (jpeg(1920, 1080), ("jpeg", 1920, 1080)),
+    (webp_vp8x(1200, 300), ("webp", 1200, 300)),
+    (webp_vp8l(16, 16), ("webp", 16, 16)),
+    (b"<svg/>", None),
+])
+def test_parse_image_header(data, expected):
+    assert parse_image_header(data) == expected
+
+
+def test_probe_reads_dimensions_with_small_range_requests(image_server):
+    server = image_server()
+    info = make_prober().probe(server.url("/photo.jpg"))
+
+    assert (info.format, info.width, info.height) == ("jpeg", 1920, 1080)
+    assert info.content_type == "image/jpeg"
+    assert info.size == len(FIXTURES["/photo.jpg"][1])
+    assert [r.method for r in server.requests] == ["HEAD", "GET"]
+    assert server.requests[1].headers["Range"] == "bytes=0-4095"
+
+
+def test_probe_without_head_or_range_support(image_server):
+    server = image_server(supports_head=False, supports_range=False)
+    info = make_prober().probe(server.url("/photo.jpg"))
+
+    assert (info.width, info.height) == (1920, 1080)
+    assert info.size == len(FIXTURES["/photo.jpg"][1])
+
+
+def test_probe_skips_range_request_for_dead_and_non_image_urls(image_server):
+    server = image_server()
+    prober = make_prober()
+    dead = prober.probe(server.url("/missing.png"))
+    page = prober.probe(server.url("/page.html"))
+
+    assert dead.status == 404 and not dead.ok
+    assert page.content_type == "text/html"
+    assert all(r.method == "HEAD" for r in server.requests)
+
+
+def test_probe_results_are_cached_per_url(image_server):
+    server = image_server()
+    prober = make_prober()
+    first = prober.probe(server.url("/hero.png"))
+    second = prober.probe(server.url("/hero.png"))
+
+    assert first == second
+    assert len(server.requests) == 2
+
+
+def test_probe_many_and_filter_drop_pixels_icons_and_dead_links(image_server):
+    paths = ["/hero.png", "/pixel.gif", "/photo.jpg", "/banner.webp", "/icon.webp", "/logo.svg", "/page.html", "/gone.jpg"]
+    server = image_server()
+    infos = list(make_prober().probe_many(server.url(path) for path in paths))
+
+    assert [info.url for info in infos] == [server.url(path) for path in paths]
+    kept = filter_images(infos, min_width=32, min_height=32)
+    assert [info.url.rsplit("/", 1)[1] for info in kept] == ["hero.png", "photo.jpg", "banner.webp", "logo.svg"]
+
+    raster_only = filter_images(infos, min_width=32, min_height=32, allow_unknown_size=False)
+    assert "logo.svg" not in [info.url.rsplit("/", 1)[1] for info in raster_only]
+
+    webp_only = filter_images(infos, content_types=["image/webp"])
+    assert [info.url.rsplit("/", 1)[1] for info in webp_only] == ["banner.webp", "icon.webp"]
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/a.png",
+    "http://localhost/a.png",
+    "http://10.0.0.5/a.png",
+    "http://192.168.1.1/a.png",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/a.png",
+    "http://[::ffff:127.0.0.1]/a.png",
+    "http://100.64.0.1/a.png",
+    "http://[fd00::1]/a.png",
+    "file:///etc/passwd",
+])
+def test_probe_refuses_non_public_addresses(url):
+    info = make_prober(allow_private=False).probe(url)
+
+    assert not info.ok
+    assert info.status is None
+    assert "Blocked" in info.error
+
+
+def test_probe_does_not_follow_redirects_to_private_hosts(monkeypatch):
+    monkeypatch.setattr("url_guard.socket.getaddrinfo", lambda *args, **kwargs: [(None, None, None, "", ("93.184.216.34", 443))])
+    session = RedirectSession("http://169.254.169.254/latest/meta-data/")
+
+    info = make_prober(allow_private=False, session=session).probe("https://images.example.com/hero.png")
+
+    assert "Blocked" in info.error
+    assert session.urls == ["https://images.example.com/hero.png"]
+
+
+def test_probe_resolves_the_host_again_for_every_request(monkeypatch):
+    answers = iter(["93.184.216.34", "127.0.0.1"])
+    monkeypatch.setattr(
+        "url_guard.socket.getaddrinfo", lambda *args, **kwargs: [(None, None, None, "", (next(answers), 443))]
+    )
+    session = RedirectSession("https://images.example.com/other.png")
+
+    info = make_prober(allow_private=False, session=session).probe("https://images.example.com/hero.png")
+
+    assert "Blocked non-public address 127.0.0.1" in info.error
+    assert session.urls == ["https://images.example.com/hero.png"]
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from cache_utils import (
+    cache_stats,
+    clear_cache,
+    configure_disk_cache,
+    configure_memory_cache,
+    get_cached_result,
+    set_cached_result,
+)
+from firecrawl_client import extract_image_urls_from_html
+from metrics import Metrics, metrics
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    registry = Metrics(enabled=False)
+    events = []
+    registry.add_hook(lambda *event: events.append(event))
+
+    with registry.span("parse"):
+        registry.inc("urls_total", 3)
+
+    assert registry.counters() == []
+    assert registry.summaries() == []
+    assert registry.to_prometheus() == ""
+    assert events == []
+
+
+def test_counters_spans_and_hooks():
+    registry = Metrics(enabled=True)
+    events = []
+    registry.add_hook(lambda *event: events.append(event))
+
+    registry.inc("cache_hits_total", tier="memory")
+    registry.inc("cache_hits_total", 2, tier="memory")
+    with registry.span("fetch"):
+        pass
+
+    assert registry.counter("cache_hits_total", tier="memory") == 3
+    count, total = registry.summary("stage_seconds", stage="fetch")
+    assert count == 1 and total >= 0
+    assert events[0] == ("counter", "cache_hits_total", 1, {"tier": "memory"})
+    assert events[-1][:2] == ("summary", "stage_seconds")
+
+
+def test_prometheus_text_format():
+    registry = Metrics(enabled=True)
+    registry.inc("cache_misses_total", tier='di"sk')
+    registry.observe("stage_seconds", 0.25, stage="parse")
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE image_scraper_cache_misses_total counter\n" in text
+    assert 'image_scraper_cache_misses_total{tier="di\\"sk"} 1\n' in text
+    assert "# TYPE image_scraper_stage_seconds summary\n" in text
+    assert 'image_scraper_stage_seconds_sum{stage="parse"} 0.250000\n' in text
+    assert 'image_scraper_stage_seconds_count{stage="parse"} 1\n' in text
+
+
+def test_extraction_records_stages_and_url_counts(enabled_metrics):
+    html = '<img src="/a.jpg"><img data-src="/a.jpg#x"><img src="/b.png">'
+    extract_image_urls_from_html(html, "https://example.com")
+
+    assert enabled_metrics.summary("stage_seconds", stage="parse")[0] == 1
+    assert enabled_metrics.summary("stage_seconds", stage="normalize")[0] == 1
+    assert enabled_metrics.counter("html_bytes_total") == len(html)
+    assert enabled_metrics.counter("urls_total", stage="extracted") == 3
+    assert enabled_metrics.counter("urls_total", stage="deduplicated") == 2
+
+
+def test_cache_records_hits_misses_and_evictions(enabled_metrics):
+    configure_disk_cache(None)
+    clear_cache()
+    set_cached_result("k:probe", ["https://example.com/a.jpg"])
+    configure_memory_cache(max_bytes=100 * cache_stats()["memory_bytes"])
+    try:
+        get_cached_result("k:missing")
+        set_cached_result("k:present", ["https://example.com/a.jpg"])
+        get_cached_result("k:present")
+        for i in range(101):
+            set_cached_result(f"k:{i}", ["https://example.com/a.jpg"])
+    finally:
+        configure_memory_cache()
+
+    assert enabled_metrics.counter("cache_misses_total", tier="memory") == 1
+    assert enabled_metrics.counter("cache_hits_total", tier="memory") == 1
+    assert enabled_metrics.counter("cache_evictions_total", tier="memory") == 2
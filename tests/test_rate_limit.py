@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from firecrawl_client import FirecrawlClient
+from rate_limit import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimit, RequestScheduler, get_scheduler, plan_limit
+
+
+def wait_for_waiters(scheduler, count):
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["waiting"] < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_plan_limit_rejects_unknown_plans():
+    assert plan_limit("Hobby") == RateLimit(100, 5)
+    with pytest.raises(ValueError, match="Unknown plan"):
+        plan_limit("platinum")
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    scheduler = RequestScheduler(RateLimit(600, 2))
+
+    for _ in range(2):
+        assert scheduler.acquire() < 0.05
+        scheduler.release()
+    waited = scheduler.acquire()
+    scheduler.release()
+
+    assert waited >= 0.08
+
+
+def test_concurrency_cap_and_acquire_timeout():
+    scheduler = RequestScheduler(RateLimit(60000, 1))
+
+    with scheduler.slot():
+        with pytest.raises(ValueError, match="Request timeout"):
+            scheduler.acquire(timeout=0.05)
+        assert scheduler.stats()["waiting"] == 0
+    with scheduler.slot(timeout=0.05):
+        assert scheduler.stats()["in_flight"] == 1
+
+
+def test_interactive_requests_go_before_batch():
+    scheduler = RequestScheduler(RateLimit(60000, 1))
+    order = []
+
+    def worker(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    scheduler.acquire()
+    batch = threading.Thread(target=worker, args=("batch", PRIORITY_BATCH))
+    batch.start()
+    wait_for_waiters(scheduler, 1)
+    interactive = threading.Thread(target=worker, args=("interactive", PRIORITY_INTERACTIVE))
+    interactive.start()
+    wait_for_waiters(scheduler, 2)
+    scheduler.release()
+    batch.join(2)
+    interactive.join(2)
+
+    assert order == ["interactive", "batch"]
+
+
+def test_penalize_blocks_new_requests():
+    scheduler = RequestScheduler(RateLimit(60000, 4))
+    scheduler.penalize(0.1)
+
+    assert scheduler.acquire() >= 0.09
+    scheduler.release()
+
+
+def test_schedulers_are_shared_per_key():
+    first = get_scheduler("fc-shared-key", RateLimit(100, 5))
+    second = get_scheduler("fc-shared-key", RateLimit(500, 50))
+
+    assert first is second
+    assert second.limit == RateLimit(500, 50)
+    assert get_scheduler("fc-other-key", RateLimit(100, 5)) is not first
+
+
+def test_client_reports_queue_time_and_backs_off_on_429(monkeypatch, make_response, make_session, scrape_response):
+    monkeypatch.setattr("firecrawl_client.time.sleep", lambda seconds: None)
+    scheduler = RequestScheduler(RateLimit(60000, 2))
+    session = make_session([make_response(429, headers={"Retry-After": "0.1"}), scrape_response()])
+    client = FirecrawlClient("fc-test-key", session=session, scheduler=scheduler)
+
+    assert client.scrape_images("https://example.com") == ["https://example.com/a.jpg"]
+    assert session.calls == 2
+    assert client.queue_seconds >= 0.09
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_track_queue_time_counts_only_this_threads_waits(make_response, make_session, scrape_response):
+    scheduler = RequestScheduler(RateLimit(60000, 2))
+    session = make_session([scrape_response(), scrape_response()])
+    client = FirecrawlClient("fc-test-key", session=session, scheduler=scheduler)
+
+    scheduler.penalize(0.1)
+    other = threading.Thread(target=client.scrape_images, args=("https://example.com/other",))
+    other.start()
+    other.join()
+    with client.track_queue_time() as timer:
+        client.scrape_images("https://example.com")
+
+    assert client.queue_seconds >= 0.09
+    assert timer.seconds < 0.05
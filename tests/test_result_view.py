@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from result_view import NO_EXTENSION, ResultSet, paginate, thumbnail_grid_html, url_extension
+
+
+URLS = [
+    "https://cdn.example.com/a.JPG",
+    "https://cdn.example.com/b.png?w=200",
+    "https://example.com/c.webp",
+    "https://example.com/gallery/d.jpg#top",
+    "https://other.org/pixel",
+]
+
+
+def test_url_extension_ignores_query_and_case():
+    assert url_extension("https://cdn.example.com/a.JPG") == "jpg"
+    assert url_extension("https://cdn.example.com/b.png?w=200") == "png"
+    assert url_extension("https://other.org/pixel") == NO_EXTENSION
+
+
+def test_result_set_builds_text_once():
+    result = ResultSet(list(URLS))
+
+    assert result.text == "\n".join(URLS)
+    assert result.text is result.text
+
+
+def test_result_set_facets():
+    result = ResultSet(list(URLS))
+
+    assert result.extensions == [NO_EXTENSION, "jpg", "png", "webp"]
+    assert result.domains == ["cdn.example.com", "example.com", "other.org"]
+
+
+def test_result_set_filters_server_side():
+    result = ResultSet(list(URLS))
+
+    assert result.filter() is result.urls
+    assert result.filter(extensions=["jpg"]) == [URLS[0], URLS[3]]
+    assert result.filter(domains=["example.com"]) == [URLS[2], URLS[3]]
+    assert result.filter(extensions=["jpg"], domains=["example.com"]) == [URLS[3]]
+    assert result.filter(query="GALLERY") == [URLS[3]]
+    assert result.filter(extensions=["jpg"]) is result.filter(extensions=["jpg"])
+
+
+def test_paginate_clamps_page_numbers():
+    items = [str(i) for i in range(205)]
+
+    assert paginate(items, 1, 100) == (items[:100], 3)
+    assert paginate(items, 3, 100) == (items[200:], 3)
+    assert paginate(items, 9, 100) == (items[200:], 3)
+    assert paginate(items, 0, 100) == (items[:100], 3)
+    assert paginate([], 1, 50) == ([], 1)
+
+
+def test_thumbnail_grid_escapes_and_lazy_loads():
+    html = thumbnail_grid_html(['https://example.com/a.jpg?x="1"&y=2'])
+
+    assert 'loading="lazy"' in html
+    assert "&quot;1&quot;&amp;y=2" in html
+    assert '"1"' not in html
+
+
+def test_thumbnail_grid_only_links_web_urls():
+    html = thumbnail_grid_html(["JavaScript:alert(1)", " javascript:alert(2)", "data:image/png;base64,AAAA", "https://example.com/a.jpg"])
+
+    assert html.count("<a ") == 1 and html.count("<img ") == 1
+    assert 'href="https://example.com/a.jpg"' in html
+    assert "JavaScript:alert(1)</span>" in html
+    assert 'src="data:' not in html and 'href="data:' not in html
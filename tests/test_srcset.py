@@ -0,0 +1,162 @@
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from firecrawl_client import extract_image_urls_from_html
+from srcset import ImageCandidate, SelectionPolicy, guess_image_type, parse_srcset
+
+RESPONSIVE_HTML = '''
+<picture>
+    <source type="image/avif" srcset="/hero-400.avif 400w, /hero-800.avif 800w">
+    <source type="image/webp" srcset="/hero-400.webp 400w, /hero-800.webp 800w">
+    <img src="/hero-800.jpg" srcset="/hero-400.jpg 400w, /hero-800.jpg 800w, /hero-1600.jpg 1600w">
+</picture>
+<img src="/logo.png" srcset="/logo.png 1x, /logo@2x.png 2x, /logo@3x.png 3x" width="120">
+'''
+
+
+def test_parse_descriptors():
+    assert parse_srcset("a.jpg 1x, b.jpg 2.5x, c.jpg 400w, d.jpg") == [
+        ImageCandidate("a.jpg", density=1.0),
+        ImageCandidate("b.jpg", density=2.5),
+        ImageCandidate("c.jpg", width=400),
+        ImageCandidate("d.jpg"),
+    ]
+
+
+def test_parse_urls_containing_commas():
+    srcset = "https://cdn.example.com/w_100,h_100/a.jpg 100w, https://cdn.example.com/w_200,h_200/a.jpg 200w"
+
+    assert [candidate.url for candidate in parse_srcset(srcset)] == [
+        "https://cdn.example.com/w_100,h_100/a.jpg",
+        "https://cdn.example.com/w_200,h_200/a.jpg",
+    ]
+
+
+def test_parse_trailing_commas_and_whitespace():
+    assert parse_srcset("  a.jpg,,  b.jpg,\n c.jpg 2x ,") == [
+        ImageCandidate("a.jpg"),
+        ImageCandidate("b.jpg"),
+        ImageCandidate("c.jpg", density=2.0),
+    ]
+
+
+def test_parse_drops_invalid_candidates():
+    assert parse_srcset("a.jpg 3q, b.jpg 100w 2x, c.jpg 100h, d.jpg 0w, e.jpg 100w 50h") == [
+        ImageCandidate("e.jpg", width=100),
+    ]
+
+
+def test_parse_descriptor_with_parentheses():
+    assert parse_srcset("a.jpg (x, y) 1x, b.jpg 2x") == [ImageCandidate("b.jpg", density=2.0)]
+
+
+def test_guess_image_type():
+    assert guess_image_type("https://example.com/a.AVIF?v=1") == "image/avif"
+    assert guess_image_type("https://example.com/a.jpeg#x") == "image/jpeg"
+    assert guess_image_type("https://example.com/image") is None
+
+
+def test_policy_rejects_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown selection strategy"):
+        SelectionPolicy("median")
+
+    with pytest.raises(ValueError, match="target_width"):
+        SelectionPolicy("target")
+
+
+def test_policy_size_strategies():
+    candidates = parse_srcset("s.jpg 200w, m.jpg 800w, l.jpg 1600w")
+
+    assert SelectionPolicy("first").select(candidates).url == "s.jpg"
+    assert SelectionPolicy("smallest").select(candidates).url == "s.jpg"
+    assert SelectionPolicy("largest").select(candidates).url == "l.jpg"
+    assert SelectionPolicy("target", target_width=400, dpr=2).select(candidates).url == "m.jpg"
+    assert SelectionPolicy("target", target_width=2000).select(candidates).url == "l.jpg"
+
+
+def test_policy_density_candidates_use_intrinsic_width():
+    candidates = parse_srcset("a.png 1x, b.png 2x, c.png 3x")
+
+    assert SelectionPolicy("target", target_width=200, dpr=2).select(candidates, intrinsic_width=120).url == "c.png"
+    assert SelectionPolicy("target", target_width=120, dpr=2).select(candidates, intrinsic_width=120).url == "b.png"
+
+
+def test_policy_preferred_types():
+    candidates = [
+        ImageCandidate("a.jpg", width=400),
+        ImageCandidate("a.webp", width=400, type="image/webp"),
+        ImageCandidate("b.webp", width=800, type="image/webp"),
+    ]
+    policy = SelectionPolicy("largest", preferred_types=["image/avif", "image/webp"])
+
+    assert policy.select(candidates).url == "b.webp"
+
+
+def test_policy_media_conditions():
+    candidates = [ImageCandidate("narrow.jpg", media="(max-width: 600px)"), ImageCandidate("wide.jpg")]
+
+    assert SelectionPolicy("first").select(candidates).url == "wide.jpg"
+    assert SelectionPolicy("first", media=lambda media: "max-width" in media).select(candidates).url == "narrow.jpg"
+
+
+def test_policy_key_identifies_media_predicate():
+    narrow = SelectionPolicy("first", media=lambda media: "max-width" in media, media_key="narrow")
+    wide = SelectionPolicy("first", media=lambda media: "min-width" in media, media_key="wide")
+
+    assert narrow.key != wide.key != SelectionPolicy("first").key
+    assert SelectionPolicy("first", media=lambda media: True).key is None
+
+
+def test_default_extraction_keeps_first_candidate(engine):
+    html = '<img srcset="https://cdn.example.com/w_100,h_100/a.jpg 100w, https://cdn.example.com/w_200,h_200/a.jpg 200w">'
+
+    assert extract_image_urls_from_html(html, "https://example.com", engine=engine) == [
+        "https://cdn.example.com/w_100,h_100/a.jpg",
+    ]
+
+
+def test_extraction_selects_one_candidate_per_image(engine):
+    policy = SelectionPolicy("target", target_width=400, dpr=2, preferred_types=["image/avif", "image/webp"])
+    urls = extract_image_urls_from_html(RESPONSIVE_HTML, "https://example.com", engine=engine, policy=policy)
+
+    assert urls == ["https://example.com/hero-800.avif", "https://example.com/logo@3x.png"]
+
+
+def test_extraction_returns_the_selected_cdn_candidate(engine):
+    html = '''
+    <img src="https://cdn.shopify.com/s/files/1/p_800x.jpg"
+         srcset="https://cdn.shopify.com/s/files/1/p_200x.jpg 200w,
+                 https://cdn.shopify.com/s/files/1/p_800x.jpg 800w,
+                 https://cdn.shopify.com/s/files/1/p_2000x.jpg 2000w">
+    <img srcset="https://acme.imgix.net/a.jpg?w=300 300w, https://acme.imgix.net/a.jpg?w=1200 1200w">
+    '''
+    policy = SelectionPolicy("target", target_width=300)
+
+    assert extract_image_urls_from_html(html, "https://example.com", engine=engine, policy=policy) == [
+        "https://cdn.shopify.com/s/files/1/p_800x.jpg",
+        "https://acme.imgix.net/a.jpg?w=300",
+    ]
+
+
+def test_extraction_smallest_policy(engine):
+    urls = extract_image_urls_from_html(
+        RESPONSIVE_HTML, "https://example.com", engine=engine, policy=SelectionPolicy("smallest")
+    )
+
+    assert urls == ["https://example.com/hero-400.avif", "https://example.com/logo.png"]
+
+
+def test_extraction_picture_without_img(engine):
+    html = '<picture><source srcset="/a.webp 1x, /a@2x.webp 2x"></picture><img src="/b.jpg">'
+    urls = extract_image_urls_from_html(html, "https://example.com", engine=engine, policy=SelectionPolicy("largest"))
+
+    assert urls == ["https://example.com/a@2x.webp", "https://example.com/b.jpg"]
+
+
+def test_extraction_policy_prefers_lazy_source_over_placeholder(engine):
+    html = '<img src="data:image/gif;base64,R0lGOD" data-src="/real.jpg">'
+    urls = extract_image_urls_from_html(html, "https://example.com", engine=engine, policy=SelectionPolicy("first"))
+
+    assert urls == ["https://example.com/real.jpg"]
@@ -0,0 +1,146 @@
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from firecrawl_client import extract_image_urls_from_html
+from metrics import metrics
+from url_normalize import DEFAULT_CDN_RULES, CdnRule, UrlCanonicalizer, canonicalize_urls
+import re
+
+
+@pytest.fixture
+def canonicalizer():
+    return UrlCanonicalizer(DEFAULT_CDN_RULES)
+
+
+def test_scheme_host_and_default_port_are_normalized(canonicalizer):
+    assert canonicalizer.canonicalize("HTTPS://Example.COM:443/a.jpg") == "https://example.com/a.jpg"
+    assert canonicalizer.canonicalize("http://example.com:80/a.jpg") == "http://example.com/a.jpg"
+    assert canonicalizer.canonicalize("http://example.com:443/a.jpg") == "http://example.com:443/a.jpg"
+    assert canonicalizer.canonicalize("https://example.com./a.jpg") == "https://example.com/a.jpg"
+
+
+def test_percent_encoding_is_normalized(canonicalizer):
+    assert canonicalizer.canonicalize("https://example.com/%7euser/%41.jpg") == "https://example.com/~user/A.jpg"
+    assert canonicalizer.canonicalize("https://example.com/a%2fb.jpg") == "https://example.com/a%2Fb.jpg"
+    assert canonicalizer.canonicalize("https://example.com/a%20b.jpg") == "https://example.com/a%20b.jpg"
+
+
+def test_fragment_is_dropped(canonicalizer):
+    assert canonicalizer.canonicalize("https://example.com/a.jpg#top") == "https://example.com/a.jpg"
+
+
+def test_userinfo_and_ipv6_hosts_are_kept(canonicalizer):
+    assert canonicalizer.canonicalize("http://user:pw@Example.com:80/a.png") == "http://user:pw@example.com/a.png"
+    assert canonicalizer.canonicalize("https://[::1]:8080/a.png") == "https://[::1]:8080/a.png"
+
+
+def test_cdn_resize_variants_collapse(canonicalizer):
+    assert canonicalizer.canonicalize(
+        "https://cdn.shopify.com/s/files/1/products/shoe_200x200@2x.jpg?v=12&width=400"
+    ) == "https://cdn.shopify.com/s/files/1/products/shoe.jpg?v=12"
+    assert canonicalizer.canonicalize(
+        "https://res.cloudinary.com/demo/image/upload/w_200,h_100,c_fill/v1234/sample.jpg"
+    ) == "https://res.cloudinary.com/demo/image/upload/v1234/sample.jpg"
+    assert canonicalizer.canonicalize(
+        "https://acme.imgix.net/hero.jpg?w=200&auto=format&txt=sale"
+    ) == "https://acme.imgix.net/hero.jpg?txt=sale"
+
+
+def test_shopify_rule_only_strips_size_suffixes(canonicalizer):
+    base = "https://cdn.shopify.com/s/files/1/products/"
+
+    assert canonicalizer.canonicalize(base + "p_800x.jpg") == base + "p.jpg"
+    assert canonicalizer.canonicalize(base + "p_x300.jpg") == base + "p.jpg"
+    assert canonicalizer.canonicalize(base + "p_400x300_crop_center.jpg") == base + "p.jpg"
+    assert canonicalizer.canonicalize(base + "photo_1920x1080.jpg") == base + "photo_1920x1080.jpg"
+    assert canonicalizer.canonicalize(base + "p_800x_final.jpg") == base + "p_800x_final.jpg"
+
+
+def test_cdn_rules_are_opt_in():
+    url = "https://cdn.shopify.com/s/files/1/products/p_800x.jpg?width=400"
+
+    assert UrlCanonicalizer().canonicalize(url) == url
+
+
+def test_cloudinary_folders_are_not_mistaken_for_transformations(canonicalizer):
+    base = "https://res.cloudinary.com/demo/image/upload/"
+
+    assert canonicalizer.canonicalize(base + "my_folder/sample.jpg") == base + "my_folder/sample.jpg"
+    assert canonicalizer.canonicalize(base + "ab_cd/x.jpg") == base + "ab_cd/x.jpg"
+    assert canonicalizer.canonicalize(base + "w_200,my_folder/x.jpg") == base + "w_200,my_folder/x.jpg"
+    assert canonicalizer.canonicalize(
+        base + "c_fill,w_400/e_sepia/q_auto,f_auto/products/my_folder/x.jpg"
+    ) == base + "products/my_folder/x.jpg"
+    assert canonicalizer.canonicalize(base + "t_thumb,dpr_2.0/v1/x.jpg") == base + "v1/x.jpg"
+
+
+def test_resize_params_are_kept_on_unknown_hosts(canonicalizer):
+    assert canonicalizer.canonicalize("https://example.com/a.jpg?w=200") == "https://example.com/a.jpg?w=200"
+
+
+def test_generic_resize_collapse_is_opt_in():
+    canonicalizer = UrlCanonicalizer(collapse_generic_resize=True)
+
+    assert canonicalizer.canonicalize("https://example.com/a.jpg?w=200&v=3") == "https://example.com/a.jpg?v=3"
+    assert canonicalizer.canonicalize("https://example.com/a.jpg?width=400") == "https://example.com/a.jpg"
+
+
+def test_custom_rules():
+    rule = CdnRule("images", re.compile(r"^img\.example\.com$"), frozenset({"size"}))
+    canonicalizer = UrlCanonicalizer(rules=[rule])
+
+    assert canonicalizer.canonicalize("https://img.example.com/a.jpg?size=s") == "https://img.example.com/a.jpg"
+    assert canonicalizer.canonicalize(
+        "https://cdn.shopify.com/a.jpg?width=1"
+    ) == "https://cdn.shopify.com/a.jpg?width=1"
+
+
+def test_canonicalize_urls_reports_collapsed_duplicates():
+    urls, collapsed = canonicalize_urls(
+        ["/a.jpg", "a.jpg", "/a.jpg#x", "HTTPS://EXAMPLE.COM/a.jpg", "/b.jpg", "data:image/png;base64,xyz"],
+        "https://example.com/"
+    )
+
+    assert urls == ["https://example.com/a.jpg", "https://example.com/b.jpg"]
+    assert collapsed == 3
+
+
+def test_canonicalize_urls_skips_script_and_data_schemes_in_any_case():
+    urls, _ = canonicalize_urls(
+        ["JavaScript:alert(1)", "DATA:image/png;base64,xyz", "java\tscript:alert(2)", " VBScript:x", "/a.jpg"],
+        "https://example.com/"
+    )
+
+    assert urls == ["https://example.com/a.jpg"]
+
+
+def test_extraction_returns_urls_as_they_appear_on_the_page():
+    html = '''
+    <img src="https://acme.imgix.net/hero.jpg?w=200">
+    <img src="https://acme.imgix.net/hero.jpg?w=800&dpr=2">
+    <img src="https://Example.com:443/logo.png">
+    <img src="/logo.png">
+    '''
+
+    assert extract_image_urls_from_html(html, "https://example.com") == [
+        "https://acme.imgix.net/hero.jpg?w=200",
+        "https://acme.imgix.net/hero.jpg?w=800&dpr=2",
+        "https://example.com/logo.png",
+    ]
+    assert extract_image_urls_from_html(html, "https://example.com", canonicalizer=UrlCanonicalizer(DEFAULT_CDN_RULES)) == [
+        "https://acme.imgix.net/hero.jpg?w=200",
+        "https://example.com/logo.png",
+    ]
+
+
+def test_extraction_records_collapsed_count():
+    metrics.reset()
+    metrics.enabled = True
+    try:
+        extract_image_urls_from_html('<img src="/a.jpg"><img src="/a.jpg#x">', "https://example.com")
+        assert metrics.counter("urls_collapsed_total") == 1
+    finally:
+        metrics.enabled = False
+        metrics.reset()
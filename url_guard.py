@@ -0,0 +1,76 @@
+from typing import Any, List, Union
+from urllib.parse import urljoin, urlsplit
+import ipaddress
+import socket
+
+import requests
+
+DEFAULT_MAX_REDIRECTS = 5
+ALLOWED_SCHEMES = ("http", "https")
+
+# check_url resolves the host itself and requests resolves it again when it connects. A DNS name that
+# rebinds between those two lookups can still reach a non-public address. Every request and redirect hop
+# is re-checked, so this needs a TTL-0 answer that flips inside one request. Treat the guard as defence
+# in depth and block internal ranges at the network layer where that matters.
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+class UnsafeUrlError(ValueError):
+    pass
+
+
+def _is_public(address: IPAddress) -> bool:
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    # is_global also excludes shared (CGNAT 100.64.0.0/10), benchmarking and documentation ranges;
+    # multicast ranges count as global but are never a valid fetch target
+    return address.is_global and not address.is_multicast
+
+
+def _resolve(host: str, port: int) -> List[IPAddress]:
+    try:
+        return [ipaddress.ip_address(host)]
+    except ValueError:
+        pass
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError) as e:
+        raise UnsafeUrlError(f"Cannot resolve {host}: {e}")
+    return [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+
+
+def check_url(url: str, allow_private: bool = False) -> None:
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise UnsafeUrlError(f"Invalid URL: {url}")
+    scheme = parts.scheme.lower()
+    if scheme not in ALLOWED_SCHEMES:
+        raise UnsafeUrlError(f"Blocked URL scheme: {scheme or 'none'}")
+    if not parts.hostname:
+        raise UnsafeUrlError(f"Invalid URL: {url}")
+    if allow_private:
+        return
+    port = port or (443 if scheme == "https" else 80)
+    for address in _resolve(parts.hostname, port):
+        if not _is_public(address):
+            raise UnsafeUrlError(f"Blocked non-public address {address} for {parts.hostname}")
+
+
+def guarded_request(
+    session: requests.Session,
+    method: str,
+    url: str,
+    allow_private: bool = False,
+    max_redirects: int = DEFAULT_MAX_REDIRECTS,
+    **kwargs: Any
+) -> requests.Response:
+    for _ in range(max_redirects + 1):
+        check_url(url, allow_private)
+        response = session.request(method, url, allow_redirects=False, **kwargs)
+        if not response.is_redirect:
+            return response
+        url = urljoin(url, response.headers["Location"])
+        response.close()
+    raise UnsafeUrlError(f"Too many redirects: {url}")
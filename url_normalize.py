@@ -0,0 +1,171 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Sequence, Set, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+import re
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SKIPPED_SCHEMES = frozenset({"data", "javascript", "vbscript"})
+CLOUDINARY_TRANSFORM_PARAMS = (
+    "a", "ac", "af", "ar", "b", "bo", "br", "c", "co", "cs", "d", "dl", "dn", "dpr", "du", "e", "eo", "f", "fl",
+    "fn", "fps", "g", "h", "ki", "l", "o", "p", "pg", "q", "r", "so", "sp", "t", "u", "vc", "vs", "w", "x", "y", "z",
+)
+GENERIC_RESIZE_PARAMS = frozenset({"w", "h", "width", "height", "dpr", "q", "quality", "fit", "crop", "resize"})
+
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# A transformation segment is made only of comma-separated "param_value" components, e.g. "w_200,h_100,c_fill"
+_CLOUDINARY_COMPONENT = rf"(?:{'|'.join(sorted(CLOUDINARY_TRANSFORM_PARAMS, key=len, reverse=True))})_[^,/]+"
+_CLOUDINARY_SEGMENTS = re.compile(rf"(?<=/upload/)(?:{_CLOUDINARY_COMPONENT}(?:,{_CLOUDINARY_COMPONENT})*/)+")
+
+
+class CdnRule(NamedTuple):
+    name: str
+    host_pattern: Pattern[str]
+    drop_params: FrozenSet[str] = frozenset()
+    path_pattern: Optional[Pattern[str]] = None
+
+
+DEFAULT_CDN_RULES: Tuple[CdnRule, ...] = (
+    CdnRule(
+        "shopify",
+        re.compile(r"(^|\.)(cdn\.shopify\.com|shopifycdn\.net)$"),
+        frozenset({"width", "height", "crop"}),
+        # "_200x"/"_x300" are always size suffixes; "_200x300" only counts with a crop or density marker,
+        # since a bare WxH is also common in real filenames such as "photo_1920x1080.jpg"
+        re.compile(r"_(?:\d+x|x\d+|\d+x\d+(?=_crop_|@\dx))(?:_crop_[a-z]+)?(?:@\dx)?(?=\.[A-Za-z0-9]+$)"),
+    ),
+    CdnRule(
+        "cloudinary",
+        re.compile(r"(^|\.)res\.cloudinary\.com$"),
+        path_pattern=_CLOUDINARY_SEGMENTS,
+    ),
+    CdnRule(
+        "imgix",
+        re.compile(r"\.imgix\.net$"),
+        frozenset({"w", "h", "dpr", "q", "fit", "crop", "auto", "fm", "ar"}),
+    ),
+    CdnRule(
+        "wordpress",
+        re.compile(r"^i[0-3]\.wp\.com$"),
+        frozenset({"w", "h", "resize", "fit", "quality", "strip", "ssl", "zoom"}),
+    ),
+    CdnRule(
+        "contentful",
+        re.compile(r"^images\.ctfassets\.net$"),
+        frozenset({"w", "h", "fit", "fm", "q", "f", "r"}),
+    ),
+    CdnRule(
+        "sanity",
+        re.compile(r"^cdn\.sanity\.io$"),
+        frozenset({"w", "h", "fit", "auto", "q", "dpr", "fm", "crop"}),
+    ),
+)
+
+GENERIC_RESIZE_RULE = CdnRule("generic-resize", re.compile(r""), GENERIC_RESIZE_PARAMS)
+
+
+def _normalize_escape(match: "re.Match[str]") -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def _normalize_percent_encoding(value: str) -> str:
+    if "%" not in value:
+        return value
+    return _PERCENT_ESCAPE.sub(_normalize_escape, value)
+
+
+def _drop_query_params(query: str, drop_params: FrozenSet[str]) -> str:
+    if not query or not drop_params:
+        return query
+    kept = [part for part in query.split("&") if part and part.split("=", 1)[0].lower() not in drop_params]
+    return "&".join(kept)
+
+
+class UrlCanonicalizer:
+    def __init__(
+        self,
+        rules: Sequence[CdnRule] = (),
+        collapse_generic_resize: bool = False,
+        cache_size: int = 16384
+    ):
+        self.rules = tuple(rules) + ((GENERIC_RESIZE_RULE,) if collapse_generic_resize else ())
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize) if self.rules else self.normalize
+
+    def _rules_for(self, host: str) -> List[CdnRule]:
+        return [rule for rule in self.rules if rule.host_pattern.search(host)]
+
+    def _normalize(self, url: str) -> str:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.netloc
+
+        if parts.hostname is not None:
+            host = parts.hostname.rstrip(".")
+            if ":" in host:
+                host = f"[{host}]"
+            try:
+                port = parts.port
+            except ValueError:
+                port = None
+            userinfo = netloc.rpartition("@")[0]
+            netloc = f"{userinfo}@{host}" if userinfo else host
+            if port is not None and port != DEFAULT_PORTS.get(scheme):
+                netloc = f"{netloc}:{port}"
+
+        path = _normalize_percent_encoding(parts.path)
+        query = _normalize_percent_encoding(parts.query)
+        return urlunsplit((scheme, netloc, path, query, ""))
+
+    def _canonicalize(self, url: str) -> str:
+        normalized = self.normalize(url)
+        rules = self._rules_for(urlsplit(normalized).hostname or "")
+        if not rules:
+            return normalized
+
+        parts = urlsplit(normalized)
+        path, query = parts.path, parts.query
+        for rule in rules:
+            if rule.path_pattern is not None:
+                path = rule.path_pattern.sub("", path)
+            query = _drop_query_params(query, rule.drop_params)
+        return urlunsplit((parts.scheme, parts.netloc, path, query, ""))
+
+
+DEFAULT_CANONICALIZER = UrlCanonicalizer()
+
+_join = lru_cache(maxsize=16384)(urljoin)
+
+
+def canonicalize_urls(
+    raw_urls: Iterable[str],
+    base_url: str,
+    canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER
+) -> Tuple[List[str], int]:
+    absolute_urls: List[str] = []
+    seen: Set[str] = set()
+    collapsed = 0
+
+    for url in raw_urls:
+        url = url.strip()
+        # Cheap case-insensitive pre-check keeps large data: URIs out of the memo caches
+        if not url or url[:11].lower().startswith(("data:", "javascript:")):
+            continue
+
+        # The CDN-canonical form is only a dedupe key; the URL that appeared on the page is what gets returned
+        try:
+            normalized_url = canonicalizer.normalize(_join(base_url, url))
+            key = canonicalizer.canonicalize(normalized_url)
+        except Exception:
+            continue
+        if normalized_url.partition(":")[0] in SKIPPED_SCHEMES:
+            continue
+
+        if key in seen:
+            collapsed += 1
+        else:
+            seen.add(key)
+            absolute_urls.append(normalized_url)
+
+    return absolute_urls, collapsed